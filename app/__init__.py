@@ -7,6 +7,7 @@ import structlog
 
 from app.config import TOKEN
 from app.middleware.interface import Interface
+from app.ticketing.events import EventLocal
 
 # Configure standard logging to route through structlog
 logging.basicConfig(
@@ -48,15 +49,17 @@ elif os.environ.get("FAKE_CHECK_IN_TEST_MODE", "False").lower() in ("true", "1")
     in_dummy_mode = True
 else:
     log.info("Using real API token")
-interface = Interface(in_dummy_mode=in_dummy_mode)
+# The snapshot of the current event, the singleton Interface serves the default event.
+# Additional events get their own instance on first use, see app.ticketing.events.
+interface: Interface = EventLocal(lambda: Interface.create(in_dummy_mode=in_dummy_mode), default=Interface(in_dummy_mode=in_dummy_mode))  # type: ignore[assignment]
 
 
 def reset_interface(dummy_mode=True):
-    global interface  # noqa: PLW0603
     # Re-initialize the singleton in-place so router module references remain valid.
     # Do NOT clear Interface._instance - calling Interface() on the existing singleton
     # will call __init__ again, resetting its data while keeping the same object.
-    interface = Interface(in_dummy_mode=dummy_mode)
+    Interface(in_dummy_mode=dummy_mode)
+    interface.drop_events()  # type: ignore[attr-defined]
 
 
 __all__ = ["in_dummy_mode", "interface", "log", "reset_interface"]
@@ -19,15 +19,19 @@ import os
 import threading
 from dataclasses import dataclass, field
 from functools import lru_cache
-from typing import Annotated, Any
+from typing import TYPE_CHECKING, Annotated, Any
 
-import jwt
 import requests
 from cachetools import TTLCache, cached
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from pydantic import BaseModel
 
+if TYPE_CHECKING:
+    # jwt loads its crypto backends on import, it is imported on first use since it is only
+    # needed with authentication enabled
+    import jwt
+
 logger = logging.getLogger(__name__)
 
 
@@ -113,13 +117,16 @@ def _get_oidc_config(issuer_url: str) -> dict[str, Any]:
     return resp.json()
 
 
+# the return annotation is quoted, jwt is only imported for type checking at module level
 @cached(cache=TTLCache(maxsize=1, ttl=3600), lock=_cache_lock)  # type: ignore[misc]
-def _get_jwks_client(jwks_uri: str) -> jwt.PyJWKClient:
+def _get_jwks_client(jwks_uri: str) -> "jwt.PyJWKClient":  # noqa: UP037
     """Create and cache a PyJWKClient for the given JWKS URI.
 
     The client itself caches keys internally, and this outer cache
     avoids re-creating the client object on every request.
     """
+    import jwt
+
     return jwt.PyJWKClient(jwks_uri, cache_keys=True, lifespan=3600)
 
 
@@ -132,6 +139,8 @@ def _decode_token(token: str, config: AuthConfig) -> TokenClaims:
     Verifies signature (via JWKS), expiration, issuer, audience, and sub.
     Raises HTTPException on any validation failure.
     """
+    import jwt
+
     try:
         oidc_config = _get_oidc_config(config.issuer_url)
 
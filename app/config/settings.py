@@ -0,0 +1,105 @@
+"""Settings read on every request, compiled once from CONFIG.
+
+Attribute access on an OmegaConf DictConfig goes through several layers of node lookups,
+list and dict values are re-wrapped on each read. Values used on hot paths are copied into
+a frozen, slotted Settings object instead: thresholds as floats, lists as frozensets,
+exclude patterns lower-cased. Call reload_settings() after changing CONFIG at runtime.
+
+Additional events with their own ``pretix_mapping`` (see app.ticketing.events) get Settings
+compiled from it, get_settings() returns those of the current event.
+"""
+
+from collections.abc import Mapping
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Self
+
+from omegaconf import DictConfig, OmegaConf
+
+from app.config import CONFIG
+from app.ticketing.events import current_event, events
+
+# Pretix special cases for multiple roles: list in pretix_mapping -> flags set for the listed tickets
+PRETIX_REFERENCE_ROLES: tuple[tuple[str, tuple[str, ...]], ...] = (
+    ("organizer_and_speaker", ("is_speaker", "is_organizer")),
+    ("organizer_and_sponsor", ("is_sponsor", "is_organizer")),
+    ("speaker_and_sponsor", ("is_speaker", "is_sponsor")),
+    ("speaker_add_keynote", ("is_speaker", "is_keynote")),
+    ("add_speaker", ("is_speaker",)),
+)
+
+
+@dataclass(frozen=True, slots=True)
+class Settings:
+    exact_match_threshold: float
+    close_match_threshold: float
+    include_activities: frozenset[str]
+    exclude_ticket_patterns: tuple[str, ...]  # lower-cased
+    organizer_speakers: frozenset[str]  # Tito ticket references
+    attributes_by_ticket_id: Mapping[int, Mapping[str, bool]]  # Pretix item ID -> attributes
+    reference_roles: Mapping[str, tuple[str, ...]]  # Pretix ticket reference -> extra role flags
+    email_suggestion_max_distance: int
+    email_suggestion_limit: int
+    batch_max_items: int
+
+    @classmethod
+    def from_config(cls, config: DictConfig, pretix_mapping: DictConfig | None = None) -> Self:
+        """Compile ``config``, with ``pretix_mapping`` in place of its own section if given."""
+        pretix_mapping = (config.get("pretix_mapping") if pretix_mapping is None else pretix_mapping) or {}
+        by_ticket_id = (pretix_mapping.get("categories") or {}).get("by_ticket_id") or {}
+        reference_roles: dict[str, tuple[str, ...]] = {}
+        for key, flags in PRETIX_REFERENCE_ROLES:
+            for reference in pretix_mapping.get(key) or ():
+                reference_roles[reference] = tuple(dict.fromkeys(reference_roles.get(reference, ()) + flags))
+        return cls(
+            exact_match_threshold=float(config.name_matching.exact_match_threshold),
+            close_match_threshold=float(config.name_matching.close_match_threshold),
+            include_activities=frozenset(config.get("include_activities") or ()),
+            exclude_ticket_patterns=tuple(x.lower() for x in config.get("exclude_ticket_patterns") or ()),
+            organizer_speakers=frozenset(x.upper() for x in config.get("organizer_speakers") or ()),
+            attributes_by_ticket_id=MappingProxyType(
+                {int(k): MappingProxyType(_to_dict(v)) for k, v in by_ticket_id.items()},
+            ),
+            reference_roles=MappingProxyType(reference_roles),
+            email_suggestion_max_distance=int(config.email_suggestions.max_distance),
+            email_suggestion_limit=int(config.email_suggestions.limit),
+            batch_max_items=int(config.batch_validation.max_items),
+        )
+
+    def exclude_ticket_type(self, ticket_name: str) -> bool:
+        """True if the ticket name contains one of the exclude patterns (case-insensitive)."""
+        if not self.exclude_ticket_patterns:
+            return False
+        name = ticket_name.lower()
+        return any(pattern in name for pattern in self.exclude_ticket_patterns)
+
+
+def _to_dict(value) -> dict:
+    return OmegaConf.to_container(value) if isinstance(value, DictConfig) else dict(value)  # type: ignore[return-value]
+
+
+def _compile_event_settings() -> dict[str, Settings]:
+    return {
+        key: Settings.from_config(CONFIG, event.sections["pretix_mapping"])
+        for key, event in events.items()
+        if "pretix_mapping" in event.sections
+    }
+
+
+_settings = Settings.from_config(CONFIG)
+_event_settings = _compile_event_settings()
+
+
+def get_settings() -> Settings:
+    """Settings of the current event, the common ones unless it has its own pretix_mapping."""
+    if not _event_settings:
+        return _settings
+    return _event_settings.get(current_event(), _settings)
+
+
+def reload_settings() -> Settings:
+    """Recompile the settings from the current CONFIG and events."""
+    global _settings, _event_settings  # noqa: PLW0603
+    _settings = Settings.from_config(CONFIG)
+    _event_settings = _compile_event_settings()
+    return _settings
@@ -3,24 +3,32 @@ import os
 import sys
 from contextlib import asynccontextmanager
 
-import uvicorn
 from fastapi import Depends, FastAPI, Request, status
 from fastapi.encoders import jsonable_encoder
 from fastapi.responses import JSONResponse
 from pydantic import ValidationError
 
+from app import in_dummy_mode, log
 from app.auth import verify_token
 from app.config import CONFIG
 from app.middleware import middleware
-from app.routers import routers
-from app.routers.common import refresh_all
+from app.routers import public_routers, routers
+from app.routers.common import refresh_all_events, refresh_scheduler
+from app.ticketing.admission import rate_limit
+from app.ticketing.checkins import checkin_log, checkin_tally
+from app.ticketing.circuit_breaker import CircuitOpenError
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):  # noqa: ARG001
-    # Startup code
-    refresh_all()
-    # Run Pretix validation and load add-on statistics if using Pretix backend
+    # Startup code, for Pretix this also loads the add-on statistics
+    refresh_all_events()
+    # dummy data never changes, Tito is only refreshed on cache misses and via /tickets/refresh_all/
+    if not in_dummy_mode and CONFIG.TICKETING_BACKEND == "pretix":
+        refresh_scheduler.start()
+    if checkin_log.enabled:
+        log.info(f"replayed {checkin_tally.replay(checkin_log)} check-ins from {checkin_log.path}")
+    # Run Pretix validation if using Pretix backend
     try:
         from app.pretix.validation import validate_pretix_mappings
 
@@ -29,14 +37,6 @@ async def lifespan(app: FastAPI):  # noqa: ARG001
         logger = logging.getLogger("uvicorn.error")
         logger.exception("Failed to validate Pretix mappings")
 
-    try:
-        from app.pretix.addon_stats import load_addon_statistics
-
-        load_addon_statistics()
-    except Exception:  # broad catch intentional during startup
-        logger = logging.getLogger("uvicorn.error")
-        logger.exception("Failed to load add-on statistics")
-
     logger = logging.getLogger("uvicorn.error")
     # Try to get the actual port from uvicorn server
 
@@ -74,15 +74,21 @@ async def lifespan(app: FastAPI):  # noqa: ARG001
     yield
     # Shutdown code
     logger.info("shutting down")
+    refresh_scheduler.stop()
+    checkin_log.close()
 
 
 app = FastAPI(title=CONFIG.PROJECT_NAME, middleware=middleware, lifespan=lifespan)
 
 # routers are dynamically collected in routers.__init__.py file
-# All router endpoints require a valid OAuth2 Bearer token when OIDC_ISSUER_URL is set.
+# All router endpoints require a valid OAuth2 Bearer token when OIDC_ISSUER_URL is set and are
+# rate limited per client, see app.ticketing.admission.
 # Healthcheck endpoints defined directly on the app remain public.
 for router in sorted(routers, key=lambda x: x.router.tags[0]):
-    app.include_router(router.router, dependencies=[Depends(verify_token)])
+    app.include_router(router.router, dependencies=[Depends(verify_token), Depends(rate_limit)])
+# Public routers authenticate requests on their own, e.g. webhooks with a shared secret.
+for router in public_routers:
+    app.include_router(router.router)
 
 
 # Report validation errors, see https://stackoverflow.com/a/62937228
@@ -94,6 +100,16 @@ async def validation_exception_handler(request: Request, exc: ValidationError):
     )
 
 
+# Fail fast while a ticketing API is down, see app.ticketing.circuit_breaker
+@app.exception_handler(CircuitOpenError)
+async def circuit_open_exception_handler(request: Request, exc: CircuitOpenError):  # noqa: ARG001
+    return JSONResponse(
+        status_code=exc.status_code,
+        content={"detail": exc.content},
+        headers={"Retry-After": str(int(exc.retry_after) + 1)},
+    )
+
+
 @app.get("/")
 @app.get("/healthcheck/alive")
 async def healthcheck():
@@ -104,6 +120,8 @@ async def healthcheck():
 if __name__ == "__main__":
     import sys
 
+    import uvicorn  # served by the uvicorn CLI in deployments, only needed here
+
     # Parse command line arguments for host and port
     host = CONFIG.APP.HOST
     port = CONFIG.APP.PORT
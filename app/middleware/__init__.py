@@ -1,9 +1,14 @@
+from starlette.datastructures import MutableHeaders
+from starlette.middleware import Middleware
 from starlette.middleware.base import BaseHTTPMiddleware, RequestResponseEndpoint
 from starlette.requests import Request
-from starlette.responses import Response
+from starlette.responses import JSONResponse, Response
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 from starlette_context import context
 from structlog.contextvars import bind_contextvars, clear_contextvars
 
+from app.ticketing.events import is_known_event, use_event
+
 
 class LoggingMiddleware(BaseHTTPMiddleware):
     # Adapted from https://starlette-context.readthedocs.io/en/latest/example.html
@@ -14,5 +19,89 @@ class LoggingMiddleware(BaseHTTPMiddleware):
         return await call_next(request)
 
 
+class AdmissionMiddleware:
+    """Reject requests with 429 while ``max_in_flight`` requests are being handled.
+
+    See app.ticketing.admission. Counted on the event loop, a streamed response counts until its
+    last chunk is sent.
+    """
+
+    def __init__(self, app: ASGIApp):
+        from app.ticketing.admission import admission  # app.middleware is imported while the app package initializes
+
+        self.app = app
+        self.admission = admission
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        admission = self.admission
+        if scope["type"] != "http" or not admission.enabled or not admission.max_in_flight or scope["path"] in admission.exempt_paths:
+            await self.app(scope, receive, send)
+            return
+        if admission.in_flight >= admission.max_in_flight:
+            admission.rejected_in_flight += 1
+            response = JSONResponse({"detail": "Too many requests in flight"}, status_code=429, headers={"Retry-After": "1"})
+            await response(scope, receive, send)
+            return
+        admission.in_flight += 1
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            admission.in_flight -= 1
+
+
+class EventMiddleware:
+    """Select the event of a request with the X-Event header, see app.ticketing.events.
+
+    Requests without the header are served from the default event, unknown events get a 404.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        key = next((v.decode("latin-1") for k, v in scope["headers"] if k == b"x-event"), None)
+        if key is None:
+            await self.app(scope, receive, send)
+            return
+        if not is_known_event(key):
+            await JSONResponse({"detail": f"Unknown event: {key}"}, status_code=404)(scope, receive, send)
+            return
+        with use_event(key):
+            await self.app(scope, receive, send)
+
+
+class SnapshotAgeMiddleware:
+    """Add the age of the served ticket snapshot in seconds as X-Snapshot-Age header.
+
+    While the ticketing API is down the last good snapshot keeps being served,
+    the header lets clients tell how stale it is. Plain ASGI, no per-request task overhead.
+    """
+
+    def __init__(self, app: ASGIApp):
+        from app import interface  # app.middleware is imported while the app package initializes
+
+        self.app = app
+        self.interface = interface
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_age(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                age = self.interface.snapshot_age
+                if age is not None:
+                    MutableHeaders(scope=message)["X-Snapshot-Age"] = str(int(age))
+            await send(message)
+
+        await self.app(scope, receive, send_with_age)
+
+
 # see docs: https://starlette-context.readthedocs.io/en/latest/plugins.html#example-usage
-middleware = []
+# AdmissionMiddleware comes first, so rejections cost as little as possible.
+# EventMiddleware comes next, so everything after it sees the event of the request
+middleware = [Middleware(AdmissionMiddleware), Middleware(EventMiddleware), Middleware(SnapshotAgeMiddleware)]
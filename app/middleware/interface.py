@@ -1,9 +1,17 @@
+import itertools
 import json
 import re
+import threading
+import time
+from typing import Self
 
 from unidecode import unidecode
 
 from app.config import CONFIG, project_root
+from app.config.settings import get_settings
+
+# Process-wide, so versions never repeat even when the singleton is re-initialized.
+_snapshot_versions = itertools.count(1)
 
 
 class Interface:
@@ -15,6 +23,13 @@ class Interface:
             cls._instance = super().__new__(cls)
         return cls._instance
 
+    @classmethod
+    def create(cls, in_dummy_mode=True) -> Self:
+        """Create a separate instance besides the singleton, e.g. the snapshot of an additional event."""
+        instance = object.__new__(cls)
+        instance.__init__(in_dummy_mode=in_dummy_mode)
+        return instance
+
     def __init__(self, in_dummy_mode=True):
         if not hasattr(self, "initialized"):  # Ensure __init__ is called only once
             self.initialized = True
@@ -29,10 +44,15 @@ class Interface:
         self._valid_emails: dict = {}
         self._valid_names: dict = {}
         self._valid_order_name_combo: dict = {}
+        self._positions_by_order: dict[str, list[dict]] = {}
+        self._positions_by_secret: dict[str, dict] = {}
         self.initial_data_loaded: bool = False
         self.categories: dict = {}  # For Pretix categories
         self.addon_positions: list[dict] = []  # Add-on order positions (e.g., T-shirts)
         self.item_variations: dict[int, str] = {}  # Variation ID → name mapping
+        self.snapshot_version: int = 0  # Moves forward whenever all_sales or all_releases is replaced
+        self.snapshot_time: float = 0.0  # Wall clock time of the last all_sales replacement
+        self._publish_lock = threading.Lock()
         if self.in_dummy_mode:
             self.set_dummy_data()
 
@@ -50,6 +70,10 @@ class Interface:
 
     @all_releases.setter
     def all_releases(self, value):
+        self._set_releases(value)
+        self.snapshot_version = next(_snapshot_versions)
+
+    def _set_releases(self, value: dict) -> None:
         self._all_releases = value
         # Invalidate all caches derived from releases
         self._release_id_map = {}
@@ -65,8 +89,9 @@ class Interface:
     @property
     def valid_ticket_ids(self):
         if not self._valid_ticket_ids:
+            include_activities = get_settings().include_activities
             self._valid_ticket_ids = {
-                v["id"]: v for k, v in self.release_id_map.items() if set(v.get("activities", [])) & set(CONFIG.include_activities)
+                v["id"]: v for v in self.release_id_map.values() if not include_activities.isdisjoint(v.get("activities", ()))
             }
         return self._valid_ticket_ids
 
@@ -88,85 +113,146 @@ class Interface:
     @classmethod
     def exclude_this_ticket_type(cls, ticket_name: str):
         """Filter by ticket name substrings."""
-        for pattern in CONFIG.exclude_ticket_patterns:
-            if pattern.lower() in ticket_name.lower():
-                return True
-        return None
+        return get_settings().exclude_ticket_type(ticket_name) or None
 
     @property
     def all_sales(self):
         return self._all_sales
 
     @all_sales.setter
-    def all_sales(self, value: object) -> None:
-        # value must be a dict, but typed as object to keep setter callable with
-        # any trigger value (the actual data is read from self._all_sales).
-        # Every derived cache must be rebuilt here; otherwise a later refresh
+    def all_sales(self, value: dict) -> None:
+        self._set_sales(value)
+        self.snapshot_version = next(_snapshot_versions)
+        self.snapshot_time = time.time()
+
+    def _set_sales(self, value: dict) -> None:
+        # Every derived index must be rebuilt here; otherwise a later refresh
         # that adds new sales would leave stale lookup dicts and cause false
         # 404s on /validate_email/ and /validate_name/ for freshly sold tickets.
-        self._all_sales = value  # type: ignore[assignment]
-        self.valid_order_ids = None  # type: ignore[assignment]  # trigger cache rebuild
-        self.valid_order_email_combo = None  # type: ignore[assignment]  # trigger cache rebuild
-        self.valid_order_name_combo = None  # type: ignore[assignment]  # trigger cache rebuild
-        self.valid_emails = None  # type: ignore[assignment]  # trigger cache rebuild
-        self.valid_names = None  # type: ignore[assignment]  # trigger cache rebuild
+        self._all_sales = value
+        self._build_sales_indexes()
+
+    @property
+    def snapshot_age(self) -> float | None:
+        """Seconds since the sales snapshot was last replaced, None before the first load."""
+        return time.time() - self.snapshot_time if self.snapshot_time else None
+
+    def publish(
+        self,
+        *,
+        releases: dict,
+        sales: dict,
+        categories: dict | None = None,
+        addon_positions: list[dict] | None = None,
+        item_variations: dict[int, str] | None = None,
+    ) -> None:
+        """Replace all cached data at once with a freshly fetched snapshot.
+
+        The snapshot version moves exactly once, after releases, sales and their indexes are in place.
+        """
+        with self._publish_lock:
+            if categories is not None:
+                self.categories = categories
+            if addon_positions is not None:
+                self.addon_positions = addon_positions
+            if item_variations is not None:
+                self.item_variations = item_variations
+            self._set_releases(releases)
+            self._set_sales(sales)
+            self.snapshot_version = next(_snapshot_versions)
+            self.snapshot_time = time.time()
+
+    def merge_order(self, order_code: str, sales: dict, addon_positions: list[dict] | None = None) -> tuple[list[dict], list[dict]]:
+        """Replace the cached positions of a single order with freshly fetched ones.
+
+        An empty ``sales`` dict drops the order, e.g. after it was canceled. The sales dict is
+        copied before the change, so concurrent readers keep seeing a consistent snapshot.
+
+        Returns the removed sales and the removed add-on positions.
+        """
+        order_code = order_code.upper()
+        with self._publish_lock:
+            removed_sales = self.positions_by_order.get(order_code, [])
+            updated = dict(self._all_sales)
+            for x in removed_sales:
+                updated.pop(x["reference"], None)
+            updated.update(sales)
+            removed_addons = []
+            if addon_positions is not None:
+                kept_addons = []
+                for pos in self.addon_positions:
+                    (removed_addons if pos["order"].upper() == order_code else kept_addons).append(pos)
+                self.addon_positions = kept_addons + addon_positions
+            self.all_sales = updated
+        return removed_sales, removed_addons
+
+    def _build_sales_indexes(self) -> None:
+        """Rebuild every lookup dict derived from all_sales in a single pass.
+
+        The normalized name key is computed once per record and shared by all indexes,
+        the new dicts are swapped in only after the traversal is complete.
+        """
+        valid_order_ids: dict = {}
+        valid_order_email_combo: dict = {}
+        valid_order_name_combo: dict = {}
+        valid_emails: dict = {}
+        valid_names: dict = {}
+        positions_by_order: dict[str, list[dict]] = {}
+        positions_by_secret: dict[str, dict] = {}
+        for x in self._all_sales.values():
+            order = x.get("order")
+            email = x.get("email")
+            name_key = (x.get("name") or "").strip().upper()
+            valid_names[name_key] = x
+            secret = x.get("_pretix_data", {}).get("secret")
+            if secret:
+                positions_by_secret[secret] = x
+            if email:
+                valid_emails[email] = x
+            if order:
+                valid_order_ids[order] = x
+                positions_by_order.setdefault(order, []).append(x)
+                if email:
+                    valid_order_email_combo[(order, email)] = x
+                if name_key:
+                    valid_order_name_combo[(order, name_key)] = x
+        self._valid_order_ids = valid_order_ids
+        self._valid_order_email_combo = valid_order_email_combo
+        self._valid_order_name_combo = valid_order_name_combo
+        self._valid_emails = valid_emails
+        self._valid_names = valid_names
+        self._positions_by_order = positions_by_order
+        self._positions_by_secret = positions_by_secret
 
     @property
     def valid_order_email_combo(self):
-        if not self._valid_order_email_combo:
-            self.valid_order_email_combo = "trigger refresh"  # type: ignore[assignment]
         return self._valid_order_email_combo
 
-    @valid_order_email_combo.setter
-    def valid_order_email_combo(self, _value: object) -> None:
-        # _value is ignored; the dict is always rebuilt from self.all_sales.
-        self._valid_order_email_combo = {(x["order"], x["email"]): x for x in self.all_sales.values() if x.get("order") and x.get("email")}
-
     @property
     def valid_emails(self):
-        if not self._valid_emails:
-            self.valid_emails = None  # trigger rebuild
         return self._valid_emails
 
-    @valid_emails.setter
-    def valid_emails(self, _value: object) -> None:
-        # _value is ignored; the dict is always rebuilt from self.all_sales.
-        self._valid_emails = {x["email"]: x for x in self.all_sales.values() if x["email"]}
-
     @property
     def valid_order_name_combo(self):
-        if not self._valid_order_email_combo:
-            self.valid_order_email_combo = "trigger refresh"  # type: ignore[assignment]
         return self._valid_order_name_combo
 
-    @valid_order_name_combo.setter
-    def valid_order_name_combo(self, _value: object) -> None:
-        # _value is ignored; the dict is always rebuilt from self.all_sales.
-        self._valid_order_name_combo = {
-            (x["order"], x["name"].strip().upper()): x for x in self.all_sales.values() if x.get("order") and x.get("name", "").strip()
-        }
-
     @property
     def valid_names(self):
-        if not self._valid_order_email_combo:
-            self.valid_names = None  # trigger rebuild
         return self._valid_names
 
-    @valid_names.setter
-    def valid_names(self, _value: object) -> None:
-        # _value is ignored; the dict is always rebuilt from self.all_sales.
-        self._valid_names = {x["name"].strip().upper(): x for x in self.all_sales.values()}
-
     @property
     def valid_order_ids(self):
-        if not self._valid_order_ids:
-            self.valid_order_ids = None  # trigger rebuild via setter
         return self._valid_order_ids
 
-    @valid_order_ids.setter
-    def valid_order_ids(self, _value: object) -> None:
-        # _value is ignored; the dict is always rebuilt from self.all_sales.
-        self._valid_order_ids = {x["order"]: x for x in self.all_sales.values() if x.get("order")}
+    @property
+    def positions_by_order(self) -> dict[str, list[dict]]:
+        """Upper-case order code -> all sales (positions) of that order."""
+        return self._positions_by_order
+
+    @property
+    def positions_by_secret(self) -> dict[str, dict]:
+        """Ticket secret (the QR code content, Pretix only) -> sale."""
+        return self._positions_by_secret
 
     def valid_ticket_types(self, data):
         """Return list of qualified ticket types (releases)."""
@@ -52,5 +52,78 @@ class TicketCount(BaseModel):
     ticket_count: int = Field(json_schema_extra={"count": "Number of tickets in cache."})
 
 
+class NameMatch(BaseModel):
+    ticket_id: str = Field(json_schema_extra={"example": "MH9CG-2", "description": "Ticket reference."})
+    order_id: str | None = Field(None, json_schema_extra={"example": "MH9CG", "description": "Order code, if any."})
+    name: str = Field(json_schema_extra={"example": "Sam Smith", "description": "Attendee name as registered."})
+    score: float = Field(json_schema_extra={"example": 0.82, "description": "Trigram similarity between 0 and 1."})
+
+
+class NameSearchResults(BaseModel):
+    results: list[NameMatch] = Field(json_schema_extra={"description": "Matches, best first."})
+
+
+class TicketCheckins(BaseModel):
+    ticket_id: str = Field(json_schema_extra={"example": "ABCDE-1"})
+    count: int = Field(json_schema_extra={"description": "Number of successful validations of the ticket."})
+    first: float = Field(json_schema_extra={"description": "Unix time of the first successful validation."})
+    last: float = Field(json_schema_extra={"description": "Unix time of the last successful validation."})
+
+
+class CheckinSummary(BaseModel):
+    checked_in: int = Field(json_schema_extra={"description": "Number of tickets validated successfully at least once."})
+    checkins: int = Field(json_schema_extra={"description": "Number of successful validations."})
+    duplicates: list[TicketCheckins] = Field(
+        json_schema_extra={"description": "Tickets validated more than once, e.g. duplicate badge pickups, latest first."}
+    )
+
+
+class CheckinBucket(BaseModel):
+    start: int = Field(json_schema_extra={"description": "Unix time the bucket starts."})
+    checkins: int = Field(json_schema_extra={"description": "Successful validations in the bucket."})
+
+
+class LiveStats(BaseModel):
+    window_seconds: int = Field(json_schema_extra={"example": 3600, "description": "Length of the window counted."})
+    bucket_seconds: int = Field(json_schema_extra={"example": 60, "description": "Length of one bucket."})
+    validations: int = Field(json_schema_extra={"description": "Validations in the window."})
+    checkins: int = Field(json_schema_extra={"description": "Successful validations in the window."})
+    failures: int = Field(json_schema_extra={"description": "Failed validations in the window."})
+    fuzzy: int = Field(json_schema_extra={"description": "Successful validations of an approximately matching name."})
+    onsite: int = Field(json_schema_extra={"description": "Successful validations of on-site tickets."})
+    remote: int = Field(json_schema_extra={"description": "Successful validations of remote tickets."})
+    fuzzy_match_rate: float = Field(json_schema_extra={"description": "Share of successful validations that matched fuzzily."})
+    failure_rate: float = Field(json_schema_extra={"description": "Share of validations that failed."})
+    categories: dict[str, int] = Field(json_schema_extra={"description": "Successful validations per ticket category, most first."})
+    checkins_per_bucket: list[CheckinBucket] = Field(json_schema_extra={"description": "Successful validations per bucket, oldest first."})
+
+
+class ServiceStatus(BaseModel):
+    event: str = Field(json_schema_extra={"example": "default", "description": "Event selected with the X-Event header."})
+    snapshot_version: int = Field(json_schema_extra={"description": "Version of the served ticket snapshot."})
+    snapshot_age: float | None = Field(
+        None, json_schema_extra={"description": "Seconds since the snapshot was last updated, null before the first load."}
+    )
+    ticket_count: int = Field(json_schema_extra={"description": "Number of tickets in the snapshot."})
+    last_refresh_error: str | None = Field(None, json_schema_extra={"description": "Error of the last failed refresh."})
+    circuit_breakers: dict[str, dict[str, str | int]] = Field(
+        json_schema_extra={"description": "State and consecutive failures per ticketing API."}
+    )
+    refresh_trigger: dict[str, int] = Field(json_schema_extra={"description": "Refresh signals received, merged and run."})
+    admission: dict[str, int] = Field(
+        json_schema_extra={"description": "Requests in flight and requests rejected by the in-flight cap and the rate limits."}
+    )
+
+
 class Truthy(BaseModel):
     valid: bool = Field(False, json_schema_extra={"description": "Simple true / false response"})
+
+
+class EmailValidation(Truthy):
+    suggestions: list[str] | None = Field(
+        None,
+        json_schema_extra={
+            "example": ["j******e@example.com"],
+            "description": "Masked registered emails close to the given one, only if suggestions were requested.",
+        },
+    )
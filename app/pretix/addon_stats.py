@@ -1,34 +1,35 @@
 """Add-on product statistics for Pretix events.
 
-Fetches and caches add-on order position data from the Pretix API,
-then computes statistics about on-site ticket sales and T-shirt add-ons.
+Add-on order positions are collected during the regular ticket refresh and variation names
+are fetched alongside by the refresh pipeline (see app.pretix.pipeline).
+Computes statistics about on-site ticket sales and T-shirt add-ons.
 """
 
+import threading
 from collections import Counter
+from collections.abc import Iterable
 from http import HTTPStatus
 
-import requests
-
-from app import in_dummy_mode, interface, log
-from app.config import CONFIG
+from app import interface, log
 from app.pretix.models import AddonStatistics, TShirtVariantCount
 from app.pretix.pretix_api import (
-    EVENT_SLUG,
-    ORGANIZER_SLUG,
-    PRETIX_BASE_URL,
-    headers,
+    PRETIX_PAGE_SIZE,
+    breaker,
+    event_headers,
+    event_url,
     response_is_not_ok,
 )
+from app.ticketing.events import EventLocal, event_config
 
 
 def _fetch_all_pages(url: str, params: dict) -> list[dict]:
     """Fetch all pages from a paginated Pretix API endpoint."""
     collect = []
-    params = {**params, "page": 1}
+    params = {**params, "page": 1, "page_size": PRETIX_PAGE_SIZE}
 
     while True:
         log.info(f"fetching page:{params['page']} from {url}")
-        res = requests.get(url, headers=headers, params=params, timeout=30)
+        res = breaker.get(url, headers=event_headers(), params=params, timeout=30)
         if res.status_code != HTTPStatus.OK:
             response_is_not_ok(res)
 
@@ -43,12 +44,12 @@ def _fetch_all_pages(url: str, params: dict) -> list[dict]:
     return collect
 
 
-def _fetch_item_variations(item_id: int) -> dict[int, str]:
+def fetch_item_variations(item_id: int) -> dict[int, str]:
     """Fetch variation names for a specific item.
 
     Returns a mapping of variation ID to human-readable name.
     """
-    url = f"{PRETIX_BASE_URL}/organizers/{ORGANIZER_SLUG}/events/{EVENT_SLUG}/items/{item_id}/variations/"
+    url = f"{event_url()}/items/{item_id}/variations/"
     results = _fetch_all_pages(url, {})
 
     variations = {}
@@ -61,89 +62,123 @@ def _fetch_item_variations(item_id: int) -> dict[int, str]:
     return variations
 
 
-def _fetch_addon_positions(item_id: int) -> list[dict]:
-    """Fetch all order positions for a specific add-on item.
+class AddonAggregates:
+    """Add-on statistics aggregates, kept up to date as positions are added or removed.
 
-    Returns minimal position data needed for statistics.
-    Fetches paid (p) and pending (n) orders separately and combines them,
-    excluding cancelled orders.
-    """
-    url = f"{PRETIX_BASE_URL}/organizers/{ORGANIZER_SLUG}/events/{EVENT_SLUG}/orderpositions/"
-    results = _fetch_all_pages(url, {"item": item_id, "order__status": "p"}) + _fetch_all_pages(
-        url, {"item": item_id, "order__status": "n"}
-    )
-
-    positions = []
-    for pos in results:
-        if pos.get("canceled"):
-            continue
-        positions.append(
-            {
-                "id": pos["id"],
-                "order": pos["order"],
-                "positionid": pos["positionid"],
-                "item": pos["item"],
-                "variation": pos.get("variation"),
-                "addon_to": pos.get("addon_to"),
-            },
-        )
-
-    return positions
-
-
-def load_addon_statistics() -> None:
-    """Fetch add-on data from Pretix API and cache it in the Interface singleton.
-
-    Must be called after refresh_all() so that interface.all_sales and
-    interface.release_id_map are already populated.
+    A full rebuild happens once per published snapshot, single positions are applied
+    incrementally via update(). The AddonStatistics response is computed lazily and
+    cached until the aggregates change, so reading it costs O(1).
     """
-    if in_dummy_mode:
-        log.info("Skipping add-on statistics loading in dummy mode")
-        return
-
-    tshirt_item_id = CONFIG.addon_statistics.tshirt_item_id
-    log.info("Loading add-on statistics from Pretix API")
-
-    interface.item_variations = _fetch_item_variations(tshirt_item_id)
-    log.info(f"Loaded {len(interface.item_variations)} T-shirt variations")
 
-    interface.addon_positions = _fetch_addon_positions(tshirt_item_id)
-    log.info(f"Loaded {len(interface.addon_positions)} T-shirt add-on positions")
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._version = -1  # snapshot version the aggregates reflect
+        self._onsite_item_ids: frozenset[int] = frozenset()
+        self._onsite_tickets_sold = 0
+        self._addons: dict[int, dict] = {}  # add-on position ID → add-on position
+        self._parents: Counter = Counter()  # parent position ID → number of add-ons
+        self._variants: Counter = Counter()  # variation ID → number of add-ons
+        self._cached: AddonStatistics | None = None
+
+    def rebuild(self) -> None:
+        """Recompute all aggregates from the current snapshot."""
+        onsite_category_ids = set(event_config("addon_statistics").get("onsite_category_ids") or ())
+        with self._lock:
+            self._version = interface.snapshot_version
+            self._onsite_item_ids = frozenset(
+                item_id for item_id, release in interface.release_id_map.items() if release.get("category_id") in onsite_category_ids
+            )
+            self._onsite_tickets_sold = sum(1 for sale in interface.all_sales.values() if sale.get("item") in self._onsite_item_ids)
+            self._addons = {}
+            self._parents = Counter()
+            self._variants = Counter()
+            for pos in interface.addon_positions:
+                self._add_addon(pos)
+            self._cached = None
+
+    def update(
+        self,
+        *,
+        added_sales: Iterable[dict] = (),
+        removed_sales: Iterable[dict] = (),
+        added_addons: Iterable[dict] = (),
+        removed_addon_ids: Iterable[int] = (),
+        base_version: int | None = None,
+    ) -> None:
+        """Apply added and removed positions after they were merged into the snapshot.
+
+        ``base_version`` is the snapshot version the change was applied to. If the aggregates
+        do not reflect that version, they are rebuilt from scratch instead.
+        """
+        if base_version is not None and base_version != self._version:
+            self.rebuild()
+            return
+        with self._lock:
+            for sale in removed_sales:
+                if sale.get("item") in self._onsite_item_ids:
+                    self._onsite_tickets_sold -= 1
+            for sale in added_sales:
+                if sale.get("item") in self._onsite_item_ids:
+                    self._onsite_tickets_sold += 1
+            for pos_id in removed_addon_ids:
+                self._remove_addon(pos_id)
+            for pos in added_addons:
+                self._remove_addon(pos["id"])
+                self._add_addon(pos)
+            self._version = interface.snapshot_version
+            self._cached = None
+
+    def _add_addon(self, pos: dict) -> None:
+        self._addons[pos["id"]] = pos
+        if pos.get("addon_to") is not None:
+            self._parents[pos["addon_to"]] += 1
+        if pos.get("variation") is not None:
+            self._variants[pos["variation"]] += 1
+
+    def _remove_addon(self, pos_id: int) -> None:
+        pos = self._addons.pop(pos_id, None)
+        if pos is None:
+            return
+        for counter, key in ((self._parents, pos.get("addon_to")), (self._variants, pos.get("variation"))):
+            if key is None:
+                continue
+            counter[key] -= 1
+            if counter[key] <= 0:
+                del counter[key]
+
+    def statistics(self) -> AddonStatistics:
+        """Return the cached statistics, rebuilding only if a new snapshot was published."""
+        if self._version != interface.snapshot_version:
+            self.rebuild()
+        cached = self._cached
+        if cached is not None:
+            return cached
+        with self._lock:
+            # addon_to references the internal position ID of the parent
+            tshirt_purchased = len(self._parents)
+            tshirt_variants = [
+                TShirtVariantCount(
+                    variant_name=interface.item_variations.get(var_id, f"Unknown ({var_id})"),
+                    count=count,
+                )
+                for var_id, count in sorted(self._variants.items(), key=lambda x: x[1], reverse=True)
+            ]
+            self._cached = AddonStatistics(
+                onsite_tickets_sold=self._onsite_tickets_sold,
+                tshirt_purchased=tshirt_purchased,
+                tshirt_not_purchased=self._onsite_tickets_sold - tshirt_purchased,
+                tshirt_variants=tshirt_variants,
+            )
+            return self._cached
+
+
+# one set of aggregates per event, see app.ticketing.events
+addon_aggregates: AddonAggregates = EventLocal(AddonAggregates)  # type: ignore[assignment]
 
 
 def get_addon_statistics() -> AddonStatistics:
-    """Compute add-on statistics from cached data.
+    """Return add-on statistics from the precomputed aggregates.
 
     Returns metrics about on-site ticket sales and T-shirt add-on purchases.
     """
-    onsite_category_ids = set(CONFIG.addon_statistics.onsite_category_ids)
-
-    # Count on-site tickets from cached sales data
-    onsite_item_ids = {
-        item_id for item_id, release in interface.release_id_map.items() if release.get("category_id") in onsite_category_ids
-    }
-    onsite_tickets = [sale for sale in interface.all_sales.values() if sale.get("item") in onsite_item_ids]
-    onsite_tickets_sold = len(onsite_tickets)
-
-    # Determine which on-site positions have a T-shirt add-on
-    # addon_to references the internal position ID of the parent
-    parent_ids_with_tshirt = {pos["addon_to"] for pos in interface.addon_positions if pos.get("addon_to") is not None}
-    tshirt_purchased = len(parent_ids_with_tshirt)
-    tshirt_not_purchased = onsite_tickets_sold - tshirt_purchased
-
-    # Count variants
-    variation_counts = Counter(pos["variation"] for pos in interface.addon_positions if pos.get("variation") is not None)
-    tshirt_variants = [
-        TShirtVariantCount(
-            variant_name=interface.item_variations.get(var_id, f"Unknown ({var_id})"),
-            count=count,
-        )
-        for var_id, count in sorted(variation_counts.items(), key=lambda x: x[1], reverse=True)
-    ]
-
-    return AddonStatistics(
-        onsite_tickets_sold=onsite_tickets_sold,
-        tshirt_purchased=tshirt_purchased,
-        tshirt_not_purchased=tshirt_not_purchased,
-        tshirt_variants=tshirt_variants,
-    )
+    return addon_aggregates.statistics()
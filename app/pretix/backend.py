@@ -17,6 +17,12 @@ class PretixBackend(TicketingBackend):
     def get_all_ticket_offers(self):
         return self.api.get_all_ticket_offers()
 
+    def refresh(self):
+        """Fetch items, orders and add-on data concurrently and publish them as one snapshot."""
+        from .pipeline import refresh_snapshot
+
+        refresh_snapshot()
+
     def search_reference(self, reference: str):
         return self.api.search_reference(reference)
 
@@ -28,3 +34,9 @@ class PretixBackend(TicketingBackend):
         from .router import router
 
         return router
+
+    def get_public_router(self):
+        """Return the Pretix webhook router, authenticated by a shared secret instead of a token."""
+        from .webhooks import router
+
+        return router
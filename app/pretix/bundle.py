@@ -0,0 +1,163 @@
+"""Offline validation bundle for kiosks, built from the cached snapshot.
+
+Kiosks download the bundle while the network is up and validate locally if the venue network
+goes down. It holds 64-bit keyed hashes (BLAKE2b with the bundle's ``salt`` as key) of
+
+- the registered emails, ``email.casefold().strip()``
+- the attendees, ``f"{order_id.upper()}\\n{name.strip().upper()}"`` as for the exact match of
+  /tickets/validate_attendee/
+
+as sorted arrays of little-endian unsigned 64-bit integers, base64 encoded, so a lookup is a
+binary search. ``attendee_flags`` holds an unsigned 16-bit index into ``flag_sets`` per attendee
+hash, the attribute flags of the ticket.
+
+Bundles are named ``<instance>-<snapshot version>``. With ``since`` set to a bundle a kiosk
+already has, a delta is returned instead: apply ``*_removed`` first, then upsert ``*_added``.
+Indexes into ``flag_sets`` stay valid across the versions of an instance, a restarted service
+answers with a full bundle. The response body is signed with HMAC-SHA256 using the
+KIOSK_BUNDLE_SECRET env var, the hex digest is sent in the ``X-Bundle-Signature`` header.
+"""
+
+import base64
+import hashlib
+import hmac
+import os
+import sys
+import threading
+import time
+import uuid
+from array import array
+from collections import OrderedDict
+from dataclasses import dataclass
+
+from app import interface
+from app.config import CONFIG
+from app.ticketing.events import EventLocal
+from app.ticketing.responses import dumps
+
+from .mapping import position_attributes
+
+BUNDLE_SECRET = os.getenv("KIOSK_BUNDLE_SECRET")
+HASH = "blake2b-64"
+
+# Bundles of another instance (or before a restart) are never used as a delta base
+_INSTANCE = uuid.uuid4().hex[:8]
+_SALT = os.urandom(16)
+
+
+def key_hash(text: str) -> int:
+    return int.from_bytes(hashlib.blake2b(text.encode(), digest_size=8, key=_SALT).digest(), "little")
+
+
+def _b64(values: array) -> str:
+    if sys.byteorder == "big":
+        values = array(values.typecode, values)
+        values.byteswap()
+    return base64.b64encode(values.tobytes()).decode()
+
+
+@dataclass(frozen=True, slots=True)
+class BundleIndex:
+    """Hashed keys of one snapshot version, sorted."""
+
+    version: int
+    emails: array  # of 'Q'
+    attendees: array  # of 'Q'
+    attendee_flags: array  # of 'H', parallel to attendees
+
+    @property
+    def name(self) -> str:
+        return f"{_INSTANCE}-{self.version}"
+
+
+class KioskBundles:
+    """Bundle indexes of the latest snapshot versions, built on first request."""
+
+    def __init__(self, history: int = 16):
+        self.history = history
+        self._lock = threading.Lock()
+        self._indexes: OrderedDict[int, BundleIndex] = OrderedDict()
+        self._flag_sets: dict[tuple[str, ...], int] = {}  # only grows, indexes stay valid for deltas
+        self._full: tuple[int, bytes] | None = None
+
+    def current(self) -> BundleIndex:
+        version = interface.snapshot_version
+        with self._lock:
+            if (index := self._indexes.get(version)) is None:
+                index = self._indexes[version] = self._build(version)
+                while len(self._indexes) > self.history:
+                    self._indexes.popitem(last=False)
+            return index
+
+    def get(self, name: str) -> BundleIndex | None:
+        instance, _, version = name.partition("-")
+        if instance != _INSTANCE or not version.isdigit():
+            return None
+        with self._lock:
+            return self._indexes.get(int(version))
+
+    def full(self, index: BundleIndex) -> bytes:
+        """Encoded full bundle, kept for the current version."""
+        if self._full is not None and self._full[0] == index.version:
+            return self._full[1]
+        body = dumps(
+            {
+                **self._header(index, None),
+                "emails": _b64(index.emails),
+                "attendees": _b64(index.attendees),
+                "attendee_flags": _b64(index.attendee_flags),
+            }
+        )
+        self._full = (index.version, body)
+        return body
+
+    def delta(self, base: BundleIndex, index: BundleIndex) -> bytes:
+        """Encoded changes from ``base`` to ``index``."""
+        old_emails, new_emails = set(base.emails), set(index.emails)
+        old = dict(zip(base.attendees, base.attendee_flags, strict=True))
+        new = dict(zip(index.attendees, index.attendee_flags, strict=True))
+        upserts = sorted((k, v) for k, v in new.items() if old.get(k) != v)
+        return dumps(
+            {
+                **self._header(index, base),
+                "emails_added": _b64(array("Q", sorted(new_emails - old_emails))),
+                "emails_removed": _b64(array("Q", sorted(old_emails - new_emails))),
+                "attendees_added": _b64(array("Q", (k for k, _ in upserts))),
+                "attendee_flags_added": _b64(array("H", (v for _, v in upserts))),
+                "attendees_removed": _b64(array("Q", sorted(old.keys() - new.keys()))),
+            }
+        )
+
+    def _header(self, index: BundleIndex, base: BundleIndex | None) -> dict:
+        with self._lock:
+            flag_sets = [list(x) for x in self._flag_sets]
+        return {
+            "bundle": index.name,
+            "base": base.name if base else None,
+            "created": time.time(),
+            "hash": HASH,
+            "salt": _SALT.hex(),
+            "flag_sets": flag_sets,
+        }
+
+    def _build(self, version: int) -> BundleIndex:
+        release_id_map = interface.release_id_map
+        attendees: dict[int, int] = {}
+        for (order, name), sale in interface.valid_order_name_combo.items():
+            flags = tuple(sorted(position_attributes(sale, release_id_map)))
+            flag_set = self._flag_sets.setdefault(flags, len(self._flag_sets))
+            attendees[key_hash(f"{order}\n{name}")] = flag_set
+        keys = sorted(attendees)
+        return BundleIndex(
+            version=version,
+            emails=array("Q", sorted({key_hash(x.casefold().strip()) for x in interface.valid_emails})),
+            attendees=array("Q", keys),
+            attendee_flags=array("H", (attendees[k] for k in keys)),
+        )
+
+
+def sign(body: bytes) -> str:
+    return hmac.new(BUNDLE_SECRET.encode(), body, hashlib.sha256).hexdigest()  # type: ignore[union-attr]
+
+
+kiosk_bundles: KioskBundles = EventLocal(lambda: KioskBundles(history=int(CONFIG.kiosk_bundle.history)))  # type: ignore[assignment]
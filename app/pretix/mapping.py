@@ -3,7 +3,8 @@
 from typing import Any
 
 from app import log
-from app.config import CONFIG
+from app.config.settings import get_settings
+from app.ticketing.events import event_config
 
 # Constants
 DEFAULT_ATTRIBUTES_COUNT = 3  # is_remote, is_onsite, online_access
@@ -13,8 +14,8 @@ class PretixAttributeMapper:
     """Maps Pretix categories and items to attendee attributes."""
 
     def __init__(self):
-        """Initialize the mapper with configuration."""
-        self.config = CONFIG.get("pretix_mapping", {})
+        """Initialize the mapper with the configuration of the current event."""
+        self.config = event_config("pretix_mapping")
         self.category_by_id = self.config.get("categories", {}).get("by_id") or {}
         self.category_by_name = self.config.get("categories", {}).get("by_name") or {}
         self.category_by_ticket_id = self.config.get("categories", {}).get("by_ticket_id") or {}
@@ -122,3 +123,20 @@ class PretixAttributeMapper:
             "unmapped_items": unmapped_items,
             "categories_found": list(categories.values()),
         }
+
+
+def position_attributes(position: dict, release_id_map: dict) -> dict[str, bool]:
+    """Attribute flags of a cached order position, only flags set to True are included.
+
+    Combines the flags of the item (categories.by_id and name patterns, resolved when the items
+    are loaded), categories.by_ticket_id and the roles listed by ticket reference, e.g.
+    organizer_and_speaker.
+    """
+    release = release_id_map.get(position["item"])
+    flags = dict(release["_attributes"]) if release else {}
+    settings = get_settings()
+    if attributes := settings.attributes_by_ticket_id.get(position["item"]):
+        flags.update(attributes)
+    for flag in settings.reference_roles.get(position["reference"], ()):
+        flags[flag] = True
+    return {k: v for k, v in flags.items() if v}
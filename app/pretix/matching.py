@@ -0,0 +1,88 @@
+"""Attendee claims (order ID and name) matched against the cached snapshot.
+
+Shared by /tickets/validate_attendee/ and the batch variant /tickets/validate_attendees/. The
+matcher takes the indexes of the current snapshot once, a batch is resolved against a single
+consistent snapshot even if a refresh is published meanwhile. No I/O happens here, repairing
+unknown orders from Pretix is left to the endpoints.
+"""
+
+from starlette import status
+
+from app import interface, log
+from app.config.settings import get_settings
+from app.ticketing.utils import fuzzy_match_name
+
+from .mapping import position_attributes
+from .models import PretixAttendee
+
+
+def detailed_positive_result(item, release_id_map: dict | None = None) -> dict[str, bool]:
+    """Build a detailed positive result dict from a matched ticket item.
+
+    Sets attributes to True if matched, never to False.
+    """
+    res = {
+        "name": item["name"].strip(),
+        "order_id": item["order"],
+        "is_attendee": True,
+        "ticket_id": item["reference"],
+        "email": item["email"],
+    }
+    res.update(position_attributes(item, interface.release_id_map if release_id_map is None else release_id_map))
+    return res
+
+
+class AttendeeMatcher:
+    """Resolve attendee claims against the indexes of one snapshot."""
+
+    def __init__(self):
+        self._order_name_combo = interface.valid_order_name_combo
+        self._order_ids = interface.valid_order_ids
+        self._positions_by_order = interface.positions_by_order
+        self._release_id_map = interface.release_id_map
+        self._settings = get_settings()
+
+    def direct_hit(self, attendee: PretixAttendee) -> dict | None:
+        """Look up the exact order ID and name combination."""
+        # noinspection PyBroadException
+        try:
+            return self._order_name_combo.get((attendee.order_id, attendee.name.strip().upper()))
+        except Exception as e:  # noqa: BLE001
+            log.warning("error looking up attendee", error=str(e))
+            return None
+
+    def knows_order(self, attendee: PretixAttendee) -> bool:
+        return bool(attendee.order_id) and attendee.order_id.upper() in self._order_ids  # type: ignore[union-attr]
+
+    def match(self, attendee: PretixAttendee) -> tuple[int, dict, bool]:
+        """Return the HTTP status, the result for a claim and whether the name matched only fuzzily.
+
+        200 for an exact or fuzzy match of a position on the order, 406 if the name is close but
+        not close enough, 404 for unknown orders and names.
+        """
+        if item := self.direct_hit(attendee):
+            return status.HTTP_200_OK, detailed_positive_result(item, self._release_id_map), False
+
+        res: dict = attendee.model_dump()
+        res["is_attendee"] = False
+        if not self.knows_order(attendee):
+            # noinspection PyTypeChecker
+            res["hint"] = "Invalid order ID, must be five alphanumeric chars like 'HLL1H'"
+            return status.HTTP_404_NOT_FOUND, res, False
+
+        # Find position(s) matching the name, an exact enough match wins over close ones
+        is_close = False
+        for position in self._positions_by_order.get(attendee.order_id, []):  # type: ignore[arg-type]
+            name = (position.get("name") or "").strip().upper()
+            if not name:
+                continue
+            match_result = fuzzy_match_name(name, attendee.name, self._settings.exact_match_threshold, self._settings.close_match_threshold)
+            if match_result["is_match"]:
+                return status.HTTP_200_OK, detailed_positive_result(position, self._release_id_map), match_result["ratio"] < 1.0
+            is_close = is_close or match_result["is_close"]
+
+        if is_close:
+            res["hint"] = f"Name '{attendee.name}' is close but not exact enough."
+            return status.HTTP_406_NOT_ACCEPTABLE, res, False
+        res["hint"] = f"No attendee named '{attendee.name}' found on order {attendee.order_id}"
+        return status.HTTP_404_NOT_FOUND, res, False
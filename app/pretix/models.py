@@ -74,6 +74,47 @@ class PretixIsAnAttendee(PretixAttendee, BaseIsAnAttendee):
     )
 
 
+class TicketSecret(BaseModel):
+    """Ticket secret as encoded in the QR code of a Pretix ticket."""
+
+    secret: str = Field(
+        ..., description="Ticket secret scanned from the QR code", json_schema_extra={"example": "z3fsn8jyufm5kpk768q69gkbyr5f4h6w"}
+    )
+
+    @field_validator("secret")
+    @classmethod
+    def validate_secret(cls, v):
+        v = v.strip()
+        if not v:
+            raise ValueError("Secret is required")
+        return v
+
+
+class PretixScanResult(BaseIsAnAttendee):
+    """Pretix scan validation response model, tickets may not be personalized."""
+
+    name: str = Field("", description="Attendee name", json_schema_extra={"example": "Sam Smith"})
+    order_id: str | None = Field(None, description="Order code", json_schema_extra={"example": "MH9CG"})
+    ticket_id: str | None = Field(None, description="Order code with position ID", json_schema_extra={"example": "MH9CG-2"})
+    email: str | None = Field(None, description="Attendee email address", json_schema_extra={"example": "guido@example.com"})
+
+
+class PretixOrderPosition(BaseModel):
+    """A cached position of an order, without the ticket secret."""
+
+    ticket_id: str = Field(..., description="Order code with position ID", json_schema_extra={"example": "MH9CG-2"})
+    name: str = Field("", description="Attendee name", json_schema_extra={"example": "Sam Smith"})
+    email: str = Field("", description="Attendee email address", json_schema_extra={"example": "guido@example.com"})
+    item: int | None = Field(None, description="Pretix item (product) ID", json_schema_extra={"example": 12345})
+
+
+class PretixOrderPositions(BaseModel):
+    """All cached positions of an order."""
+
+    order_id: str = Field(..., description="Order code", json_schema_extra={"example": "MH9CG"})
+    positions: list[PretixOrderPosition] = Field(default_factory=list, description="Positions of the order")
+
+
 class TShirtVariantCount(BaseModel):
     """Count of a specific T-shirt variant."""
 
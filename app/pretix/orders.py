@@ -0,0 +1,81 @@
+"""Targeted single-order updates of the Pretix snapshot.
+
+A cache miss for an order code does not need a full refresh of the event: the order is
+fetched on its own and merged into the live snapshot. Fetches are rate limited per order
+code, so repeated lookups of a non-existent code cause at most one upstream request per
+interval. All codes of an event share a token bucket as well (``order_repair.rate`` and
+``burst``), so enumerating distinct codes cannot turn into one upstream request each.
+"""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+
+from cachetools import TTLCache
+
+from app import interface, log
+from app.config import CONFIG
+from app.pretix import pretix_api
+from app.pretix.addon_stats import addon_aggregates
+from app.ticketing.admission import TokenBuckets
+from app.ticketing.events import bind_event, current_event
+
+_recent_fetches: TTLCache = TTLCache(maxsize=10_000, ttl=CONFIG.order_repair.min_interval)
+_fetch_budget = TokenBuckets(float(CONFIG.order_repair.rate), float(CONFIG.order_repair.burst))  # per event
+_recent_fetches_lock = threading.Lock()
+_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="pretix-order")
+
+
+def refresh_order(order_code: str) -> bool:
+    """Fetch a single order from Pretix and merge it into the snapshot.
+
+    Returns True if the order has valid positions after the merge.
+    """
+    order_code = order_code.upper()
+    sales, addon_positions = pretix_api.fetch_order(order_code)
+    base_version = interface.snapshot_version
+    removed_sales, removed_addons = interface.merge_order(order_code, sales, addon_positions)
+    addon_aggregates.update(
+        added_sales=sales.values(),
+        removed_sales=removed_sales,
+        added_addons=addon_positions,
+        removed_addon_ids=[pos["id"] for pos in removed_addons],
+        base_version=base_version,
+    )
+    log.info(f"merged order {order_code}: {len(removed_sales)} positions removed, {len(sales)} added")
+    return bool(sales)
+
+
+def _claim(order_code: str) -> bool:
+    """Return True if the order may be fetched now: not fetched recently and within the event's budget."""
+    key = (current_event(), order_code)
+    with _recent_fetches_lock:
+        if key in _recent_fetches:
+            log.debug(f"order {order_code} was fetched recently, skipping")
+            return False
+        if _fetch_budget.take(key[0]):
+            log.info(f"order fetch budget used up, not fetching {order_code}")
+            return False
+        _recent_fetches[key] = True
+        return True
+
+
+def repair_order(order_code: str) -> bool:
+    """Try to repair a cache miss for an order code within the configured time budget.
+
+    Returns True if the order was fetched and has valid positions. A fetch that exceeds the
+    budget keeps running in the background and is merged once it completes.
+    """
+    if interface.in_dummy_mode:
+        return False
+    order_code = order_code.upper()
+    if not _claim(order_code):
+        return False
+    future = _executor.submit(bind_event(refresh_order), order_code)
+    try:
+        return future.result(timeout=CONFIG.order_repair.time_budget)
+    except FutureTimeoutError:
+        log.info(f"fetching order {order_code} exceeded the time budget, merging in the background")
+    except Exception as e:  # noqa: BLE001
+        log.warning("fetching order failed", order=order_code, error=str(e))
+    return False
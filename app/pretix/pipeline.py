@@ -0,0 +1,80 @@
+"""Unified refresh pipeline for Pretix.
+
+Fetches categories, items, order positions and add-on variations concurrently and
+publishes them to the snapshot of the current event as one consistent snapshot. A refresh
+takes as long as the slowest endpoint instead of the sum of all of them.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+
+import requests
+
+from app import interface, log
+from app.errors import NotOk
+from app.pretix import pretix_api
+from app.pretix.addon_stats import addon_aggregates, fetch_item_variations
+from app.ticketing.events import bind_event, event_config
+
+
+@dataclass(frozen=True, slots=True)
+class PretixSnapshot:
+    """All data fetched by one refresh, ready to be published."""
+
+    categories: dict
+    releases: dict
+    sales: dict
+    addon_positions: list[dict]
+    item_variations: dict[int, str]
+
+
+def fetch_snapshot() -> PretixSnapshot:
+    """Run all independent Pretix fetches concurrently and combine the results.
+
+    A failing fetch of categories, items or order positions raises after all others have
+    finished, nothing is published then. The add-on variation names are best effort: without a
+    configured T-shirt item they are not fetched, if fetching them fails the previous names are
+    kept and the tickets are published anyway.
+    """
+    tshirt_item_id = event_config("addon_statistics").get("tshirt_item_id")
+    with ThreadPoolExecutor(max_workers=4, thread_name_prefix="pretix-refresh") as pool:
+        categories_future = pool.submit(bind_event(pretix_api.get_all_categories))
+        items_future = pool.submit(bind_event(pretix_api.fetch_raw_items))
+        positions_future = pool.submit(bind_event(pretix_api.fetch_order_positions))
+        variations_future = pool.submit(bind_event(fetch_item_variations), tshirt_item_id) if tshirt_item_id else None
+
+        categories = categories_future.result()
+        releases = pretix_api.transform_items(items_future.result(), categories)
+        sales, addon_positions = positions_future.result()
+        item_variations = interface.item_variations
+        if variations_future is not None:
+            try:
+                item_variations = variations_future.result()
+            except (NotOk, requests.RequestException) as e:
+                log.warning("Failed to load add-on variations, keeping the previous ones", error=str(e))
+
+    return PretixSnapshot(
+        categories=categories,
+        releases=releases,
+        sales=sales,
+        addon_positions=addon_positions,
+        item_variations=item_variations,
+    )
+
+
+def refresh_snapshot() -> None:
+    """Fetch a new snapshot from Pretix and publish it for the current event."""
+    log.info("Refreshing Pretix snapshot")
+    snapshot = fetch_snapshot()
+    interface.publish(
+        releases=snapshot.releases,
+        sales=snapshot.sales,
+        categories=snapshot.categories,
+        addon_positions=snapshot.addon_positions,
+        item_variations=snapshot.item_variations,
+    )
+    addon_aggregates.rebuild()
+    log.info(
+        f"Published Pretix snapshot: {len(snapshot.releases)} items, {len(snapshot.sales)} positions, "
+        f"{len(snapshot.addon_positions)} add-on positions",
+    )
@@ -1,20 +1,25 @@
 # Pretix API configuration
 import os
 from collections import Counter
+from collections.abc import Iterable, Iterator
 from http import HTTPStatus
 
-import requests
 from fastapi.encoders import jsonable_encoder
 
 from app import in_dummy_mode, interface, log
 from app.errors import NotOk
 from app.pretix.mapping import PretixAttributeMapper
+from app.ticketing.circuit_breaker import CircuitBreaker
+from app.ticketing.events import DEFAULT_EVENT, current_event, event_config, events
 
 PRETIX_TOKEN = os.getenv("PRETIX_TOKEN")
 PRETIX_BASE_URL = os.getenv("PRETIX_BASE_URL", "https://pretix.eu/api/v1")
 ORGANIZER_SLUG = os.getenv("PRETIX_ORGANIZER_SLUG")
 EVENT_SLUG = os.getenv("PRETIX_EVENT_SLUG")
 
+# Shared by all calls to the Pretix API, fails fast while Pretix is down
+breaker = CircuitBreaker("pretix")
+
 headers = {
     "Accept": "application/json",
     "Authorization": f"Token {PRETIX_TOKEN}" if PRETIX_TOKEN else "",
@@ -24,25 +29,54 @@ headers_post = dict(headers.items())
 headers_post["Content-Type"] = "application/json"
 
 
-def minimize_data(data: list[dict]) -> list[dict]:
-    """Remove all data that is not relevant to run the application.
-
-    For Pretix, we keep order position data that maps to ticket data in Tito.
-    """
-    opt_in_attributes = {
-        "reference",  # constructed reference (ORDER-POSITION)
-        "email",
-        "name",
-        "release_id",
-        "item",
-        "order",
-        "category",
-        "state",
-        "assigned",
-        "_pretix_data",  # Original Pretix data
-    }
-    log.debug("minimizing data footprint")
-    return [{k: v for k, v in x.items() if k in opt_in_attributes} for x in data]
+# Page size requested for full walks over list endpoints. Pretix clips values above
+# its configured maximum, so asking for more than allowed is harmless.
+PRETIX_PAGE_SIZE = int(os.getenv("PRETIX_PAGE_SIZE", "200"))
+
+# Only positions of paid (p) and pending (n) orders are valid — expired (e),
+# cancelled (c) and refunded (r) orders are filtered out by Pretix already.
+VALID_ORDER_STATUSES = "p,n"
+
+# Fields of an order position needed to build the ticket cache and the add-on statistics.
+# Only these are requested from Pretix via the ``include`` query parameter, see
+# https://docs.pretix.eu/en/latest/api/resources/orders.html. Question answers,
+# check-ins, downloads and PDF data are never transferred or parsed.
+ORDER_POSITION_FIELDS = (
+    "id",
+    "order",
+    "positionid",
+    "item",
+    "variation",
+    "attendee_name",
+    "attendee_email",
+    "secret",
+    "addon_to",
+    "canceled",
+    "blocked",
+)
+
+
+def event_url() -> str:
+    """API URL of the current event, see app.ticketing.events."""
+    event = events.get(current_event())
+    if event is None:
+        return f"{PRETIX_BASE_URL}/organizers/{ORGANIZER_SLUG}/events/{EVENT_SLUG}"
+    return f"{PRETIX_BASE_URL}/organizers/{event.organizer}/events/{event.event}"
+
+
+def event_headers() -> dict[str, str]:
+    """Request headers with the API token of the current event."""
+    event = events.get(current_event())
+    if event is None:
+        return headers
+    return {**headers, "Authorization": f"Token {event.token}" if event.token else ""}
+
+
+def find_event(organizer: str, event_slug: str) -> str | None:
+    """Key of the served event with the given Pretix slugs, None if it is not served here."""
+    if organizer == ORGANIZER_SLUG and event_slug == EVENT_SLUG:
+        return DEFAULT_EVENT
+    return next((x.key for x in events.values() if x.organizer == organizer and x.event == event_slug), None)
 
 
 def filter_valid_items(data: list[dict], valid_item_ids: set) -> list[dict]:
@@ -63,76 +97,138 @@ def response_is_not_ok(response):
         raise NotOk(status_code=response.status_code, content=content)
 
 
-def get_all_order_positions():
-    """Get all order positions.
+def transform_order_position(pos: dict) -> dict | None:
+    """Transform a Pretix order position to the minimal Tito-like ticket structure.
 
-    Equivalent to tickets in Tito. Gets all orders and iterates through the order positions.
+    Returns None for canceled positions.
     """
-    if in_dummy_mode:
-        return
-    log.info("Loading all order positions from Pretix API")
-    collect = []
+    if pos.get("canceled"):
+        return None
+    email = pos.get("attendee_email").casefold().strip() if pos.get("attendee_email") else ""
+    return {
+        # We MUST construct a tito-like reference with numbered suffix via
+        # pos['order'] - pos['positionid'] for uniqueness BUT this information is not accessible to the users
+        "reference": f"{pos['order']}-{pos['positionid']}".upper(),
+        "order": pos["order"].upper(),
+        "email": email,
+        "name": pos.get("attendee_name") if pos.get("attendee_name") else "",
+        "release_id": pos["variation"],  # variation of item ticket ID
+        "item": pos["item"],  # 'main' ticket ID
+        "state": "complete",
+        "assigned": bool(email),
+        # Store original Pretix data for reference
+        "_pretix_data": {
+            "id": pos.get("id"),
+            "order": pos["order"],
+            "positionid": pos["positionid"],
+            "secret": pos.get("secret"),
+            "item": pos["item"],
+            "variation": pos.get("variation"),
+            "canceled": pos.get("canceled"),
+            "blocked": pos.get("blocked"),
+        },
+    }
+
+
+def transform_addon_position(pos: dict) -> dict:
+    """Reduce an add-on order position to the data needed for statistics."""
+    return {
+        "id": pos["id"],
+        "order": pos["order"],
+        "positionid": pos["positionid"],
+        "item": pos["item"],
+        "variation": pos.get("variation"),
+        "addon_to": pos.get("addon_to"),
+    }
 
-    url = f"{PRETIX_BASE_URL}/organizers/{ORGANIZER_SLUG}/events/{EVENT_SLUG}/orders/"
-    params = {"page": 1}
+
+def iter_order_positions() -> Iterator[dict]:
+    """Yield the positions of all paid and pending orders page by page.
+
+    Order status filtering happens server-side and each page carries only the fields listed
+    in ORDER_POSITION_FIELDS, so no more than one trimmed page is held in memory.
+    """
+    url = f"{event_url()}/orderpositions/"
+    params: dict = {
+        "page": 1,
+        "page_size": PRETIX_PAGE_SIZE,
+        "order__status__in": VALID_ORDER_STATUSES,
+        "include": list(ORDER_POSITION_FIELDS),
+    }
 
     while True:
         log.info(f"getting page:{params['page']}")
-        res = requests.get(url, headers=headers, params=params, timeout=30)
+        res = breaker.get(url, headers=event_headers(), params=params, timeout=30)
         if res.status_code != HTTPStatus.OK:
             response_is_not_ok(res)
 
         res_j = res.json()
-        # Transform Pretix data to match Tito structure
-        positions = []
-        for order in res_j["results"]:
-            # noinspection SpellCheckingInspection
-            # Only paid (p) and pending (n) are valid — expired (e), cancelled (c),
-            # refunded (r) are treated as canceled and excluded.
-            state = "complete" if order["status"] in ("p", "n") else "canceled"
-            for pos in order["positions"]:
-                try:
-                    pos_state = "canceled" if pos["canceled"] else state
-                    # Add only valid orders to the API
-                    skip = pos_state == "canceled"
-                    if skip:
-                        continue
-                    email = pos.get("attendee_email").casefold().strip() if pos.get("attendee_email") else ""
-                    transformed = {
-                        # We MUST construct a tito-like reference with numbered suffix via
-                        # pos['order'] - pos['positionid'] for uniqueness BUT this information is not accessible to the users
-                        "reference": f"{pos['order']}-{pos['positionid']}".upper(),
-                        "order": pos["order"].upper(),
-                        "email": email,
-                        "name": pos.get("attendee_name") if pos.get("attendee_name") else "",
-                        "release_id": pos["variation"],  # variation of item ticket ID
-                        "item": pos["item"],  # 'main' ticket ID
-                        "state": pos_state,
-                        "assigned": bool(email),
-                        # Store original Pretix data for reference
-                        "_pretix_data": {
-                            "order": pos["order"],
-                            "positionid": pos["positionid"],
-                            "secret": pos.get("secret"),
-                            "item": pos["item"],
-                            "variation": pos.get("variation"),
-                            "canceled": pos.get("canceled"),
-                            "blocked": pos.get("blocked"),
-                        },
-                    }
-                    positions.append(transformed)
-                except AttributeError as e:
-                    log.warning("error processing position", error=str(e))
-
-        data = minimize_data(positions)
-        collect.extend(data)
+        yield from res_j["results"]
 
-        if res_j["next"]:
-            params["page"] += 1
-        else:
+        if not res_j["next"]:
             break
+        params["page"] += 1
 
-    interface.all_sales = {x["reference"]: x for x in collect}
+
+def collect_positions(positions: Iterable[dict]) -> tuple[dict[str, dict], list[dict]]:
+    """Transform raw positions of paid or pending orders.
+
+    Returns the tickets keyed by reference and the add-on positions used by the add-on statistics.
+    """
+    tshirt_item_id = event_config("addon_statistics").get("tshirt_item_id")
+    sales = {}
+    addon_positions = []
+    for pos in positions:
+        try:
+            transformed = transform_order_position(pos)
+        except AttributeError as e:
+            log.warning("error processing position", error=str(e))
+            continue
+        if transformed is None:
+            continue
+        sales[transformed["reference"]] = transformed
+        if pos["item"] == tshirt_item_id:
+            addon_positions.append(transform_addon_position(pos))
+    return sales, addon_positions
+
+
+def fetch_order_positions() -> tuple[dict[str, dict], list[dict]]:
+    """Walk all order positions once, see collect_positions() for the result."""
+    return collect_positions(iter_order_positions())
+
+
+def fetch_order(order_code: str) -> tuple[dict[str, dict], list[dict]]:
+    """Fetch a single order, see collect_positions() for the result.
+
+    Orders that do not exist or are neither paid nor pending yield no positions.
+    """
+    url = f"{event_url()}/orders/{order_code}/"
+    params = {"include": ["status", *(f"positions.{field}" for field in ORDER_POSITION_FIELDS)]}
+    res = breaker.get(url, headers=event_headers(), params=params, timeout=30)
+    if res.status_code == HTTPStatus.NOT_FOUND:
+        log.debug(f"order {order_code} not found")
+        return {}, []
+    if res.status_code != HTTPStatus.OK:
+        response_is_not_ok(res)
+
+    order = res.json()
+    if order["status"] not in VALID_ORDER_STATUSES.split(","):
+        return {}, []
+    return collect_positions(order["positions"])
+
+
+def get_all_order_positions():
+    """Get all order positions.
+
+    Equivalent to tickets in Tito. A single walk over the order positions fills the ticket cache
+    and collects the add-on positions used by the add-on statistics.
+    """
+    if in_dummy_mode:
+        return
+    log.info("Loading all order positions from Pretix API")
+    sales, addon_positions = fetch_order_positions()
+    interface.addon_positions = addon_positions
+    interface.all_sales = sales
 
 
 def get_all_categories():
@@ -145,12 +241,12 @@ def get_all_categories():
         return {}  # type: ignore[unreachable]
 
     categories = {}
-    url = f"{PRETIX_BASE_URL}/organizers/{ORGANIZER_SLUG}/events/{EVENT_SLUG}/categories/"
-    params = {"page": 1}
+    url = f"{event_url()}/categories/"
+    params = {"page": 1, "page_size": PRETIX_PAGE_SIZE}
 
     while True:
         log.info(f"getting categories page:{params['page']}")
-        res = requests.get(url, headers=headers, params=params, timeout=30)
+        res = breaker.get(url, headers=event_headers(), params=params, timeout=30)
         if res.status_code != HTTPStatus.OK:
             response_is_not_ok(res)
 
@@ -170,55 +266,66 @@ def get_all_categories():
     return categories
 
 
-def get_all_items():
-    """Get all items/products (equivalent to releases/ticket types in Tito)."""
-    if in_dummy_mode:
-        return
-
-    # First fetch categories
-    categories = get_all_categories()
-    # TODO: check if categories are useful at all, risk: they might changes easily the UI
-    interface.categories = categories  # Store for validation
-
+def fetch_raw_items() -> list[dict]:
+    """Fetch all items/products from Pretix without transforming them."""
     collect = []
-    url = f"{PRETIX_BASE_URL}/organizers/{ORGANIZER_SLUG}/events/{EVENT_SLUG}/items/"
-    params = {"page": 1}
+    url = f"{event_url()}/items/"
+    params = {"page": 1, "page_size": PRETIX_PAGE_SIZE}
 
     while True:
         log.info(f"getting page:{params['page']}")
-        res = requests.get(url, headers=headers, params=params, timeout=30)
+        res = breaker.get(url, headers=event_headers(), params=params, timeout=30)
         if res.status_code != HTTPStatus.OK:
             response_is_not_ok(res)
 
         res_j = res.json()
-
-        for item in res_j["results"]:
-            # Determine activities first (which also sets _attributes)
-            activities = determine_activities_from_item(item)
-
-            # Transform Pretix items to match Tito releases structure
-            transformed = {
-                "id": item["id"],
-                "title": item["name"].get("en", item["name"]),  # Handle multi-language
-                "category_id": item.get("category"),
-                "category": categories.get(item.get("category"), {}) if item.get("category") else None,
-                "activities": activities,
-                # Copy the attributes that were set during activity determination
-                "_attributes": item.get("_attributes", {}),
-            }
-            collect.append(transformed)
+        collect.extend(res_j["results"])
 
         if res_j["next"]:
             params["page"] += 1
         else:
             break
 
+    return collect
+
+
+def transform_items(items: list[dict], categories: dict) -> dict[str, dict]:
+    """Transform Pretix items to Tito-like releases keyed by upper-case title."""
+    collect = []
+    for item in items:
+        # Determine activities first (which also sets _attributes)
+        activities = determine_activities_from_item(item)
+
+        # Transform Pretix items to match Tito releases structure
+        transformed = {
+            "id": item["id"],
+            "title": item["name"].get("en", item["name"]),  # Handle multi-language
+            "category_id": item.get("category"),
+            "category": categories.get(item.get("category"), {}) if item.get("category") else None,
+            "activities": activities,
+            # Copy the attributes that were set during activity determination
+            "_attributes": item.get("_attributes", {}),
+        }
+        collect.append(transformed)
+
     # Make sure ticket names are unique
     duplicates = {item: cnt for item, cnt in Counter([str(x["title"]).upper() for x in collect]).items() if cnt > 1}
     if duplicates:
         raise AssertionError(f"ticket names must be unique for mapping: {duplicates}")
 
-    interface.all_releases = {str(x["title"]).upper(): x for x in collect}
+    return {str(x["title"]).upper(): x for x in collect}
+
+
+def get_all_items():
+    """Get all items/products (equivalent to releases/ticket types in Tito)."""
+    if in_dummy_mode:
+        return
+
+    # First fetch categories
+    categories = get_all_categories()
+    # TODO: check if categories are useful at all, risk: they might changes easily the UI
+    interface.categories = categories  # Store for validation
+    interface.all_releases = transform_items(fetch_raw_items(), categories)
 
 
 def determine_activities_from_item(item: dict) -> list[str]:
@@ -280,12 +387,12 @@ def search_reference(reference):
         return None
 
     # Search for the specific order position
-    url = f"{PRETIX_BASE_URL}/organizers/{ORGANIZER_SLUG}/events/{EVENT_SLUG}/orderpositions/"
+    url = f"{event_url()}/orderpositions/"
     params = {
         "order__code": order_code,
     }
 
-    res = requests.get(url, headers=headers, params=params, timeout=30)
+    res = breaker.get(url, headers=event_headers(), params=params, timeout=30)
     if res.status_code != HTTPStatus.OK:
         log.debug(f"the request reference: {reference} returned status code: {res.status_code}")
         response_is_not_ok(res)
@@ -320,11 +427,11 @@ def search(search_for: str):
         return [{"email": search_for}]
 
     # Pretix allows searching by attendee email or name
-    url = f"{PRETIX_BASE_URL}/organizers/{ORGANIZER_SLUG}/events/{EVENT_SLUG}/orderpositions/"
+    url = f"{event_url()}/orderpositions/"
 
     # Try email search first
     params = {"attendee_email__icontains": search_for}
-    res = requests.get(url, headers=headers, params=params, timeout=30)
+    res = breaker.get(url, headers=event_headers(), params=params, timeout=30)
 
     if res.status_code != HTTPStatus.OK:
         log.debug(f"the request {search_for} returned status code: {res.status_code}")
@@ -351,7 +458,7 @@ def search(search_for: str):
     # If no results, try name search
     if not results:
         params = {"attendee_name__icontains": search_for}
-        res = requests.get(url, headers=headers, params=params, timeout=30)
+        res = breaker.get(url, headers=event_headers(), params=params, timeout=30)
 
         if res.status_code == HTTPStatus.OK:
             res_j = res.json()
@@ -374,19 +481,20 @@ def search(search_for: str):
 
 
 def search_by_secret(secret: str):
-    """Search for order position by secret/ticket ID."""
+    """Search for order position by secret/ticket ID.
+
+    Served from the secret index of the cached snapshot, Pretix is only asked for secrets
+    not in the cache, e.g. tickets sold after the last refresh.
+    """
     log.debug(f"searching by secret: {secret}")
-    if in_dummy_mode:
-        # Find by secret in _pretix_data
-        for sale in interface.all_sales.values():
-            if sale.get("_pretix_data", {}).get("secret") == secret:
-                return sale
-        return None
+    sale = interface.positions_by_secret.get(secret)
+    if sale is not None or in_dummy_mode:
+        return sale
 
-    url = f"{PRETIX_BASE_URL}/organizers/{ORGANIZER_SLUG}/events/{EVENT_SLUG}/orderpositions/"
+    url = f"{event_url()}/orderpositions/"
     params = {"secret": secret}
 
-    res = requests.get(url, headers=headers, params=params, timeout=30)
+    res = breaker.get(url, headers=event_headers(), params=params, timeout=30)
 
     res_j = res.json()
     results = res_j.get("results", [])
@@ -416,20 +524,20 @@ def search_by_secret(secret: str):
 
 
 def search_by_order(order_code: str):
-    """Search for all order positions by order code."""
+    """Search for all order positions by order code.
+
+    Served from the order index of the cached snapshot, Pretix is only asked for orders
+    not in the cache.
+    """
     log.debug(f"searching by order: {order_code}")
-    if in_dummy_mode:
-        # Find all positions for this order
-        results = []
-        for sale in interface.all_sales.values():
-            if sale.get("_pretix_data", {}).get("order") == order_code.upper():
-                results.append(sale)
-        return results
-
-    url = f"{PRETIX_BASE_URL}/organizers/{ORGANIZER_SLUG}/events/{EVENT_SLUG}/orderpositions/"
+    positions = interface.positions_by_order.get(order_code.upper())
+    if positions is not None or in_dummy_mode:
+        return list(positions or [])
+
+    url = f"{event_url()}/orderpositions/"
     params = {"order": order_code}
 
-    res = requests.get(url, headers=headers, params=params, timeout=30)
+    res = breaker.get(url, headers=event_headers(), params=params, timeout=30)
 
     res_j = res.json()
     results = []
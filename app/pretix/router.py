@@ -1,35 +1,69 @@
 """Pretix-specific routes."""
 
-from typing import TYPE_CHECKING
+import json
+from collections.abc import Iterator
+from typing import TYPE_CHECKING, Annotated, Literal
 
-from fastapi import APIRouter, BackgroundTasks, Response
+from fastapi import APIRouter, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
 from starlette import status
+from starlette.concurrency import run_in_threadpool
 
 from app import interface, log
-from app.config import CONFIG
-from app.models.base import Email, Truthy
-from app.routers.common import force_refresh_all
+from app.config.settings import get_settings
+from app.models.base import Email, EmailValidation
+from app.routers.common import NOT_MODIFIED, force_refresh_all
 from app.ticketing.backend import get_ticketing_backend
-from app.ticketing.utils import fuzzy_match_name
+from app.ticketing.checkins import record_validation
+from app.ticketing.events import EventLocal
+from app.ticketing.responses import (
+    INVALID,
+    ModelEncoder,
+    SnapshotBody,
+    conditional_response,
+    dumps,
+    json_response,
+    truthy_response,
+)
+from app.ticketing.search_index import email_suggestions
 
 if TYPE_CHECKING:
     from app.pretix.backend import PretixBackend
 
-from .addon_stats import get_addon_statistics, load_addon_statistics
-from .models import AddonStatistics, PretixAttendee, PretixIsAnAttendee
+from . import bundle
+from .addon_stats import get_addon_statistics
+from .export import ATTRIBUTES, CHUNK_ROWS, DEFAULT_FIELDS, FIELDS, ExportFilter, csv_chunks, export_rows, ndjson_chunks
+from .matching import AttendeeMatcher, detailed_positive_result
+from .models import (
+    AddonStatistics,
+    PretixAttendee,
+    PretixIsAnAttendee,
+    PretixOrderPositions,
+    PretixScanResult,
+    TicketSecret,
+)
+from .orders import repair_order
 
 router = APIRouter(prefix="/tickets", tags=["Pretix Validation"])
+EXPORT_FIELDS = ", ".join(FIELDS)
 
+# validation results are returned pre-encoded, see app.ticketing.responses
+_attendee_result = ModelEncoder(PretixIsAnAttendee)
+_scan_result = ModelEncoder(PretixScanResult)
+_addon_statistics: SnapshotBody = EventLocal(lambda: SnapshotBody(get_addon_statistics))  # type: ignore[assignment]
 
-@router.post("/validate_email/", response_model=Truthy)
-async def search_email(email: Email, response: Response, background_tasks: BackgroundTasks):
+
+@router.post("/validate_email/", response_model=EmailValidation, response_model_exclude_none=True)
+async def search_email(email: Email, suggest: bool = False):
     """Search for a participant by email in the preloaded orders cache.
 
     Checks the local email cache first. If found, returns 200 immediately.
 
-    If not found, schedules a background refresh of the Pretix data and returns
+    If not found, signals a background refresh of the Pretix data and returns
     404 right away. The cache will be up-to-date for the next request, so callers
-    can retry after a few seconds to pick up very recent registrations.
+    can retry after a few seconds to pick up very recent registrations. Any number
+    of misses is coalesced into at most one pending refresh (see RefreshTrigger).
 
     This avoids blocking for ~13 s on every cache miss (the full Pretix API
     refresh cost), which occurred whenever the internal TTL cache expired.
@@ -41,132 +75,246 @@ async def search_email(email: Email, response: Response, background_tasks: Backg
     case, which would otherwise cause false 404s for addresses like
     "Jane.Doe@Example.com".
 
-    Note: the status code is set via the Response object rather than raising
-    HTTPException so that FastAPI can attach the background tasks to the response
-    before sending it. Raising an exception bypasses that attachment step.
+    With ``suggest=true`` a miss also returns masked hints for registered emails within a small
+    edit distance (see ``email_suggestions`` in base.yml). A miss with suggestions is most likely
+    a typo, so no refresh is signalled for it.
     """
     req = email.model_dump()
     lookup = req["email"].casefold().strip()
     log.debug(email)
     log.debug(f"searching for email: {req['email']}")
     backend: PretixBackend = get_ticketing_backend()  # type: ignore[assignment]
-    if lookup in backend.api.interface.valid_emails:
-        return {"valid": True}
-    # Not in cache - schedule a background refresh so the next caller sees
-    # up-to-date data, then return 404 immediately.
-    from app.routers.common import refresh_all  # avoid circular import at module level
+    if (sale := backend.api.interface.valid_emails.get(lookup)) is not None:
+        record_validation("email", status.HTTP_200_OK, {"ticket_id": sale.get("reference"), "order_id": sale.get("order")})
+        return truthy_response(True)
+    record_validation("email", status.HTTP_404_NOT_FOUND, {})
+    suggestions = None
+    if suggest:
+        # the index is rebuilt on the first lookup after a refresh, keep that off the event loop
+        suggestions = await run_in_threadpool(email_suggestions.suggest, lookup)
+    if not suggestions:
+        # Not in cache - signal a background refresh so the next caller sees
+        # up-to-date data, then return 404 immediately.
+        from app.routers.common import refresh_trigger  # avoid circular import at module level
 
-    background_tasks.add_task(refresh_all)
-    response.status_code = status.HTTP_404_NOT_FOUND
-    return {"valid": False}
+        refresh_trigger.signal()
+    body = INVALID if suggestions is None else dumps({"valid": False, "suggestions": suggestions})
+    return json_response(body, status.HTTP_404_NOT_FOUND)
 
 
 @router.post("/validate_attendee/", response_model=PretixIsAnAttendee)
-async def validate_pretix_attendee(attendee: PretixAttendee, response: Response):
+async def validate_pretix_attendee(attendee: PretixAttendee):
     """Validate a Pretix attendee by order ID and name.
 
     Uses a combination of exact and fuzzy matching to find the best match for the provided name on
     the specified order.
+
+    An order ID missing from the cache is fetched from Pretix on its own (rate limited per order ID)
+    and merged into the cache. If that finishes within the time budget, the same request is answered
+    with the fresh data, no full refresh is triggered.
     """
-    res: dict = attendee.model_dump()
-    valid_order = False
-    # noinspection PyBroadException
-    try:
-        item = interface.valid_order_name_combo.get((attendee.order_id, attendee.name.strip().upper()))
-        if item:
-            # direct hit, can be processed directly
-            return detailed_positive_result(item)
-    except Exception as e:  # noqa: BLE001
-        log.warning("error looking up attendee", error=str(e))
-    valid_order = bool(attendee.order_id) and attendee.order_id.upper() in interface.valid_order_ids  # type: ignore[union-attr]
-
-    if not valid_order:
-        response.status_code = status.HTTP_404_NOT_FOUND
-        res["is_attendee"] = False
-        # noinspection PyTypeChecker
-        res["hint"] = "Invalid order ID, must be five alphanumeric chars like 'HLL1H'"
-        return res
-
-    # Find position(s) matching the name
-    matching_positions = []
-    for name in [name_ for order_id, name_ in interface.valid_order_name_combo if order_id == attendee.order_id]:
-        match_result = fuzzy_match_name(
-            name,
-            attendee.name,
-            CONFIG.name_matching.exact_match_threshold,
-            CONFIG.name_matching.close_match_threshold,
-        )
-        if match_result["is_match"]:
-            item = interface.valid_order_name_combo[(attendee.order_id, name)]
-            matching_positions.append((name, match_result, item))
-        elif match_result["is_close"]:
-            matching_positions.append((name, match_result, {}))
-
-    if not matching_positions:
+    matcher = AttendeeMatcher()
+    if (
+        not matcher.knows_order(attendee)
+        and attendee.order_id
+        and not matcher.direct_hit(attendee)
+        and await run_in_threadpool(repair_order, attendee.order_id)
+    ):
+        # the order was fetched and has valid positions now
+        matcher = AttendeeMatcher()
+    status_code, result, fuzzy = matcher.match(attendee)
+    record_validation("attendee", status_code, result, fuzzy=fuzzy)
+    return _attendee_result.response(result, status_code)
+
+
+BATCH_REQUEST_BODY = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            "application/json": {
+                "schema": {"type": "array", "items": PretixAttendee.model_json_schema(ref_template="#/components/schemas/{model}")}
+            },
+            "application/x-ndjson": {"schema": {"type": "string", "description": "One PretixAttendee JSON object per line"}},
+        },
+    }
+}
+
+
+@router.post(
+    "/validate_attendees/",
+    response_class=StreamingResponse,
+    responses={200: {"content": {"application/x-ndjson": {}}, "description": "One result per claim, in input order"}},
+    openapi_extra=BATCH_REQUEST_BODY,
+)
+async def validate_pretix_attendees(request: Request):
+    """Validate many attendee claims (order ID and name) in one call, e.g. for nightly reconciliation.
+
+    Accepts a JSON list or, with ``Content-Type: application/x-ndjson``, one claim per line. Results are
+    streamed back as NDJSON in input order: the fields of /tickets/validate_attendee/ plus ``index``
+    and ``status`` (200 match, 406 close, 404 unknown order or name, 422 invalid claim).
+
+    All claims are resolved against the same snapshot. Unlike the single validation, unknown orders
+    are not fetched from Pretix one by one, a single background refresh is signalled instead.
+    """
+    body = await request.body()
+    if request.headers.get("content-type", "").startswith("application/x-ndjson"):
+        claims: list = [line for line in body.splitlines() if line.strip()]
+    else:
+        try:
+            claims = json.loads(body)
+        except ValueError as e:
+            raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_CONTENT, detail=f"Invalid JSON: {e}") from e
+        if not isinstance(claims, list):
+            raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_CONTENT, detail="Expected a list of attendee claims")
+    return StreamingResponse(_batch_results(claims, AttendeeMatcher()), media_type="application/x-ndjson")
+
+
+def _batch_results(claims: list, matcher: AttendeeMatcher) -> Iterator[bytes]:
+    """Encode one result line per claim, CHUNK_ROWS lines per chunk."""
+    max_items = get_settings().batch_max_items
+    unknown_orders = False
+    chunk = []
+    for index, claim in enumerate(claims):
+        if index >= max_items:
+            chunk.append(
+                dumps({"index": index, "status": status.HTTP_413_CONTENT_TOO_LARGE, "hint": f"Only {max_items} claims per request"})
+            )
+            break
+        try:
+            attendee = PretixAttendee.model_validate_json(claim) if isinstance(claim, bytes) else PretixAttendee.model_validate(claim)
+        except ValidationError as e:
+            chunk.append(dumps({"index": index, "status": status.HTTP_422_UNPROCESSABLE_CONTENT, "hint": e.errors()[0]["msg"]}))
+            continue
+        status_code, result, _ = matcher.match(attendee)
+        unknown_orders = unknown_orders or not matcher.knows_order(attendee)
+        chunk.append(dumps({"index": index, "status": status_code, **_attendee_result.fill(result)}))
+        if len(chunk) >= CHUNK_ROWS:
+            yield b"\n".join(chunk) + b"\n"
+            chunk = []
+    if chunk:
+        yield b"\n".join(chunk) + b"\n"
+    if unknown_orders:
+        from app.routers.common import refresh_trigger  # avoid circular import at module level
+
+        refresh_trigger.signal()
+
+
+@router.post("/validate_secret/", response_model=PretixScanResult)
+async def validate_secret(ticket: TicketSecret):
+    """Validate a scanned ticket secret (QR code) against the cached snapshot.
+
+    The lookup is a single dict access on the secret index, Pretix is never called. Returns the
+    same attribute flags as /tickets/validate_attendee/. Unknown secrets return 404 and signal a
+    background refresh, like /tickets/validate_email/.
+    """
+    item = interface.positions_by_secret.get(ticket.secret)
+    if item:
+        result = detailed_positive_result(item)
+        record_validation("secret", status.HTTP_200_OK, result)
+        return _scan_result.response(result)
+    record_validation("secret", status.HTTP_404_NOT_FOUND, {})
+    from app.routers.common import refresh_trigger  # avoid circular import at module level
+
+    refresh_trigger.signal()
+    return _scan_result.response({"is_attendee": False, "hint": "Unknown ticket secret"}, status.HTTP_404_NOT_FOUND)
+
+
+@router.get("/orders/{order_id}/", response_model=PretixOrderPositions)
+async def get_order_positions(order_id: str, response: Response):
+    """List all positions of an order, e.g. for group check-ins and help-desk lookups.
+
+    Served from the order index of the cached snapshot. An order missing from the cache is
+    fetched from Pretix on its own, rate limited per order ID like /tickets/validate_attendee/.
+    """
+    order_id = order_id.strip().upper()
+    positions = interface.positions_by_order.get(order_id)
+    if positions is None and await run_in_threadpool(repair_order, order_id):
+        positions = interface.positions_by_order.get(order_id)
+    if positions is None:
         response.status_code = status.HTTP_404_NOT_FOUND
-        res["is_attendee"] = False
-        res["hint"] = f"No attendee named '{attendee.name}' found on order {attendee.order_id}"
-        return res
-
-    for _, match_result, item in matching_positions:
-        if match_result["is_match"]:
-            return detailed_positive_result(item)
-    for _, match_result, _ in matching_positions:
-        if match_result["is_close"]:
-            response.status_code = status.HTTP_406_NOT_ACCEPTABLE
-            res["is_attendee"] = False
-            res["hint"] = f"Name '{attendee.name}' is close but not exact enough."
-            return res
-    response.status_code = status.HTTP_404_NOT_FOUND
-    res["is_attendee"] = False
-    res["hint"] = f"No attendee named '{attendee.name}' found on order {attendee.order_id}"
-    return res
-
-
-@router.get("/addon_statistics/", response_model=AddonStatistics, tags=["Pretix Statistics"])
-async def addon_statistics():
+        return {"order_id": order_id, "positions": []}
+    return {
+        "order_id": order_id,
+        "positions": [
+            {"ticket_id": x["reference"], "name": x.get("name") or "", "email": x.get("email") or "", "item": x.get("item")}
+            for x in positions
+        ],
+    }
+
+
+@router.get(
+    "/kiosk_bundle/",
+    response_class=Response,
+    responses={
+        200: {"content": {"application/json": {}}, "description": "Full bundle, or a delta with since"},
+        **NOT_MODIFIED,
+        503: {"description": "KIOSK_BUNDLE_SECRET is not set"},
+    },
+    tags=["Pretix Export"],
+)
+def get_kiosk_bundle(since: str | None = Query(None, description="Bundle the kiosk has, e.g. 3f2a9c1e-42, to get a delta")):
+    """Export hashed emails and attendee keys with their attribute flags for offline validation at kiosks.
+
+    The body is signed with KIOSK_BUNDLE_SECRET (HMAC-SHA256, hex digest in ``X-Bundle-Signature``),
+    see app.pretix.bundle for the format. ``since`` returns the changes from that bundle, or the full
+    bundle if it is no longer known, and 304 if nothing changed.
+    """
+    if not bundle.BUNDLE_SECRET:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Kiosk bundles are not configured")
+    bundles = bundle.kiosk_bundles.for_event()
+    index = bundles.current()
+    if since == index.name:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED)
+    base = bundles.get(since) if since else None
+    body = bundles.delta(base, index) if base else bundles.full(index)
+    return Response(body, media_type="application/json", headers={"X-Bundle-Signature": bundle.sign(body)})
+
+
+@router.get(
+    "/export/",
+    response_class=StreamingResponse,
+    responses={200: {"content": {"application/x-ndjson": {}, "text/csv": {}}, "description": "One row per ticket"}},
+    tags=["Pretix Export"],
+)
+def export_attendees(
+    fmt: Literal["ndjson", "csv"] = Query("ndjson", alias="format", description="Output format"),
+    fields: Annotated[
+        list[str] | None, Query(description=f"Columns, any of {EXPORT_FIELDS}, defaults to all but item and category_id")
+    ] = None,
+    category: Annotated[list[int] | None, Query(description="Only tickets of these category IDs")] = None,
+    item: Annotated[list[int] | None, Query(description="Only tickets of these item (product) IDs")] = None,
+    attribute: Annotated[list[str] | None, Query(description="Only tickets with all of these attribute flags set, e.g. is_speaker")] = None,
+):
+    """Stream the attendees of the cached snapshot as NDJSON or CSV, Pretix is never called.
+
+    Attribute flags are resolved like in /tickets/validate_attendee/. Repeat a parameter to pass
+    several values, e.g. ``?attribute=is_speaker&attribute=is_onsite&fields=name&fields=email``.
+    """
+    fields = fields or list(DEFAULT_FIELDS)
+    unknown = sorted({*fields} - {*FIELDS} | {*(attribute or ())} - {*ATTRIBUTES})
+    if unknown:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_CONTENT, detail=f"Unknown fields or attributes: {', '.join(unknown)}")
+    only = ExportFilter(categories=frozenset(category or ()), items=frozenset(item or ()), attributes=tuple(attribute or ()))
+    rows = export_rows(interface.all_sales.values(), interface.release_id_map, fields, only)
+    if fmt == "csv":
+        headers = {"Content-Disposition": 'attachment; filename="attendees.csv"'}
+        return StreamingResponse(csv_chunks(rows, fields), media_type="text/csv", headers=headers)
+    return StreamingResponse(ndjson_chunks(rows), media_type="application/x-ndjson")
+
+
+@router.get("/addon_statistics/", response_model=AddonStatistics, responses=NOT_MODIFIED, tags=["Pretix Statistics"])
+async def addon_statistics(request: Request):
     """Return add-on product statistics from cached data.
 
     Provides metrics about on-site ticket sales and Conference T-Shirt add-on purchases.
-    Data is loaded on startup and can be refreshed via /tickets/refresh_addon_statistics/.
+    Data is loaded on startup with every ticket refresh and can be refreshed via /tickets/refresh_addon_statistics/.
+    The ETag changes with the snapshot, send it as If-None-Match to get a 304 while nothing changed.
     """
-    return get_addon_statistics()
+    return conditional_response(request, _addon_statistics.for_event())
 
 
 @router.get("/refresh_addon_statistics/", response_model=AddonStatistics, tags=["Pretix Statistics"])
-async def refresh_addon_statistics():
+def refresh_addon_statistics():
     """Refresh all ticket data + add-on statistics from Pretix API and return updated data."""
     force_refresh_all()
-    load_addon_statistics()
     return get_addon_statistics()
-
-
-def detailed_positive_result(item) -> dict[str, bool]:
-    """Build a detailed positive result dict from a matched ticket item.
-
-    Sets attributes to True if matched, never to False.
-    """
-    res = {"name": item["name"], "order_id": item["order"], "is_attendee": True, "ticket_id": item["reference"], "email": item["email"]}
-
-    # add ticket features via categories.by_id
-    _attributes = interface.release_id_map[item["item"]]["_attributes"]
-    res.update(_attributes)
-    # add ticket features categories.by_ticket_id
-    _attributes = CONFIG.pretix_mapping.categories.by_ticket_id.get(item["item"], {})
-    res.update(_attributes)
-    # add ticket ticker_id + pos:
-    #  - organizer_and_speaker
-    if CONFIG.pretix_mapping.organizer_and_speaker and item["reference"] in CONFIG.pretix_mapping.organizer_and_speaker:
-        res.update({"is_speaker": True, "is_organizer": True})
-    #  - organizer_and_sponsor
-    if CONFIG.pretix_mapping.organizer_and_sponsor and item["reference"] in CONFIG.pretix_mapping.organizer_and_sponsor:
-        res.update({"is_sponsor": True, "is_organizer": True})
-    #  - speaker_and_sponsor
-    if CONFIG.pretix_mapping.speaker_and_sponsor and item["reference"] in CONFIG.pretix_mapping.speaker_and_sponsor:
-        res.update({"is_speaker": True, "is_sponsor": True})
-    #  - speaker_add_keynote
-    if CONFIG.pretix_mapping.speaker_add_keynote and item["reference"] in CONFIG.pretix_mapping.speaker_add_keynote:
-        res.update({"is_speaker": True, "is_keynote": True})
-    if CONFIG.pretix_mapping.add_speaker and item["reference"] in CONFIG.pretix_mapping.add_speaker:
-        res.update({"is_speaker": True})
-    return res
@@ -0,0 +1,109 @@
+"""Pretix webhook receiver for push-based cache updates.
+
+Pretix notifies about order changes with a small JSON payload, see
+https://docs.pretix.eu/en/latest/api/webhooks.html:
+
+    {"notification_id": 123, "organizer": "acme", "event": "democon", "code": "ABC23", "action": "pretix.event.order.placed"}
+
+Pretix does not sign webhooks. The endpoint therefore requires a shared secret, configured via
+the PRETIX_WEBHOOK_SECRET env var and appended to the webhook URL in Pretix as ``?secret=...``,
+and it never trusts the payload beyond the order code: the order itself is fetched through the
+authenticated API by a background worker and merged into the snapshot.
+"""
+
+import hmac
+import os
+import queue
+import threading
+
+from fastapi import APIRouter, HTTPException, Query
+from pydantic import BaseModel, Field
+from starlette import status
+
+from app import log
+from app.pretix import pretix_api
+from app.pretix.orders import refresh_order
+from app.ticketing.events import DEFAULT_EVENT, use_event
+
+WEBHOOK_SECRET = os.getenv("PRETIX_WEBHOOK_SECRET")
+
+router = APIRouter(prefix="/webhooks", tags=["Pretix Webhooks"])
+
+
+class PretixWebhook(BaseModel):
+    """Webhook notification sent by Pretix."""
+
+    notification_id: int | None = None
+    organizer: str
+    event: str
+    code: str = Field(json_schema_extra={"example": "ABC23", "description": "Order code"})
+    action: str = Field(json_schema_extra={"example": "pretix.event.order.placed"})
+
+
+class WebhookQueue:
+    """Queue of order codes to fetch, drained by a single background worker for all events.
+
+    A code that is already waiting is not queued again, so bursts of notifications
+    for the same order cause a single fetch.
+    """
+
+    def __init__(self):
+        self._queue: queue.Queue[tuple[str, str]] = queue.Queue()
+        self._pending: set[tuple[str, str]] = set()
+        self._lock = threading.Lock()
+        self._worker: threading.Thread | None = None
+
+    def put(self, order_code: str, event: str = DEFAULT_EVENT) -> bool:
+        """Queue an order code of an event, returns False if it is already waiting."""
+        key = (event, order_code)
+        with self._lock:
+            if key in self._pending:
+                return False
+            self._pending.add(key)
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._run, name="pretix-webhooks", daemon=True)
+                self._worker.start()
+        self._queue.put(key)
+        return True
+
+    def join(self) -> None:
+        """Block until all queued order codes were processed."""
+        self._queue.join()
+
+    def _run(self) -> None:
+        while True:
+            key = self._queue.get()
+            event, order_code = key
+            with self._lock:
+                self._pending.discard(key)
+            try:
+                with use_event(event):
+                    refresh_order(order_code)
+            except Exception as e:  # noqa: BLE001
+                log.warning("applying webhook failed", order=order_code, error=str(e))
+            finally:
+                self._queue.task_done()
+
+
+webhook_queue = WebhookQueue()
+
+
+@router.post("/pretix/", status_code=status.HTTP_202_ACCEPTED)
+async def receive_pretix_webhook(webhook: PretixWebhook, secret: str = Query("", description="Shared webhook secret")):
+    """Accept a Pretix order notification and queue the order for a fetch.
+
+    Returns 202 right away, the snapshot is updated by a background worker.
+    """
+    if not WEBHOOK_SECRET:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Webhooks are not configured")
+    if not hmac.compare_digest(secret.encode(), WEBHOOK_SECRET.encode()):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Invalid webhook secret")
+    event = pretix_api.find_event(webhook.organizer, webhook.event)
+    if event is None:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_CONTENT, detail="Webhook is for another event")
+    if not webhook.action.startswith("pretix.event.order."):
+        log.debug(f"ignoring webhook action {webhook.action}")
+        return {"queued": False}
+    queued = webhook_queue.put(webhook.code.upper(), event)
+    log.info(f"webhook {webhook.action} for order {webhook.code}, queued: {queued}")
+    return {"queued": queued}
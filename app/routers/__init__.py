@@ -14,6 +14,8 @@ from app.ticketing.backend import get_backend_name, get_ticketing_backend
 
 # List to hold all routers that will be loaded into the main app
 routers = []
+# Routers mounted without token authentication, e.g. for webhooks
+public_routers = []
 
 # Get the base path for router modules
 base_path = Path(__file__).parent
@@ -54,6 +56,10 @@ try:
     routers.append(BackendRouterModule(backend_router))
     log.info(f"Successfully loaded {backend_name} router")
 
+    if public_router := backend.get_public_router():
+        public_routers.append(BackendRouterModule(public_router))
+        log.info(f"Successfully loaded public {backend_name} router")
+
 except Exception as e:  # noqa: BLE001
     log.error(f"Failed to load backend-specific router: {e}")
     traceback.print_exc()
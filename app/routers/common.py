@@ -2,28 +2,41 @@
 
 import threading
 import time
+from collections.abc import Callable
 
-from fastapi import APIRouter
+import requests
+from fastapi import APIRouter, Query, Request
 
-from app import in_dummy_mode, interface, reset_interface
-from app.models.base import TicketCount, TicketTypes
+from app import in_dummy_mode, interface, log, reset_interface
+from app.config import CONFIG
+from app.errors import NotOk
+from app.models.base import CheckinSummary, LiveStats, NameSearchResults, ServiceStatus, TicketCount, TicketTypes
+from app.ticketing.admission import admission
+from app.ticketing.analytics import live_stats
 from app.ticketing.backend import get_ticketing_backend
+from app.ticketing.checkins import checkin_tally
+from app.ticketing.circuit_breaker import breakers
+from app.ticketing.events import EventLocal, current_event, event_keys, use_event
+from app.ticketing.responses import SnapshotBody, conditional_response
+from app.ticketing.search_index import name_search
 
 router = APIRouter(prefix="/tickets", tags=["Common"])
 
-# State for the singleflight refresh guard.
-# _refresh_lock ensures only one thread runs force_refresh_all() at a time.
+# State for the singleflight refresh guard, one per event.
+# _state.lock ensures only one thread runs force_refresh_all() for an event at a time.
 # Threads that arrive while a refresh is in progress wait for the lock,
 # then find _state.last_time is recent and return without starting another refresh.
-_refresh_lock = threading.Lock()
 _REFRESH_TTL: float = 300.0  # seconds between full data refreshes
 
 
 class _RefreshState:
-    last_time: float = 0.0
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.last_time: float = 0.0
+        self.last_error: str | None = None  # error of the last refresh, None once a refresh succeeds
 
 
-_state = _RefreshState()
+_state: _RefreshState = EventLocal(_RefreshState)  # type: ignore[assignment]
 
 
 @router.get("/refresh_all/")
@@ -32,12 +45,18 @@ def force_refresh_all():
         reset_interface(in_dummy_mode)
         return {"message": "Refreshed from dummy (test) data."}
     backend = get_ticketing_backend()
-    backend.get_all_ticket_offers()
-    backend.get_all_tickets()
+    backend.refresh()
     backend_name = backend.__class__.__name__.replace("Backend", "")
     return {"message": f"The ticket cache was refreshed successfully from {backend_name}."}
 
 
+def refresh_all_events():
+    """Refresh the snapshots of all served events one after the other, e.g. at startup."""
+    for event in event_keys():
+        with use_event(event):
+            refresh_all()
+
+
 def refresh_all():
     """Reload all ticket data at most once per TTL window.
 
@@ -51,20 +70,188 @@ def refresh_all():
     Note: cachetools.cached(lock=...) does NOT provide this guarantee. Its lock
     only serializes cache reads and writes; the wrapped function itself is called
     outside the lock, allowing concurrent calls to bypass the cache simultaneously.
+
+    If the ticketing API fails, the last good snapshot stays in place and the error is
+    logged and reported by /tickets/status/. The TTL window is not renewed, so the next
+    call tries again; while the circuit breaker is open that attempt fails fast.
     """
-    with _refresh_lock:
+    with _state.lock:
         if time.monotonic() - _state.last_time < _REFRESH_TTL:
             return  # another thread just refreshed; skip
-        result = force_refresh_all()
+        try:
+            result = force_refresh_all()
+        except (NotOk, requests.RequestException) as e:
+            _state.last_error = str(e)
+            log.warning("refresh failed, serving last snapshot", error=str(e), snapshot_age=interface.snapshot_age)
+            return None
         _state.last_time = time.monotonic()
+        _state.last_error = None
         return result
 
 
-@router.get("/ticket_types/", response_model=TicketTypes)
-async def get_ticket_types():
-    return {"ticket_types": list(interface.all_releases.values())}
+class RefreshTrigger:
+    """Collapse any number of refresh signals into at most one pending refresh per event.
+
+    signal() only sets a flag and wakes a single worker thread shared by all events, it never
+    blocks and never ties up a threadpool thread per caller. Signals arriving while a refresh
+    of the same event is pending are merged into it; signals arriving while a refresh runs
+    schedule exactly one more run, which refresh_all() skips if the data is still fresh.
+    """
+
+    def __init__(self, target: Callable[[], object]):
+        self._target = target
+        self._pending = threading.Event()
+        self._pending_events: set[str] = set()
+        self._lock = threading.Lock()
+        self._worker: threading.Thread | None = None
+        self.signals = 0  # all signals received
+        self.merged = 0  # signals merged into an already pending refresh
+        self.runs = 0  # refreshes actually started
+
+    def signal(self) -> bool:
+        """Request a refresh of the current event, returns False if the signal was merged into a pending one."""
+        event = current_event()
+        with self._lock:
+            self.signals += 1
+            if event in self._pending_events:
+                self.merged += 1
+                return False
+            self._pending_events.add(event)
+            self._pending.set()
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._run, name="refresh-trigger", daemon=True)
+                self._worker.start()
+        return True
+
+    def stats(self) -> dict[str, int]:
+        return {"signals": self.signals, "merged": self.merged, "runs": self.runs}
+
+    def _run(self) -> None:
+        while True:
+            self._pending.wait()
+            with self._lock:
+                self._pending.clear()
+                events, self._pending_events = self._pending_events, set()
+            for event in events:
+                with self._lock:
+                    self.runs += 1
+                log.debug("running triggered refresh", event_key=event, **self.stats())
+                try:
+                    with use_event(event):
+                        self._target()
+                except Exception as e:  # noqa: BLE001
+                    log.warning("triggered refresh failed", event_key=event, error=str(e))
+
+
+def _triggered_refresh():
+    # Resolve refresh_all at call time, so it can be patched in tests.
+    refresh_all()
+
+
+refresh_trigger = RefreshTrigger(_triggered_refresh)
+
+
+class RefreshScheduler:
+    """Signal a refresh of every served event every ``interval`` seconds.
+
+    A single timer thread serves all events. It only signals the RefreshTrigger, so scheduled
+    refreshes run on the shared refresh worker one event after the other and coalesce with
+    refreshes triggered by cache misses. refresh_all() skips events refreshed within the TTL.
+    """
+
+    def __init__(self, trigger: RefreshTrigger, interval: float):
+        self._trigger = trigger
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def start(self) -> None:
+        if self.interval <= 0 or self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="refresh-scheduler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            for event in event_keys():
+                with use_event(event):
+                    self._trigger.signal()
+
+
+refresh_scheduler = RefreshScheduler(refresh_trigger, float(CONFIG.refresh_schedule.interval))
+
+
+# Polled bodies, encoded once per snapshot and event, see app.ticketing.responses
+_ticket_types: SnapshotBody = EventLocal(lambda: SnapshotBody(lambda: TicketTypes(ticket_types=list(interface.all_releases.values()))))  # type: ignore[assignment]
+_ticket_count: SnapshotBody = EventLocal(lambda: SnapshotBody(lambda: {"ticket_count": len(interface.all_sales)}))  # type: ignore[assignment]
+NOT_MODIFIED = {304: {"description": "Not modified, the snapshot did not change since the ETag sent in If-None-Match"}}
+
+
+@router.get("/ticket_types/", response_model=TicketTypes, responses=NOT_MODIFIED)
+async def get_ticket_types(request: Request):
+    """List the ticket types, with an ETag that changes with the snapshot."""
+    return conditional_response(request, _ticket_types.for_event())
+
+
+@router.get("/ticket_count/", response_model=TicketCount, responses=NOT_MODIFIED)
+async def get_ticket_count(request: Request):
+    """Count the cached tickets, with an ETag that changes with the snapshot."""
+    return conditional_response(request, _ticket_count.for_event())
+
+
+@router.get("/search_name/", response_model=NameSearchResults)
+def search_name(
+    name: str = Query(..., min_length=1, description="Full or partial attendee name, typos are tolerated"),
+    limit: int = Query(10, ge=1, le=100, description="Maximum number of results"),
+):
+    """Search attendees by name across the whole event, e.g. at the help desk without an order code.
+
+    Served from a trigram index over the cached snapshot, the ticketing API is never called.
+    """
+    return {
+        "results": [
+            {"ticket_id": x["reference"], "order_id": x.get("order"), "name": x["name"], "score": round(score, 3)}
+            for score, x in name_search.search(name, limit=limit)
+        ]
+    }
+
+
+@router.get("/checkins/", response_model=CheckinSummary)
+async def get_checkins():
+    """Count successful validations per ticket, e.g. to spot duplicate badge pickups.
+
+    Served from the check-in tally, which is replayed from the check-in log at startup.
+    """
+    return checkin_tally.summary(current_event())
+
+
+@router.get("/live_stats/", response_model=LiveStats)
+async def get_live_stats():
+    """Count validations of the last hour per minute, e.g. for dashboards on venue screens.
+
+    Reports check-ins, failures, fuzzy name matches, on-site and remote tickets and check-ins per
+    ticket category. Served from running totals, see app.ticketing.analytics.
+    """
+    return live_stats.summary()
 
 
-@router.get("/ticket_count/", response_model=TicketCount)
-async def get_ticket_count():
-    return {"ticket_count": len(interface.all_sales)}
+@router.get("/status/", response_model=ServiceStatus)
+async def get_status():
+    """Report age of the served snapshot, circuit breakers and refresh activity."""
+    return {
+        "event": current_event(),
+        "snapshot_version": interface.snapshot_version,
+        "snapshot_age": interface.snapshot_age,
+        "ticket_count": len(interface.all_sales),
+        "last_refresh_error": _state.last_error,
+        "circuit_breakers": {name: breaker.status() for name, breaker in breakers.items()},
+        "refresh_trigger": refresh_trigger.stats(),
+        "admission": admission.stats(),
+    }
@@ -0,0 +1,158 @@
+"""Admission control: a cap on requests in flight and token bucket rate limits per client.
+
+Both reject with 429 and a Retry-After header right away, before any work is done, so a kiosk
+stuck in a retry loop or a client enumerating order codes cannot tie up the workers or, with
+Tito, the upstream API.
+
+- The in-flight cap counts all requests except ``exempt_paths``, see AdmissionMiddleware in
+  app.middleware.
+- The rate limit is the ``rate_limit`` dependency of the authenticated routers. Every route has
+  a bucket per client, clients are told apart by the token subject, by their address while
+  authentication is disabled.
+- With ``client_header`` set (off by default), kiosks sharing one account or proxy address send
+  their own ID in it and get a ``rate_limits`` bucket each. The header is not authenticated, so
+  every request is also charged to a bucket of the whole account, see ``account_rate_limits``.
+
+Limits are configured in the ``admission`` section of base.yml, ``ADMISSION_CONTROL=0``
+disables both.
+"""
+
+import math
+import os
+import threading
+import time
+from collections.abc import Callable
+from typing import Annotated, Self
+
+from cachetools import TTLCache
+from fastapi import Depends, HTTPException, Request, status
+from omegaconf import DictConfig, OmegaConf
+
+from app.auth import TokenClaims, verify_token
+from app.config import CONFIG
+
+MAX_CLIENT_ID = 64  # characters of the client header used as bucket key
+
+
+class TokenBuckets:
+    """A token bucket per client: ``burst`` tokens at most, refilled at ``rate`` per second."""
+
+    def __init__(self, rate: float, burst: float, *, max_clients: int = 10_000, clock: Callable[[], float] = time.monotonic):
+        self.rate = rate
+        self.burst = burst
+        self._clock = clock
+        self._lock = threading.Lock()
+        # a bucket left alone for burst / rate seconds is full again, dropping it changes nothing
+        self._buckets: TTLCache[str, tuple[float, float]] = TTLCache(maxsize=max_clients, ttl=burst / rate, timer=clock)
+
+    def take(self, client: str) -> float:
+        """Take a token, returns 0 if there was one, else the seconds until the next one."""
+        now = self._clock()
+        with self._lock:
+            tokens, last = self._buckets.get(client, (self.burst, now))
+            tokens = min(self.burst, tokens + (now - last) * self.rate)
+            if tokens < 1:
+                self._buckets[client] = (tokens, now)
+                return (1 - tokens) / self.rate
+            self._buckets[client] = (tokens - 1, now)
+            return 0.0
+
+    def clear(self) -> None:
+        """Refill all buckets."""
+        with self._lock:
+            self._buckets.clear()
+
+
+class Admission:
+    """Admission limits and counters of the process."""
+
+    def __init__(  # noqa: PLR0913
+        self,
+        *,
+        enabled: bool = True,
+        max_in_flight: int = 0,
+        exempt_paths: frozenset[str] = frozenset(),
+        rate_limits: dict[str, dict] | None = None,
+        account_rate_limits: dict[str, dict] | None = None,
+        max_clients: int = 10_000,
+        client_header: str = "",
+    ):
+        self.enabled = enabled
+        self.max_in_flight = max_in_flight
+        self.exempt_paths = exempt_paths
+        self.max_clients = max_clients
+        self.client_header = client_header
+        self._rate_limits = rate_limits or {}
+        self._account_rate_limits = account_rate_limits or {}
+        self._limiters: dict[str, TokenBuckets | None] = {}
+        self._account_limiters: dict[str, TokenBuckets | None] = {}
+        self._lock = threading.Lock()
+        self.in_flight = 0  # only changed on the event loop, see AdmissionMiddleware
+        self.rejected_in_flight = 0
+        self.rate_limited = 0
+
+    @classmethod
+    def from_config(cls, config: DictConfig) -> Self:
+        enabled = os.getenv("ADMISSION_CONTROL", str(config.enabled)).strip().lower() not in ("0", "false", "no")
+        return cls(
+            enabled=enabled,
+            max_in_flight=int(config.max_in_flight),
+            exempt_paths=frozenset(config.exempt_paths),
+            rate_limits=OmegaConf.to_container(config.rate_limits),  # type: ignore[arg-type]
+            account_rate_limits=OmegaConf.to_container(config.account_rate_limits),  # type: ignore[arg-type]
+            max_clients=int(config.max_clients),
+            client_header=config.get("client_header") or "",
+        )
+
+    def limiter(self, route: str) -> TokenBuckets | None:
+        """The buckets of a route, None if it is not rate limited (rate 0)."""
+        return self._limiter(route, self._rate_limits, self._limiters)
+
+    def account_limiter(self, route: str) -> TokenBuckets | None:
+        """The buckets of whole accounts on a route, only used with ``client_header`` set."""
+        return self._limiter(route, self._account_rate_limits, self._account_limiters)
+
+    def _limiter(self, route: str, limits: dict[str, dict], limiters: dict[str, TokenBuckets | None]) -> TokenBuckets | None:
+        try:
+            return limiters[route]
+        except KeyError:
+            pass
+        limit = limits.get(route) or limits.get("default") or {}
+        rate, burst = float(limit.get("rate", 0)), float(limit.get("burst", 1))
+        with self._lock:
+            if route not in limiters:
+                limiters[route] = TokenBuckets(rate, burst, max_clients=self.max_clients) if rate > 0 else None
+            return limiters[route]
+
+    def stats(self) -> dict[str, int]:
+        return {"in_flight": self.in_flight, "rejected_in_flight": self.rejected_in_flight, "rate_limited": self.rate_limited}
+
+
+admission = Admission.from_config(CONFIG.admission)
+
+
+async def rate_limit(request: Request, claims: Annotated[TokenClaims, Depends(verify_token)]) -> None:
+    """Reject the request with 429 if the client used up its tokens for the route.
+
+    verify_token is resolved once per request, the router dependency shares its result.
+    """
+    if not admission.enabled:
+        return
+    route = request.scope.get("route")
+    path = route.path if route is not None else request.url.path
+    account = (request.client.host if request.client else "") if claims.disabled_auth else claims.sub
+    client, retry_after = account, 0.0
+    if admission.client_header and (device := request.headers.get(admission.client_header)):
+        client = f"{account}/{device[:MAX_CLIENT_ID]}"
+    if (limiter := admission.limiter(path)) is not None:
+        retry_after = limiter.take(client)
+    # device IDs are chosen by the caller, the account as a whole is charged as well
+    if not retry_after and admission.client_header and (account_limiter := admission.account_limiter(path)) is not None:
+        retry_after = account_limiter.take(account)
+    if retry_after:
+        admission.rate_limited += 1
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Rate limit exceeded",
+            headers={"Retry-After": str(math.ceil(retry_after))},
+        )
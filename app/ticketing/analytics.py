@@ -0,0 +1,144 @@
+"""Live validation statistics kept in rolling time buckets, e.g. for dashboards on venue screens.
+
+Every validation reported to record_validation() is counted in the bucket of its minute. The
+buckets form a fixed-size ring, the bucket of a new minute takes the slot of the oldest one.
+Totals over the whole window are kept alongside and updated with every count and every expired
+bucket, so counting is O(1) and reading the statistics never walks the recorded validations.
+
+Window and bucket length are configured in the ``analytics`` section of base.yml.
+"""
+
+import threading
+import time
+from typing import Self
+
+from omegaconf import DictConfig
+
+from app import interface
+from app.config import CONFIG
+from app.ticketing.events import EventLocal
+
+# Counters per bucket, kept as lists in this order
+COUNTERS = ("validations", "checkins", "failures", "fuzzy", "onsite", "remote")
+VALIDATIONS, CHECKINS, FAILURES, FUZZY, ONSITE, REMOTE = range(len(COUNTERS))
+
+
+class RollingCounters:
+    """Validation counters per bucket over a sliding window, with running window totals."""
+
+    def __init__(self, *, bucket_seconds: int = 60, buckets: int = 60):
+        self.bucket_seconds = bucket_seconds
+        self.size = buckets
+        self._lock = threading.Lock()
+        self._starts = [-1] * buckets  # bucket number held by each slot, -1 if unused
+        self._counts = [[0] * len(COUNTERS) for _ in range(buckets)]
+        self._categories: list[dict[str, int]] = [{} for _ in range(buckets)]
+        self._totals = [0] * len(COUNTERS)
+        self._category_totals: dict[str, int] = {}
+        self._head = -1  # newest bucket number seen
+
+    @classmethod
+    def from_config(cls, config: DictConfig) -> Self:
+        return cls(bucket_seconds=int(config.bucket_seconds), buckets=int(config.buckets))
+
+    @property
+    def window_seconds(self) -> int:
+        return self.bucket_seconds * self.size
+
+    def add(self, ts: float, *, success: bool, fuzzy: bool = False, category: str | None = None, flags: dict | None = None) -> None:
+        """Count one validation at unix time ``ts``, late ones older than the window are dropped."""
+        number = int(ts // self.bucket_seconds)
+        slot = number % self.size
+        with self._lock:
+            if number > self._head:
+                self._advance(number)
+            elif self._starts[slot] != number:
+                return
+            counts, totals = self._counts[slot], self._totals
+            counts[VALIDATIONS] += 1
+            totals[VALIDATIONS] += 1
+            if not success:
+                counts[FAILURES] += 1
+                totals[FAILURES] += 1
+                return
+            counts[CHECKINS] += 1
+            totals[CHECKINS] += 1
+            if fuzzy:
+                counts[FUZZY] += 1
+                totals[FUZZY] += 1
+            if flags:
+                if flags.get("is_onsite"):
+                    counts[ONSITE] += 1
+                    totals[ONSITE] += 1
+                if flags.get("is_remote"):
+                    counts[REMOTE] += 1
+                    totals[REMOTE] += 1
+            if category:
+                categories = self._categories[slot]
+                categories[category] = categories.get(category, 0) + 1
+                self._category_totals[category] = self._category_totals.get(category, 0) + 1
+
+    def summary(self, now: float | None = None) -> dict:
+        """Window totals, rates and the check-ins per bucket, oldest bucket first."""
+        number = int((time.time() if now is None else now) // self.bucket_seconds)
+        with self._lock:
+            if number > self._head:
+                self._advance(number)
+            totals = dict(zip(COUNTERS, self._totals, strict=True))
+            categories = dict(self._category_totals)
+            first = number - self.size + 1
+            per_bucket = [
+                {
+                    "start": n * self.bucket_seconds,
+                    "checkins": self._counts[n % self.size][CHECKINS] if self._starts[n % self.size] == n else 0,
+                }
+                for n in range(first, number + 1)
+            ]
+        return {
+            "window_seconds": self.window_seconds,
+            "bucket_seconds": self.bucket_seconds,
+            **totals,
+            "fuzzy_match_rate": totals["fuzzy"] / totals["checkins"] if totals["checkins"] else 0.0,
+            "failure_rate": totals["failures"] / totals["validations"] if totals["validations"] else 0.0,
+            "categories": dict(sorted(categories.items(), key=lambda x: x[1], reverse=True)),
+            "checkins_per_bucket": per_bucket,
+        }
+
+    def _advance(self, number: int) -> None:
+        """Move the head to bucket ``number``, expiring the buckets that fall out of the window.
+
+        Each slot is cleared at most once per bucket length, whatever the request rate.
+        """
+        for n in range(max(self._head + 1, number - self.size + 1), number + 1):
+            slot = n % self.size
+            if self._starts[slot] != -1:
+                for i, count in enumerate(self._counts[slot]):
+                    self._totals[i] -= count
+                for category, count in self._categories[slot].items():
+                    if (left := self._category_totals[category] - count) > 0:
+                        self._category_totals[category] = left
+                    else:
+                        del self._category_totals[category]
+                self._counts[slot] = [0] * len(COUNTERS)
+                self._categories[slot] = {}
+            self._starts[slot] = n
+        self._head = number
+
+
+def ticket_release(ticket_id: str | None) -> dict | None:
+    """Release (ticket type) of a cached ticket, two dict lookups."""
+    sale = interface.all_sales.get(ticket_id) if ticket_id else None
+    if sale is None:
+        return None
+    return interface.release_id_map.get(sale.get("item", sale.get("release_id")))
+
+
+def release_category(release: dict) -> str | None:
+    """Category name of a release, the release title if it has none."""
+    name = (release.get("category") or {}).get("name")
+    if isinstance(name, dict):  # Pretix names are localized
+        name = name.get("en") or next(iter(name.values()), None)
+    return name or release.get("title")
+
+
+live_stats: RollingCounters = EventLocal(lambda: RollingCounters.from_config(CONFIG.analytics))  # type: ignore[assignment]
@@ -18,6 +18,11 @@ class TicketingBackend:
         """Load all ticket types/items."""
         raise NotImplementedError
 
+    def refresh(self):
+        """Reload all cached data, ticket types first as tickets are validated against them."""
+        self.get_all_ticket_offers()
+        self.get_all_tickets()
+
     def search_reference(self, reference: str):
         """Search for a ticket by reference/ID."""
         raise NotImplementedError
@@ -30,6 +35,10 @@ class TicketingBackend:
         """Return the backend-specific router."""
         raise NotImplementedError
 
+    def get_public_router(self):
+        """Return a backend-specific router mounted without authentication, e.g. for webhooks."""
+        return None
+
 
 def get_backend_name() -> str:
     """Get the configured backend name."""
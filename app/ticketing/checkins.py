@@ -0,0 +1,264 @@
+"""Append-only log of successful validations (check-ins), replayed into a tally at startup.
+
+The validation endpoints report every outcome to record_validation(). Successful ones are
+counted in the tally right away and put on a bounded in-memory queue, which costs a tuple and a
+queue put on the request path. A background writer drains the queue in batches, appends them as
+NDJSON lines to the log file and fsyncs once per batch. Files are rotated like
+logging.handlers.RotatingFileHandler: ``checkins.ndjson`` is current, ``checkins.ndjson.1`` the
+newest rotated one. The log is only read at startup, to replay the tally of earlier runs.
+
+If the file cannot be written, the writer logs the error and stops, the next record starts a new
+one after ``retry_delay`` seconds. Records that find the queue full are dropped and counted.
+
+The log is configured in the ``checkin_log`` section of base.yml, ``CHECKIN_LOG_PATH`` overrides
+the path and an empty path disables the log.
+"""
+
+import json
+import os
+import queue
+import threading
+import time
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass
+from itertools import batched
+from pathlib import Path
+from typing import Self
+
+from omegaconf import DictConfig
+
+from app import log
+from app.config import CONFIG, project_root
+from app.ticketing.analytics import live_stats, release_category, ticket_release
+from app.ticketing.events import current_event
+from app.ticketing.responses import dumps
+
+# Fields of a log record, records are queued as tuples in this order
+RECORD_FIELDS = ("ts", "event", "kind", "ticket_id", "order_id")
+
+
+class CheckinLog:
+    """Queue plus background writer for the check-in log file."""
+
+    retry_delay = 5.0  # seconds before a new writer is started after one failed
+
+    def __init__(
+        self,
+        path: Path | None,
+        *,
+        batch_size: int = 256,
+        max_bytes: int = 10 * 2**20,
+        backups: int = 10,
+        max_queued: int = 100_000,
+    ):
+        self.path = path
+        self.batch_size = batch_size
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.written = 0
+        self.dropped = 0  # records not queued because the queue was full
+        self._queue: queue.Queue[tuple | threading.Event | None] = queue.Queue(maxsize=max_queued)
+        self._lock = threading.Lock()
+        self._worker: threading.Thread | None = None
+        self._retry_at = 0.0  # monotonic time before which no new writer is started after a failure
+        self._listeners: list = []  # called with each written batch, from the writer thread
+
+    @classmethod
+    def from_config(cls, config: DictConfig) -> Self:
+        path = os.getenv("CHECKIN_LOG_PATH", config.path)
+        return cls(
+            project_root / path if path else None,
+            batch_size=int(config.batch_size),
+            max_bytes=int(config.max_bytes),
+            backups=int(config.backups),
+            max_queued=int(config.max_queued),
+        )
+
+    @property
+    def enabled(self) -> bool:
+        return self.path is not None
+
+    def add_listener(self, listener) -> None:
+        """Call ``listener(records)`` with every batch after it was written."""
+        self._listeners.append(listener)
+
+    def record(self, record: tuple) -> None:
+        """Queue a record (see RECORD_FIELDS), never blocks."""
+        if self.path is None:
+            return
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+        if self._worker is None and time.monotonic() >= self._retry_at:
+            self._start()
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """Wait until everything queued so far is written, False on timeout."""
+        if self._worker is None:
+            return self._queue.empty()
+        done = threading.Event()
+        try:
+            self._queue.put(done, timeout=timeout)
+        except queue.Full:
+            return False
+        return done.wait(timeout)
+
+    def close(self, timeout: float = 5.0) -> None:
+        """Write what is queued and stop the writer, e.g. on shutdown."""
+        with self._lock:
+            worker, self._worker = self._worker, None
+        if worker is not None:
+            try:
+                self._queue.put(None, timeout=timeout)
+            except queue.Full:
+                return
+            worker.join(timeout)
+
+    def replay(self) -> Iterator[dict]:
+        """Yield all logged records, oldest first. A line cut off by a crash is skipped."""
+        if self.path is None:
+            return
+        for path in [*(self._rotated(i) for i in range(self.backups, 0, -1)), self.path]:
+            if not path.exists():
+                continue
+            with path.open("rb") as f:
+                for line in f:
+                    try:
+                        yield json.loads(line)
+                    except ValueError:
+                        log.warning("skipping malformed check-in record", path=str(path))
+
+    def _start(self) -> None:
+        with self._lock:
+            if self._worker is None:
+                self._worker = threading.Thread(target=self._run, name="checkin-log", daemon=True)
+                self._worker.start()
+
+    def _run(self) -> None:
+        f = None
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)  # type: ignore[union-attr]
+            f = self.path.open("ab")  # type: ignore[union-attr]
+            while True:
+                # block for the first item, then take whatever else is queued already
+                items = [self._queue.get()]
+                while len(items) < self.batch_size:
+                    try:
+                        items.append(self._queue.get_nowait())
+                    except queue.Empty:
+                        break
+                records = [x for x in items if isinstance(x, tuple)]
+                if records:
+                    f = self._write(f, records)
+                for x in items:
+                    if isinstance(x, threading.Event):
+                        x.set()
+                if None in items:
+                    return
+        except Exception as e:  # noqa: BLE001
+            log.error("check-in log writer failed", error=str(e), path=str(self.path))
+            with self._lock:
+                self._retry_at = time.monotonic() + self.retry_delay
+                if self._worker is threading.current_thread():
+                    self._worker = None  # the next record after retry_delay starts a new writer
+        finally:
+            if f is not None:
+                f.close()
+
+    def _write(self, f, records: list[tuple]):
+        data = b"".join(dumps(dict(zip(RECORD_FIELDS, x, strict=True))) + b"\n" for x in records)
+        if f.tell() and f.tell() + len(data) > self.max_bytes:
+            f = self._rotate(f)
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+        self.written += len(records)
+        for listener in self._listeners:
+            listener(records)
+        return f
+
+    def _rotate(self, f):
+        f.close()
+        for i in range(self.backups - 1, 0, -1):
+            if self._rotated(i).exists():
+                self._rotated(i).replace(self._rotated(i + 1))
+        self.path.replace(self._rotated(1))  # type: ignore[union-attr]
+        return self.path.open("ab")  # type: ignore[union-attr]
+
+    def _rotated(self, i: int) -> Path:
+        return self.path.with_name(f"{self.path.name}.{i}")  # type: ignore[union-attr]
+
+
+@dataclass(slots=True)
+class TicketCheckins:
+    count: int
+    first: float
+    last: float
+
+
+class CheckinTally:
+    """Check-ins per event and ticket, replayed from the log and updated by record_validation()."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._tickets: dict[str, dict[str, TicketCheckins]] = {}
+
+    def add(self, records: Iterable[tuple]) -> None:
+        with self._lock:
+            for ts, event, _, ticket_id, _ in records:
+                tickets = self._tickets.setdefault(event, {})
+                seen = tickets.get(ticket_id)
+                if seen is None:
+                    tickets[ticket_id] = TicketCheckins(count=1, first=ts, last=ts)
+                else:
+                    seen.count += 1
+                    seen.first, seen.last = min(seen.first, ts), max(seen.last, ts)
+
+    def replay(self, checkin_log: CheckinLog) -> int:
+        """Add all records of the log, returns their number."""
+        count = 0
+        records = (tuple(x.get(field) for field in RECORD_FIELDS) for x in checkin_log.replay())
+        for batch in batched(records, 10_000, strict=False):
+            self.add(batch)
+            count += len(batch)
+        return count
+
+    def summary(self, event: str) -> dict:
+        with self._lock:
+            tickets = dict(self._tickets.get(event, {}))
+        duplicates = sorted(((k, v) for k, v in tickets.items() if v.count > 1), key=lambda x: x[1].last, reverse=True)
+        return {
+            "checked_in": len(tickets),
+            "checkins": sum(x.count for x in tickets.values()),
+            "duplicates": [{"ticket_id": k, "count": v.count, "first": v.first, "last": v.last} for k, v in duplicates],
+        }
+
+
+checkin_log = CheckinLog.from_config(CONFIG.checkin_log)
+checkin_tally = CheckinTally()
+
+
+def record_validation(kind: str, status_code: int, result: dict, *, fuzzy: bool = False) -> None:
+    """Report the outcome of a validation, successful ones are logged as check-ins.
+
+    ``kind`` names the validation, e.g. ``attendee`` or ``secret``, ``fuzzy`` marks a name that
+    matched only approximately. Every outcome is counted in the live statistics, see
+    app.ticketing.analytics. Must stay cheap, it runs on the request path.
+    """
+    now = time.time()
+    if status_code != 200:  # noqa: PLR2004
+        live_stats.add(now, success=False)
+        return
+    ticket_id = result.get("ticket_id")
+    release = ticket_release(ticket_id)
+    if release is None:
+        live_stats.add(now, success=True, fuzzy=fuzzy, flags=result)
+    else:
+        # e.g. email validations carry no attribute flags, the ticket type has them
+        flags = {**release.get("_attributes", {}), **result}
+        live_stats.add(now, success=True, fuzzy=fuzzy, category=release_category(release), flags=flags)
+    if ticket_id:
+        record = (now, current_event(), kind, ticket_id, result.get("order_id"))
+        checkin_tally.add((record,))
+        checkin_log.record(record)
@@ -0,0 +1,129 @@
+"""Circuit breaker around the ticketing API calls.
+
+While an upstream is failing, calls fail fast instead of each waiting for its timeout and
+tying up a worker thread. The service keeps serving the last good snapshot meanwhile.
+
+States:
+    closed     calls pass through, consecutive failures are counted
+    open       calls fail immediately with CircuitOpenError until reset_timeout has passed
+    half_open  a single probe call is let through, its outcome closes or re-opens the circuit
+"""
+
+import threading
+import time
+from collections.abc import Callable
+from http import HTTPStatus
+
+import requests
+
+from app import log
+from app.config import CONFIG
+from app.errors import NotOk
+from app.ticketing import http
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(NotOk):
+    """Raised instead of calling the upstream while the circuit is open."""
+
+    def __init__(self, name: str, retry_after: float):
+        self.retry_after = retry_after
+        super().__init__(
+            status_code=HTTPStatus.SERVICE_UNAVAILABLE,
+            content=f"{name} is unavailable, retry in {retry_after:.0f} s",
+        )
+
+
+class CircuitBreaker:
+    """Count upstream failures and fail fast once they pass the threshold.
+
+    Failures are connection errors, timeouts and responses with status 429 or 5xx.
+    Other responses, including 404, count as success.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int | None = None,
+        reset_timeout: float | None = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.name = name
+        self.failure_threshold = failure_threshold or CONFIG.circuit_breaker.failure_threshold
+        self.reset_timeout = reset_timeout or CONFIG.circuit_breaker.reset_timeout
+        self._clock = clock
+        self._lock = threading.Lock()
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probe_in_flight = False
+        breakers[name] = self
+
+    def reset(self) -> None:
+        """Close the circuit and forget all failures."""
+        with self._lock:
+            self.state = CLOSED
+            self.failures = 0
+            self._probe_in_flight = False
+
+    def status(self) -> dict:
+        return {"state": self.state, "failures": self.failures}
+
+    def _before_call(self) -> None:
+        with self._lock:
+            if self.state == CLOSED:
+                return
+            retry_after = self.opened_at + self.reset_timeout - self._clock()
+            if self.state == OPEN and retry_after <= 0:
+                self.state = HALF_OPEN
+            if self.state == HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                log.info(f"circuit {self.name} half-open, probing upstream")
+                return
+            raise CircuitOpenError(self.name, max(retry_after, 0.0))
+
+    def _record(self, success: bool) -> None:
+        with self._lock:
+            self._probe_in_flight = False
+            if success:
+                if self.state != CLOSED:
+                    log.info(f"circuit {self.name} closed")
+                self.state = CLOSED
+                self.failures = 0
+                return
+            self.failures += 1
+            if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != OPEN:
+                    log.warning(f"circuit {self.name} opened after {self.failures} failures")
+                self.state = OPEN
+                self.opened_at = self._clock()
+
+    def call(self, func: Callable[..., requests.Response], *args, **kwargs) -> requests.Response:
+        """Call ``func`` through the breaker, raises CircuitOpenError while the circuit is open."""
+        self._before_call()
+        try:
+            response = func(*args, **kwargs)
+        except requests.RequestException:
+            self._record(success=False)
+            raise
+        except BaseException:
+            self._record(success=True)  # not an upstream failure, release a probe slot
+            raise
+        self._record(success=not _is_upstream_failure(response))
+        return response
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        """GET through the breaker, using the shared pooled session."""
+        return self.call(http.session.get, url, **kwargs)
+
+
+#: All breakers by name, e.g. for status reporting.
+breakers: dict[str, CircuitBreaker] = {}
+
+
+def _is_upstream_failure(response: requests.Response) -> bool:
+    status_code = response.status_code
+    return isinstance(status_code, int) and (status_code == HTTPStatus.TOO_MANY_REQUESTS or status_code >= HTTPStatus.INTERNAL_SERVER_ERROR)
@@ -0,0 +1,141 @@
+"""Several events served by one process, each from its own snapshot.
+
+The event of a request is selected with the ``X-Event`` header (see EventMiddleware in
+app.middleware) and kept in a ContextVar for the duration of the request. Everything that
+holds per-event state, the Interface snapshot, add-on aggregates, search indexes and the
+refresh state, resolves the instance of the current event through it. Requests without the
+header are served from the default event configured via env vars, as before.
+
+Additional events are configured in the ``events`` section of base.yml (Pretix only). They
+share the process, the pooled HTTP session (app.ticketing.http) and the refresh worker. Category,
+item and order IDs differ between Pretix events, so an event can bring its own
+``pretix_mapping`` and ``addon_statistics`` sections, see event_config().
+"""
+
+import os
+import threading
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+
+from omegaconf import DictConfig
+
+from app.config import CONFIG
+
+DEFAULT_EVENT = "default"
+
+# Config sections an additional event can override as a whole, the global ones are used otherwise
+EVENT_SECTIONS = ("pretix_mapping", "addon_statistics")
+
+_current_event: ContextVar[str] = ContextVar("event", default=DEFAULT_EVENT)
+
+
+@dataclass(frozen=True, slots=True)
+class Event:
+    """An additional event, the default event is configured via PRETIX_* env vars."""
+
+    key: str
+    organizer: str
+    event: str
+    token: str | None
+    sections: dict[str, DictConfig] = field(default_factory=dict)  # overrides of EVENT_SECTIONS
+
+
+def load_events() -> dict[str, Event]:
+    """Read the additional events from CONFIG.events."""
+    events = {}
+    for key, cfg in (CONFIG.get("events") or {}).items():
+        token_env = cfg.get("token_env") or "PRETIX_TOKEN"
+        events[str(key)] = Event(
+            key=str(key),
+            organizer=cfg.organizer,
+            event=cfg.event,
+            token=os.getenv(token_env),
+            sections={x: cfg[x] for x in EVENT_SECTIONS if cfg.get(x) is not None},
+        )
+    return events
+
+
+#: Additional events by key, the default event is not included
+events: dict[str, Event] = load_events()
+
+
+def event_keys() -> list[str]:
+    """Keys of all events served, the default event first."""
+    return [DEFAULT_EVENT, *events]
+
+
+def is_known_event(key: str) -> bool:
+    return key == DEFAULT_EVENT or key in events
+
+
+def current_event() -> str:
+    """Key of the event the current request or task works on."""
+    return _current_event.get()
+
+
+def event_config(section: str) -> DictConfig:
+    """A section of EVENT_SECTIONS for the current event, the event's own or the global one."""
+    event = events.get(_current_event.get())
+    if event is not None and section in event.sections:
+        return event.sections[section]
+    return CONFIG.get(section) or DictConfig({})
+
+
+def bind_event[R](func: Callable[..., R]) -> Callable[..., R]:
+    """Bind ``func`` to the current event, for work handed over to other threads."""
+    key = _current_event.get()
+
+    def run(*args, **kwargs) -> R:
+        with use_event(key):
+            return func(*args, **kwargs)
+
+    return run
+
+
+@contextmanager
+def use_event(key: str) -> Iterator[None]:
+    """Run the enclosed block for the given event, e.g. in background workers."""
+    token = _current_event.set(key)
+    try:
+        yield
+    finally:
+        _current_event.reset(token)
+
+
+class EventLocal[T]:
+    """One instance of some per-event state per event, created on first use.
+
+    Attribute access is forwarded to the instance of the current event, so a module-level
+    ``state = EventLocal(State)`` can be used like a single ``State()`` instance.
+    """
+
+    __slots__ = ("_factory", "_instances", "_lock")
+
+    def __init__(self, factory: Callable[[], T], default: T | None = None):
+        object.__setattr__(self, "_factory", factory)
+        object.__setattr__(self, "_instances", {} if default is None else {DEFAULT_EVENT: default})
+        object.__setattr__(self, "_lock", threading.Lock())
+
+    def for_event(self, key: str | None = None) -> T:
+        key = key or _current_event.get()
+        instance = self._instances.get(key)
+        if instance is None:
+            with self._lock:
+                instance = self._instances.get(key)
+                if instance is None:
+                    instance = self._instances[key] = self._factory()
+        return instance
+
+    def drop_events(self) -> None:
+        """Forget the instances of all events except the default one."""
+        with self._lock:
+            for key in [x for x in self._instances if x != DEFAULT_EVENT]:
+                del self._instances[key]
+
+    def __getattr__(self, name: str):
+        return getattr(self.for_event(), name)
+
+    def __setattr__(self, name: str, value) -> None:
+        setattr(self.for_event(), name, value)
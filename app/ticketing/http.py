@@ -0,0 +1,15 @@
+"""HTTP session shared by all calls to the ticketing APIs.
+
+One pooled session for the whole process keeps connections to the ticketing API alive
+between requests and across events, instead of a new TCP and TLS handshake per call.
+"""
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from app.config import CONFIG
+
+session = requests.Session()
+_adapter = HTTPAdapter(pool_connections=CONFIG.http.pool_connections, pool_maxsize=CONFIG.http.pool_maxsize)
+session.mount("https://", _adapter)
+session.mount("http://", _adapter)
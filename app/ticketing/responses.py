@@ -0,0 +1,153 @@
+"""Pre-encoded JSON responses for the validation and polling endpoints.
+
+A dict returned from an endpoint with a ``response_model`` is validated against the model,
+dumped and passed through ``jsonable_encoder`` before it is encoded, which costs more than
+the cache lookup behind it. The validation endpoints return a Response with the encoded
+body instead: constant bytes for the true / false answers and a direct encoder for the flat
+attendee results. The ``response_model`` stays declared, so the OpenAPI schema is unchanged.
+
+Endpoints polled by dashboards (ticket types, ticket count, add-on statistics) only change
+with the snapshot. Their bodies are encoded, and gzipped if large, once per snapshot version
+and served with a snapshot-versioned ETag; ``If-None-Match`` with the current ETag gets a 304.
+
+orjson is used if it is installed, the stdlib encoder otherwise.
+"""
+
+import gzip
+import json
+import threading
+import uuid
+from collections.abc import Callable
+
+from fastapi import Request, Response
+from pydantic import BaseModel
+
+from app import interface
+from app.config import CONFIG
+
+try:
+    import orjson
+except ImportError:  # optional
+    orjson = None
+
+# snapshot versions restart with the process, the ETags of an older process must not match
+_ETAG_PREFIX = uuid.uuid4().hex[:8]
+_GZIP_MIN_SIZE: int = CONFIG.conditional_get.gzip_min_size
+
+_encoder = json.JSONEncoder(ensure_ascii=False, allow_nan=False, separators=(",", ":"))
+
+
+def dumps(content) -> bytes:
+    """Encode to compact JSON, like JSONResponse."""
+    if orjson is not None:
+        return orjson.dumps(content)
+    return _encoder.encode(content).encode()
+
+
+def json_response(body: bytes, status_code: int = 200) -> Response:
+    return Response(content=body, status_code=status_code, media_type="application/json")
+
+
+VALID = dumps({"valid": True})
+INVALID = dumps({"valid": False})
+
+
+def truthy_response(valid: bool, status_code: int = 200) -> Response:
+    """``{"valid": true}`` or ``{"valid": false}`` from pre-encoded bytes."""
+    return json_response(VALID if valid else INVALID, status_code)
+
+
+class ModelEncoder:
+    """Encode flat result dicts with the fields, field order and defaults of a response model.
+
+    Keys that are not fields of the model are dropped, like in the validated response. The
+    values are not validated, results are built from the cached snapshot.
+    """
+
+    __slots__ = ("_defaults",)
+
+    def __init__(self, model: type[BaseModel]):
+        self._defaults = {
+            name: None if field.is_required() else field.get_default(call_default_factory=True)
+            for name, field in model.model_fields.items()
+        }
+
+    def fill(self, result: dict) -> dict:
+        """The fields of the model, taken from ``result`` or their defaults."""
+        return {name: result.get(name, default) for name, default in self._defaults.items()}
+
+    def encode(self, result: dict) -> bytes:
+        return dumps(self.fill(result))
+
+    def response(self, result: dict, status_code: int = 200) -> Response:
+        return json_response(self.encode(result), status_code)
+
+
+class SnapshotBody:
+    """A response body encoded once per snapshot version, with its ETag and a gzipped copy.
+
+    Snapshot versions are unique across events, use one instance per event (EventLocal).
+    """
+
+    __slots__ = ("_build", "_encoded", "_lock")
+
+    def __init__(self, build: Callable[[], BaseModel | dict]):
+        self._build = build
+        self._lock = threading.Lock()
+        self._encoded: tuple[int, str, bytes, bytes | None] = (-1, "", b"", None)
+
+    def get(self) -> tuple[str, bytes, bytes | None]:
+        """Return ETag, body and the gzipped body (None for small bodies) of the current snapshot."""
+        encoded = self._encoded
+        if encoded[0] != interface.snapshot_version:
+            with self._lock:
+                encoded = self._encoded
+                if encoded[0] != interface.snapshot_version:
+                    version = interface.snapshot_version
+                    content = self._build()
+                    body = content.model_dump_json().encode() if isinstance(content, BaseModel) else dumps(content)
+                    gzipped = gzip.compress(body, mtime=0) if len(body) >= _GZIP_MIN_SIZE else None
+                    encoded = self._encoded = (version, f'W/"{_ETAG_PREFIX}-{version}"', body, gzipped)
+        return encoded[1], encoded[2], encoded[3]
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    """Weak comparison of the ETag with an If-None-Match header, RFC 9110 13.1.2."""
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(x.strip().removeprefix("W/") == opaque for x in if_none_match.split(","))
+
+
+def _accepts_gzip(accept_encoding: str) -> bool:
+    """Whether an Accept-Encoding header gives gzip a q-value above 0, RFC 9110 12.5.3."""
+    wildcard = 0.0
+    for coding in accept_encoding.split(","):
+        name, *params = coding.split(";")
+        name = name.strip().lower()
+        if name not in ("gzip", "x-gzip", "*"):
+            continue
+        q = 1.0
+        for param in params:
+            key, _, value = param.partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        if name != "*":
+            return q > 0
+        wildcard = q
+    return wildcard > 0
+
+
+def conditional_response(request: Request, body: SnapshotBody) -> Response:
+    """Serve a snapshot body, 304 if the client has the current version already."""
+    etag, content, gzipped = body.get()
+    headers = {"ETag": etag, "Cache-Control": "no-cache", "Vary": "Accept-Encoding"}
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and _etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+    if gzipped is not None and _accepts_gzip(request.headers.get("accept-encoding", "")):
+        return Response(content=gzipped, media_type="application/json", headers={**headers, "Content-Encoding": "gzip"})
+    return Response(content=content, media_type="application/json", headers=headers)
@@ -0,0 +1,210 @@
+"""In-memory search indexes over the cached snapshot, built lazily once per snapshot version.
+
+Name search: names are normalized with Interface.normalization, so diacritics and case do not
+matter. Candidates share at least one trigram with the query and are scored by the Dice
+coefficient of both trigram sets. Names containing the whole query as substring rank first.
+
+Email suggestions: BK-trees over the local parts of the registered emails, partitioned by
+domain. Only domains close to the typed one are searched, and only with the edit budget left.
+"""
+
+import heapq
+import re
+import threading
+from collections import Counter
+from collections.abc import Iterable
+
+from app import interface
+from app.config.settings import get_settings
+from app.ticketing.events import EventLocal
+
+_NOT_ALNUM = re.compile(r"[^A-Z0-9]+")
+
+
+def normalize_name(name: str) -> str:
+    """Normalize a name for indexing, punctuation is treated like whitespace."""
+    return _NOT_ALNUM.sub(" ", interface.normalization(name)).strip()
+
+
+def trigrams(normalized: str) -> set[str]:
+    """Trigrams of a normalized name, padded so that short names and word starts count."""
+    padded = f"  {normalized} "
+    return {padded[i : i + 3] for i in range(len(padded) - 2)}
+
+
+class TrigramIndex:
+    """Trigram postings over the names of a set of sales."""
+
+    def __init__(self, sales: Iterable[dict]):
+        self._records: list[dict] = []
+        self._names: list[str] = []
+        self._sizes: list[int] = []
+        postings: dict[str, list[int]] = {}
+        for sale in sales:
+            normalized = normalize_name(sale.get("name") or "")
+            if not normalized:
+                continue
+            record_id = len(self._records)
+            grams = trigrams(normalized)
+            self._records.append(sale)
+            self._names.append(normalized)
+            self._sizes.append(len(grams))
+            for gram in grams:
+                postings.setdefault(gram, []).append(record_id)
+        self._postings = postings
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def search(self, query: str, limit: int = 10, min_score: float = 0.3) -> list[tuple[float, dict]]:
+        """Return up to ``limit`` (score, sale) pairs, best match first."""
+        normalized = normalize_name(query)
+        if not normalized:
+            return []
+        grams = trigrams(normalized)
+        shared: Counter[int] = Counter()
+        for gram in grams:
+            shared.update(self._postings.get(gram, ()))
+
+        ranked = []
+        for record_id, count in shared.items():
+            score = 2 * count / (len(grams) + self._sizes[record_id])
+            is_substring = normalized in self._names[record_id]
+            if is_substring or score >= min_score:
+                ranked.append((is_substring, score, record_id))
+        return [(score, self._records[record_id]) for _, score, record_id in heapq.nlargest(limit, ranked)]
+
+
+def levenshtein(a: str, b: str) -> int:
+    """Edit distance (insertions, deletions, substitutions) between two strings."""
+    if len(a) < len(b):
+        a, b = b, a
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb)))
+        previous = current
+    return previous[-1]
+
+
+class BKTree:
+    """Burkhard-Keller tree, finds all words within an edit distance without a linear scan."""
+
+    def __init__(self, words: Iterable[str] = ()):
+        self._root: tuple[str, dict] | None = None
+        for word in words:
+            self.add(word)
+
+    def add(self, word: str) -> None:
+        if self._root is None:
+            self._root = (word, {})
+            return
+        node_word, children = self._root
+        while True:
+            distance = levenshtein(word, node_word)
+            if distance == 0:
+                return
+            child = children.get(distance)
+            if child is None:
+                children[distance] = (word, {})
+                return
+            node_word, children = child
+
+    def search(self, word: str, max_distance: int) -> list[tuple[int, str]]:
+        """Return (distance, word) pairs within ``max_distance``."""
+        found = []
+        stack = [self._root] if self._root else []
+        while stack:
+            node_word, children = stack.pop()
+            distance = levenshtein(word, node_word)
+            if distance <= max_distance:
+                found.append((distance, node_word))
+            for child_distance, child in children.items():
+                if distance - max_distance <= child_distance <= distance + max_distance:
+                    stack.append(child)
+        return found
+
+
+def mask_email(email: str) -> str:
+    """Mask the local part of an email, e.g. ``jane.doe@example.com`` -> ``j******e@example.com``."""
+    local, _, domain = email.rpartition("@")
+    if len(local) <= 2:  # noqa: PLR2004
+        return f"{local[:1]}{'*' * (len(local) - 1)}@{domain}"
+    return f"{local[0]}{'*' * (len(local) - 2)}{local[-1]}@{domain}"
+
+
+class EmailIndex:
+    """Registered emails partitioned by domain, one BK-tree of local parts per domain."""
+
+    def __init__(self, emails: Iterable[str]):
+        local_parts: dict[str, list[str]] = {}
+        for email in emails:
+            local, _, domain = email.rpartition("@")
+            local_parts.setdefault(domain, []).append(local)
+        self._domains = BKTree(local_parts)
+        self._local_parts = {domain: BKTree(locals_) for domain, locals_ in local_parts.items()}
+
+    def suggest(self, email: str, max_distance: int, limit: int) -> list[str]:
+        """Return up to ``limit`` registered emails closest to ``email``, exact matches excluded."""
+        local, _, domain = email.casefold().strip().rpartition("@")
+        candidates = []
+        for domain_distance, known_domain in self._domains.search(domain, max_distance):
+            budget = max_distance - domain_distance
+            for local_distance, known_local in self._local_parts[known_domain].search(local, budget):
+                distance = domain_distance + local_distance
+                if distance:
+                    candidates.append((distance, f"{known_local}@{known_domain}"))
+        return [x for _, x in sorted(candidates)[:limit]]
+
+
+class NameSearch:
+    """Trigram index of the current snapshot, built lazily once per snapshot version."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._version = -1
+        self._index = TrigramIndex(())
+
+    def index(self) -> TrigramIndex:
+        if self._version != interface.snapshot_version:
+            with self._lock:
+                if self._version != interface.snapshot_version:
+                    version = interface.snapshot_version
+                    self._index = TrigramIndex(interface.all_sales.values())
+                    self._version = version
+        return self._index
+
+    def search(self, query: str, limit: int = 10) -> list[tuple[float, dict]]:
+        return self.index().search(query, limit=limit)
+
+
+name_search: NameSearch = EventLocal(NameSearch)  # type: ignore[assignment]
+
+
+class EmailSuggestions:
+    """Email index of the current snapshot, built lazily once per snapshot version."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._version = -1
+        self._index = EmailIndex(())
+
+    def index(self) -> EmailIndex:
+        if self._version != interface.snapshot_version:
+            with self._lock:
+                if self._version != interface.snapshot_version:
+                    version = interface.snapshot_version
+                    self._index = EmailIndex(interface.valid_emails)
+                    self._version = version
+        return self._index
+
+    def suggest(self, email: str) -> list[str]:
+        """Return masked hints for the registered emails closest to ``email``."""
+        settings = get_settings()
+        suggestions = self.index().suggest(email, settings.email_suggestion_max_distance, settings.email_suggestion_limit)
+        # different emails can mask to the same hint, keep each hint once
+        return list(dict.fromkeys(mask_email(x) for x in suggestions))
+
+
+email_suggestions: EmailSuggestions = EventLocal(EmailSuggestions)  # type: ignore[assignment]
@@ -0,0 +1,78 @@
+"""Per-release data for Tito validations, resolved once per set of releases.
+
+Tito has no category mapping like Pretix, roles are derived from keywords in the release
+title and on-site/remote access from the release activities. Both only depend on the
+release, so they are computed when the releases change, not on every validation.
+"""
+
+import threading
+from dataclasses import dataclass
+
+from app import interface
+from app.config.settings import get_settings
+
+# Keywords in the lower-cased release title and the role flag they set
+TITLE_ROLES: tuple[tuple[str, str], ...] = (
+    ("speaker", "is_speaker"),
+    ("organiser", "is_organizer"),
+    ("sponsor", "is_sponsor"),
+    ("day pass", "is_sponsor"),
+    ("volunteer", "is_volunteer"),
+)
+
+# Activities of a release and the access flag they set
+ACTIVITY_FLAGS: tuple[tuple[str, str], ...] = (
+    ("remote_sale", "is_remote"),
+    ("on_site", "is_onsite"),
+    ("online_access", "online_access"),
+)
+
+
+@dataclass(frozen=True, slots=True)
+class ReleaseProfile:
+    """Everything a validation needs to know about a release."""
+
+    release_id: int
+    title: str
+    is_valid: bool  # release has one of the activities in include_activities
+    attributes: tuple[str, ...]  # attendee flags set by the release, e.g. ("is_speaker", "is_onsite")
+
+    @property
+    def is_organizer(self) -> bool:
+        return "is_organizer" in self.attributes
+
+
+def build_release_profile(release: dict, include_activities: frozenset[str]) -> ReleaseProfile:
+    title = release.get("title", "")
+    title_lower = title.lower()
+    activities = set(release.get("activities") or ())
+    attributes = {flag for keyword, flag in TITLE_ROLES if keyword in title_lower}
+    attributes |= {flag for activity, flag in ACTIVITY_FLAGS if activity in activities}
+    return ReleaseProfile(
+        release_id=release["id"],
+        title=title,
+        is_valid=bool(activities & include_activities),
+        attributes=tuple(sorted(attributes)),
+    )
+
+
+class ReleaseProfiles:
+    """Release profiles by release ID, rebuilt whenever interface.all_releases is replaced."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._releases: dict | None = None
+        self._profiles: dict[int, ReleaseProfile] = {}
+
+    def get(self, release_id) -> ReleaseProfile | None:
+        releases = interface.all_releases
+        if self._releases is not releases:
+            with self._lock:
+                if self._releases is not releases:
+                    include_activities = get_settings().include_activities
+                    self._profiles = {x["id"]: build_release_profile(x, include_activities) for x in releases.values()}
+                    self._releases = releases
+        return self._profiles.get(release_id)
+
+
+release_profiles = ReleaseProfiles()
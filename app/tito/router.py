@@ -4,19 +4,22 @@ from fastapi import APIRouter, Response
 from starlette import status
 
 from app import interface, log
-from app.config import CONFIG
+from app.config.settings import get_settings
 from app.models.base import Email, Truthy
 from app.ticketing.backend import get_ticketing_backend
+from app.ticketing.checkins import record_validation
+from app.ticketing.responses import truthy_response
 from app.ticketing.utils import fuzzy_match_name
 
 from .backend import TitoBackend
 from .models import TitoAttendee, TitoIsAnAttendee
+from .releases import release_profiles
 
 router = APIRouter(prefix="/tickets", tags=["Tito Validation"])
 
 
 @router.post("/validate_email/", response_model=Truthy)
-async def search_email(email: Email, response: Response):
+async def search_email(email: Email):
     """Live-search for a participant by email."""
     req = email.model_dump()
     log.debug(email)
@@ -27,13 +30,14 @@ async def search_email(email: Email, response: Response):
     log.debug(f"found: {len(found)}")
     if not found:
         log.info(f"email not found: {req['email']}")
-        response.status_code = status.HTTP_404_NOT_FOUND
-        return {"valid": False}
-    return {"valid": True}
+        record_validation("email", status.HTTP_404_NOT_FOUND, {})
+        return truthy_response(False, status.HTTP_404_NOT_FOUND)
+    record_validation("email", status.HTTP_200_OK, {"ticket_id": found[0].get("reference")})
+    return truthy_response(True)
 
 
 @router.post("/validate_name/", response_model=TitoIsAnAttendee)
-async def validate_tito_attendee(attendee: TitoAttendee, response: Response):  # noqa: PLR0912, PLR0915
+async def validate_tito_attendee(attendee: TitoAttendee, response: Response):
     """Validate a Tito attendee by ticket id and name with fuzzy matching."""
     res = attendee.model_dump()
     backend = TitoBackend()
@@ -64,30 +68,27 @@ async def validate_tito_attendee(attendee: TitoAttendee, response: Response):  #
             response.status_code = status.HTTP_404_NOT_FOUND
             res["is_attendee"] = False
             res["hint"] = "invalid ticket id"
+            record_validation("name", response.status_code, res)
             return res
 
-    # Get release information
-    try:
-        ticket["release_title"] = interface.release_id_map[ticket["release_id"]]["title"]
-    except KeyError:
+    # Get release information, resolved once per release (see releases.py)
+    profile = release_profiles.get(ticket["release_id"])
+    if profile is None:
         log.error(f"release not found: {ticket['release_id']}")
         response.status_code = status.HTTP_500_INTERNAL_SERVER_ERROR
         return res
 
     # Check if ticket type is valid
-    if ticket["release_id"] not in interface.valid_ticket_ids:
+    if not profile.is_valid:
         response.status_code = status.HTTP_406_NOT_ACCEPTABLE
         res["is_attendee"] = False
-        res["hint"] = f"invalid ticket type: {ticket['release_title']}"
+        res["hint"] = f"invalid ticket type: {profile.title}"
+        record_validation("name", response.status_code, res)
         return res
 
     # Fuzzy name matching
-    match_result = fuzzy_match_name(
-        ticket.get("name", ""),
-        name,
-        CONFIG.name_matching.exact_match_threshold,
-        CONFIG.name_matching.close_match_threshold,
-    )
+    settings = get_settings()
+    match_result = fuzzy_match_name(ticket.get("name", ""), name, settings.exact_match_threshold, settings.close_match_threshold)
 
     if match_result["is_match"]:
         res["is_attendee"] = True
@@ -101,28 +102,11 @@ async def validate_tito_attendee(attendee: TitoAttendee, response: Response):  #
 
     # Set attendee attributes
     if res["is_attendee"]:
-        # Legacy name-based detection for Tito
-        release_title_lower = ticket.get("release_title", "").lower()
-
-        if "speaker" in release_title_lower:
+        res.update(dict.fromkeys(profile.attributes, True))
+        if profile.is_organizer and ticket_id.upper() in settings.organizer_speakers:
             res["is_speaker"] = True
-        if "organiser" in release_title_lower:
-            res["is_organizer"] = True
-            if ticket_id.upper() in CONFIG.organizer_speakers:
-                res["is_speaker"] = True
-        if "sponsor" in release_title_lower:
-            res["is_sponsor"] = True
-        if "day pass" in release_title_lower:
-            res["is_sponsor"] = True
-        if "volunteer" in release_title_lower:
-            res["is_volunteer"] = True
-
-        # Activity-based attributes
-        if ticket["release_id"] in interface.activity_release_id_map.get("remote_sale", []):
-            res["is_remote"] = True
-        if ticket["release_id"] in interface.activity_release_id_map.get("on_site", []):
-            res["is_onsite"] = True
-        if ticket["release_id"] in interface.activity_release_id_map.get("online_access", []):
-            res["online_access"] = True
+    # a name that does not match is answered with 200 and is_attendee false, a failed validation all the same
+    outcome = status.HTTP_200_OK if res["is_attendee"] else status.HTTP_404_NOT_FOUND
+    record_validation("name", outcome, res, fuzzy=match_result["ratio"] < 1.0)
 
     return res
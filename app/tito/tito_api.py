@@ -1,12 +1,16 @@
 from http import HTTPStatus
 from urllib.parse import urlencode
 
-import requests
 from fastapi.encoders import jsonable_encoder
 
 from app import in_dummy_mode, interface, log
-from app.config import CONFIG, TOKEN, account_slug, event_slug
+from app.config import TOKEN, account_slug, event_slug
+from app.config.settings import get_settings
 from app.errors import NotOk
+from app.ticketing.circuit_breaker import CircuitBreaker
+
+# Shared by all calls to the Tito API, fails fast while Tito is down
+breaker = CircuitBreaker("tito")
 
 headers = {
     "Accept": "application/json",
@@ -44,7 +48,8 @@ def filter_valid_activities(data: list[dict]) -> list[dict]:
 
     Tickets like for social events, workshops, etc. are not relevant.
     """
-    return [x for x in data if set(x["activities"]) & set(CONFIG.include_activities)]
+    include_activities = get_settings().include_activities
+    return [x for x in data if not include_activities.isdisjoint(x["activities"])]
 
 
 def response_is_not_ok(response):
@@ -70,7 +75,7 @@ def get_all_tickets():
     while payload["page"]:
         log.info(f"getting page:{payload['page']}")
         url = f"https://api.tito.io/v3/{account_slug}/{event_slug}/tickets"
-        res = requests.get(url, headers=headers, params=payload, timeout=30)
+        res = breaker.get(url, headers=headers, params=payload, timeout=30)
         if res.status_code != HTTPStatus.OK:
             response_is_not_ok(res)
         res_j = res.json()
@@ -95,7 +100,7 @@ def get_all_ticket_offers():
         # activities requires API version=3.1
         url = f"https://api.tito.io/v3/{account_slug}/{event_slug}/releases?expand=activities&version=3.1"
         log.info(url)
-        res = requests.get(url, headers=headers, params=payload, timeout=30)
+        res = breaker.get(url, headers=headers, params=payload, timeout=30)
         if res.status_code != HTTPStatus.OK:
             response_is_not_ok(res)
         res_j = res.json()
@@ -119,7 +124,7 @@ def search_reference(reference):
 
     params = {"search[q]": reference}
     url = f"https://api.tito.io/v3/{account_slug}/{event_slug}/tickets?{urlencode(params)}"
-    res = requests.get(url, headers=headers, timeout=30)
+    res = breaker.get(url, headers=headers, timeout=30)
     if res.status_code != HTTPStatus.OK:
         log.debug(f"the request reference: {reference} returned status code: {res.status_code}")
         response_is_not_ok(res)
@@ -138,7 +143,7 @@ def search(search_for: str):
 
     params = {"search[q]": search_for}
     url = f"https://api.tito.io/v3/{account_slug}/{event_slug}/tickets?{urlencode(params)}"
-    res = requests.get(url, headers=headers, timeout=30)
+    res = breaker.get(url, headers=headers, timeout=30)
     if res.status_code != HTTPStatus.OK:
         log.debug(f"the request {search_for} returned status code: {res.status_code}")
         response_is_not_ok(res)
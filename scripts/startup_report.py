@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""Report where startup time goes: imports by package and time to the first health check.
+
+Runs ``python -X importtime -c "import app.main"`` and starts uvicorn, both in fresh processes
+in dummy mode (FAKE_CHECK_IN_TEST_MODE=1), so no ticketing API is called. Pass ``--live`` to keep
+the environment as it is, the first health check then also waits for the initial refresh.
+
+    python scripts/startup_report.py [--top 15] [--live]
+"""
+
+import argparse
+import os
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+from collections import defaultdict
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+
+
+def import_times(env: dict) -> list[tuple[str, int, int]]:
+    """(module, self µs, cumulative µs) of every import, in the order they finished."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app.main"],
+        cwd=project_root,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line.removeprefix("import time:").split("|")
+        rows.append((name.strip(), int(self_us), int(cumulative_us)))
+    return rows
+
+
+def time_to_first_healthcheck(env: dict, timeout: float = 60.0) -> float:
+    """Seconds from starting uvicorn until /healthcheck/alive answers."""
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    start = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=project_root,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        while time.perf_counter() - start < timeout:
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{port}/healthcheck/alive", timeout=1) as response:
+                    if response.status == 200:  # noqa: PLR2004
+                        return time.perf_counter() - start
+            except OSError:
+                time.sleep(0.01)
+        raise TimeoutError(f"no health check response within {timeout} s")
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--top", type=int, default=15, help="number of packages and app modules listed")
+    parser.add_argument("--live", action="store_true", help="do not force dummy mode")
+    args = parser.parse_args()
+    env = dict(os.environ) if args.live else {**os.environ, "FAKE_CHECK_IN_TEST_MODE": "1"}
+
+    rows = import_times(env)
+    total = next(cumulative for name, _, cumulative in rows if name == "app.main")
+    by_package: dict[str, int] = defaultdict(int)
+    for name, self_us, _ in rows:
+        by_package[name.split(".")[0]] += self_us
+    print(f"import app.main: {total / 1000:.0f} ms\n\nself time by top-level package:")
+    for package, self_us in sorted(by_package.items(), key=lambda x: x[1], reverse=True)[: args.top]:
+        print(f"  {self_us / 1000:7.1f} ms  {package}")
+    print("\napp modules, cumulative:")
+    app_modules: dict[str, int] = {}
+    for name, _, cumulative in rows:
+        if name == "app" or name.startswith("app."):
+            app_modules[name] = max(cumulative, app_modules.get(name, 0))
+    for name, cumulative in sorted(app_modules.items(), key=lambda x: x[1], reverse=True)[: args.top]:
+        print(f"  {cumulative / 1000:7.1f} ms  {name}")
+    print(f"\nprocess start to first /healthcheck/alive: {time_to_first_healthcheck(env) * 1000:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""Shared helpers for the benchmark suite.
+
+Benchmarks use ``time.perf_counter`` only, no extra plugin is required. They are deselected
+by default, run them with ``pytest -m benchmark -s`` to see the timings. Timings are also
+attached to the JUnit report via ``record_property`` so CI can keep track of them.
+"""
+
+import statistics
+import time
+from collections.abc import Callable
+
+import pytest
+
+
+def _make_sales(count: int) -> dict[str, dict]:
+    """Build ``count`` synthetic Pretix-like sales, two positions per order."""
+    sales = {}
+    for i in range(count):
+        order = f"{i // 2:05d}"
+        reference = f"{order}-{i % 2 + 1}"
+        sales[reference] = {
+            "reference": reference,
+            "order": order,
+            "email": f"attendee{i}@example.com",
+            "name": f"  Attendee Number {i}  ",
+            "release_id": None,
+            "item": 100 + i % 7,
+            "state": "complete",
+            "assigned": True,
+            "_pretix_data": {"order": order, "positionid": i % 2 + 1, "secret": f"secret{i:08d}", "item": 100 + i % 7},
+        }
+    return sales
+
+
+@pytest.fixture
+def make_sales() -> Callable[[int], dict[str, dict]]:
+    """Factory for synthetic sales keyed by reference."""
+    return _make_sales
+
+
+@pytest.fixture
+def live_interface(monkeypatch):
+    """A fresh non-dummy Interface serving the default event for one benchmark.
+
+    It replaces the process-wide singleton in ``app.interface`` only for the test, the singleton
+    itself is neither re-initialized nor changed.
+    """
+    from app import interface
+    from app.middleware.interface import Interface
+    from app.ticketing.events import DEFAULT_EVENT
+
+    iface = Interface.create(in_dummy_mode=False)
+    monkeypatch.setitem(interface._instances, DEFAULT_EVENT, iface)  # type: ignore[attr-defined]
+    return iface
+
+
+@pytest.fixture
+def bench(request, record_property) -> Callable[..., float]:
+    """Run ``func`` ``rounds`` times and return the median duration in seconds."""
+
+    def run(func: Callable[[], object], rounds: int = 5) -> float:
+        durations = []
+        for _ in range(rounds):
+            start = time.perf_counter()
+            func()
+            durations.append(time.perf_counter() - start)
+        median = statistics.median(durations)
+        record_property(f"{request.node.name}_median_s", median)
+        print(f"\n{request.node.name}: median {median * 1000:.2f} ms over {rounds} rounds")  # noqa: T201
+        return median
+
+    return run
@@ -0,0 +1,22 @@
+"""Benchmarks for admission control on the request path."""
+
+import pytest
+
+ROUNDS = 100_000
+
+
+@pytest.mark.benchmark
+def test_token_bucket_cost(bench):
+    """Taking a token costs a few microseconds, with 10k clients tracked."""
+    from app.ticketing.admission import TokenBuckets
+
+    buckets = TokenBuckets(rate=5, burst=50)
+    clients = [f"kiosk-{i}" for i in range(10_000)]
+
+    def take():
+        for i in range(ROUNDS):
+            buckets.take(clients[i % 10_000])
+
+    per_call = bench(take, rounds=3) / ROUNDS
+    print(f"token bucket: {per_call * 1e6:.2f} µs per call")  # noqa: T201
+    assert per_call < 20e-6  # noqa: PLR2004
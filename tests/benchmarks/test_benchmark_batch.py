@@ -0,0 +1,35 @@
+"""Benchmarks for batch attendee validation."""
+
+import pytest
+
+SALES_COUNT = 20_000
+CLAIMS = 1_000
+
+
+@pytest.mark.benchmark
+@pytest.mark.usefixtures("_set_tito_for_unit_tests")  # importing a router loads all routers, see conftest.py
+def test_batch_vs_single_validation(bench, make_sales, live_interface):
+    """One batch call for 1000 claims vs. 1000 calls of /tickets/validate_attendee/."""
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+
+    from app.pretix.router import router
+
+    iface = live_interface
+    iface.publish(
+        releases={str(i): {"id": i, "title": f"Ticket {i}", "_attributes": {"is_onsite": True}} for i in range(100, 107)},
+        sales=make_sales(SALES_COUNT),
+    )
+    claims = [{"order_id": x["order"], "name": x["name"]} for x in list(iface.all_sales.values())[:CLAIMS]]
+    mini_app = FastAPI()
+    mini_app.include_router(router)
+    client = TestClient(mini_app)
+
+    def single():
+        for claim in claims:
+            client.post("/tickets/validate_attendee/", json=claim)
+
+    def batch():
+        assert len(client.post("/tickets/validate_attendees/", json=claims).text.splitlines()) == CLAIMS
+
+    assert bench(batch, rounds=3) * 10 < bench(single, rounds=1)
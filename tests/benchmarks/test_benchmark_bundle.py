@@ -0,0 +1,49 @@
+"""Benchmarks for the offline kiosk bundle."""
+
+import base64
+import bisect
+import json
+from array import array
+
+import pytest
+
+SALES_COUNT = 20_000
+
+
+@pytest.mark.benchmark
+@pytest.mark.usefixtures("_set_tito_for_unit_tests")  # importing a router loads all routers, see conftest.py
+def test_bundle_size_delta_and_lookup(bench, make_sales, live_interface):
+    """A bundle of 20k tickets stays small, a delta for one changed order is tiny, lookups take microseconds."""
+    from app.pretix.bundle import KioskBundles, key_hash
+    from app.ticketing.responses import dumps
+
+    iface = live_interface
+    iface.publish(
+        releases={str(i): {"id": i, "title": f"Ticket {i}", "_attributes": {"is_onsite": True}} for i in range(100, 107)},
+        sales=make_sales(SALES_COUNT),
+    )
+    bundles = KioskBundles()
+    base = bundles.current()
+    full = bundles.full(base)
+    iface.merge_order("00000", {})
+    delta = bundles.delta(base, bundles.current())
+
+    build = bench(lambda: KioskBundles().current(), rounds=3)
+    cached_json = dumps(list(iface.all_sales.values()))
+    print(f"bundle: {len(full) / 1e3:.0f} kB vs {len(cached_json) / 1e3:.0f} kB of tickets, delta {len(delta)} B")  # noqa: T201
+    print(f"bundle build: {build * 1e3:.1f} ms")  # noqa: T201
+    assert len(full) * 5 < len(cached_json)
+    assert len(delta) < 2_000  # noqa: PLR2004
+
+    # what a kiosk does: binary search in the decoded array
+    emails = array("Q", base64.b64decode(json.loads(full)["emails"]))
+    needle = key_hash("attendee42@example.com")
+
+    def lookup():
+        for _ in range(10_000):
+            i = bisect.bisect_left(emails, needle)
+            assert emails[i] == needle
+
+    per_lookup = bench(lookup) / 10_000
+    print(f"kiosk lookup: {per_lookup * 1e6:.2f} µs")  # noqa: T201
+    assert per_lookup < 50e-6  # noqa: PLR2004
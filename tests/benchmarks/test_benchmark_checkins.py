@@ -0,0 +1,44 @@
+"""Benchmarks for recording check-ins on the request path."""
+
+from http import HTTPStatus
+
+import pytest
+
+ROUNDS = 10_000
+
+
+@pytest.mark.benchmark
+def test_record_validation_cost(bench, tmp_path, monkeypatch):
+    """Recording a check-in only queues a tuple, writing and fsync happen in the background."""
+    from app.ticketing import checkins
+
+    checkin_log = checkins.CheckinLog(tmp_path / "checkins.ndjson")
+    monkeypatch.setattr(checkins, "checkin_log", checkin_log)
+    result = {"ticket_id": "ABCDE-1", "order_id": "ABCDE", "is_attendee": True}
+
+    def record():
+        for _ in range(ROUNDS):
+            checkins.record_validation("attendee", HTTPStatus.OK, result)
+
+    per_call = bench(record) / ROUNDS
+    assert checkin_log.flush(timeout=30)
+    checkin_log.close()
+    print(f"record_validation: {per_call * 1e6:.2f} µs per call")  # noqa: T201
+    assert per_call < 50e-6  # noqa: PLR2004
+    assert checkin_log.written == ROUNDS * 5  # noqa: PLR2004
+
+
+@pytest.mark.benchmark
+def test_live_stats_summary_cost(bench):
+    """Reading the live statistics costs the same after many validations as after one."""
+    from app.ticketing.analytics import RollingCounters
+
+    counters = RollingCounters()
+    for i in range(300_000):
+        counters.add(1_000_000.0 + i * 0.01, success=i % 10 > 0, fuzzy=i % 7 == 0, category=f"Category {i % 5}")
+    now = 1_000_000.0 + 3_000
+
+    per_call = bench(lambda: counters.summary(now=now), rounds=100)
+    print(f"live stats summary: {per_call * 1e6:.1f} µs per call")  # noqa: T201
+    assert counters.summary(now=now)["validations"] == 300_000  # noqa: PLR2004
+    assert per_call < 5e-3  # noqa: PLR2004
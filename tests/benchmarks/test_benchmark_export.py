@@ -0,0 +1,36 @@
+"""Benchmarks for streaming attendee exports."""
+
+import tracemalloc
+
+import pytest
+
+SALES_COUNT = 50_000
+
+
+@pytest.mark.benchmark
+@pytest.mark.usefixtures("_set_tito_for_unit_tests")  # importing a router loads all routers, see conftest.py
+def test_export_memory_stays_flat(bench, make_sales):
+    """Streaming 50k rows keeps only one chunk in memory, unlike building the whole body."""
+    from app.pretix.export import export_rows, ndjson_chunks
+
+    sales = list(make_sales(SALES_COUNT).values())
+    release_id_map = {
+        i: {"id": i, "title": f"Ticket {i}", "category_id": i % 2, "_attributes": {"is_onsite": True}} for i in range(100, 107)
+    }
+
+    def stream():
+        for _ in ndjson_chunks(export_rows(sales, release_id_map)):
+            pass
+
+    def peak(func) -> int:
+        tracemalloc.start()
+        func()
+        _, peak_bytes = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return peak_bytes
+
+    bench(stream, rounds=1)
+    streamed = peak(stream)
+    materialized = peak(lambda: b"".join(list(ndjson_chunks(export_rows(sales, release_id_map)))))
+    print(f"peak memory: streamed {streamed / 1e6:.1f} MB, materialized {materialized / 1e6:.1f} MB")  # noqa: T201
+    assert streamed * 10 < materialized
@@ -0,0 +1,24 @@
+"""Benchmarks for rebuilding the in-memory lookup indexes of the Interface."""
+
+import pytest
+
+SALES_COUNT = 20_000
+
+
+@pytest.mark.benchmark
+def test_all_sales_index_rebuild(bench, make_sales):
+    """A full refresh rebuilds every derived index in one traversal."""
+    from app.middleware.interface import Interface
+
+    iface = Interface.create(in_dummy_mode=False)
+    sales = make_sales(SALES_COUNT)
+
+    def rebuild():
+        iface.all_sales = sales
+
+    bench(rebuild)
+
+    assert len(iface.valid_emails) == SALES_COUNT
+    assert len(iface.valid_order_name_combo) == SALES_COUNT
+    assert len(iface.valid_order_ids) == SALES_COUNT // 2
+    assert len(iface.positions_by_secret) == SALES_COUNT
@@ -0,0 +1,34 @@
+"""Benchmarks for encoding validation responses."""
+
+import pytest
+
+ROUNDS = 5_000
+
+
+@pytest.mark.benchmark
+def test_attendee_result_encoding(bench):
+    """Pre-encoded attendee result vs. response model validation and jsonable_encoder."""
+    from fastapi.encoders import jsonable_encoder
+
+    from app.pretix.models import PretixIsAnAttendee
+    from app.ticketing.responses import ModelEncoder, dumps
+
+    result = {
+        "name": "Attendee Number 1",
+        "order_id": "ABCDE",
+        "is_attendee": True,
+        "ticket_id": "ABCDE-1",
+        "email": "attendee1@example.com",
+        "is_onsite": True,
+    }
+    encoder = ModelEncoder(PretixIsAnAttendee)
+
+    def response_model():
+        for _ in range(ROUNDS):
+            dumps(jsonable_encoder(PretixIsAnAttendee.model_validate(result).model_dump()))
+
+    def pre_encoded():
+        for _ in range(ROUNDS):
+            encoder.encode(result)
+
+    assert bench(pre_encoded) < bench(response_model)
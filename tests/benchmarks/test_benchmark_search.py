@@ -0,0 +1,55 @@
+"""Benchmarks for the whole-event name search."""
+
+import itertools
+import random
+
+import pytest
+
+SALES_COUNT = 50_000
+
+
+def _random_name(rng: random.Random) -> str:
+    syllables = [
+        "an",
+        "bel",
+        "cor",
+        "da",
+        "el",
+        "fin",
+        "gus",
+        "ha",
+        "ire",
+        "jo",
+        "ka",
+        "lin",
+        "mar",
+        "no",
+        "ov",
+        "pe",
+        "ria",
+        "sto",
+        "tu",
+        "vik",
+    ]
+    first = "".join(rng.choices(syllables, k=rng.randint(2, 3))).capitalize()
+    last = "".join(rng.choices(syllables, k=rng.randint(2, 4))).capitalize()
+    return f"{first} {last}"
+
+
+@pytest.mark.benchmark
+def test_trigram_name_search(bench):
+    """Fuzzy and substring queries over 50k names are answered from the trigram index."""
+    from app.ticketing.search_index import TrigramIndex
+
+    rng = random.Random(42)
+    sales = [{"reference": f"{i:05d}-1", "name": _random_name(rng)} for i in range(SALES_COUNT)]
+    index = TrigramIndex(sales)
+    queries = [x["name"] for x in itertools.islice(sales, 0, SALES_COUNT, SALES_COUNT // 10)]
+
+    def search():
+        for query in queries:
+            index.search(query[:-1], limit=10)  # typo: last char missing
+
+    bench(search)
+
+    assert index.search(sales[123]["name"], limit=50)[0][0] == 1.0
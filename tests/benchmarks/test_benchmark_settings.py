@@ -0,0 +1,45 @@
+"""Benchmarks for settings reads on the validation hot path."""
+
+import pytest
+
+SALES_COUNT = 20_000
+
+
+@pytest.mark.benchmark
+@pytest.mark.usefixtures("_set_tito_for_unit_tests")  # importing a router loads all routers, see conftest.py
+def test_detailed_positive_result(bench, make_sales, live_interface):
+    """Attribute flags for a matched Pretix position, settings compiled once."""
+    from app.pretix.router import detailed_positive_result
+
+    iface = live_interface
+    iface.publish(
+        releases={str(i): {"id": i, "title": f"Ticket {i}", "_attributes": {"is_onsite": True}} for i in range(100, 107)},
+        sales=make_sales(SALES_COUNT),
+    )
+    sales = list(iface.all_sales.values())
+
+    def validate():
+        for item in sales:
+            detailed_positive_result(item)
+
+    bench(validate)
+
+
+@pytest.mark.benchmark
+def test_settings_vs_config_reads(bench):
+    """Reading thresholds from the frozen settings instead of OmegaConf."""
+    from app.config import CONFIG
+    from app.config.settings import get_settings
+
+    rounds = 2_000
+
+    def config_reads():
+        for _ in range(rounds):
+            _ = CONFIG.name_matching.exact_match_threshold, CONFIG.name_matching.close_match_threshold
+
+    def settings_reads():
+        for _ in range(rounds):
+            settings = get_settings()
+            _ = settings.exact_match_threshold, settings.close_match_threshold
+
+    assert bench(settings_reads) < bench(config_reads)
@@ -0,0 +1,36 @@
+"""Benchmarks for startup, from process start to the first health check response.
+
+``python scripts/startup_report.py`` breaks the import time down by package, the time to the first
+health check is measured with its time_to_first_healthcheck() here.
+"""
+
+import importlib.util
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+project_root = Path(__file__).parents[2]
+# Dummy mode, the first health check does not wait for a ticketing API
+ENV = {**os.environ, "FAKE_CHECK_IN_TEST_MODE": "1", "CHECKIN_LOG_PATH": ""}
+STARTUP_BUDGET_S = 5.0
+
+_spec = importlib.util.spec_from_file_location("startup_report", project_root / "scripts" / "startup_report.py")
+startup_report = importlib.util.module_from_spec(_spec)  # type: ignore[arg-type]
+_spec.loader.exec_module(startup_report)  # type: ignore[union-attr]
+
+
+@pytest.mark.benchmark
+def test_time_to_first_healthcheck(bench):
+    """A fresh process answers /healthcheck/alive within the startup budget."""
+    assert bench(lambda: startup_report.time_to_first_healthcheck(ENV, timeout=STARTUP_BUDGET_S * 4), rounds=3) < STARTUP_BUDGET_S
+
+
+@pytest.mark.benchmark
+def test_optional_packages_are_not_imported_at_startup():
+    """jwt is only needed with authentication enabled, uvicorn only to run app.main as a script."""
+    code = "import sys, app.main; print(sorted({'jwt', 'uvicorn'} & set(sys.modules)))"
+    result = subprocess.run([sys.executable, "-c", code], cwd=project_root, env=ENV, capture_output=True, text=True, check=True)
+    assert result.stdout.splitlines()[-1] == "[]"
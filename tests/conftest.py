@@ -3,6 +3,10 @@ from urllib.parse import urljoin
 
 # Must be set before any test module triggers app imports at collection time
 os.environ["FAKE_CHECK_IN_TEST_MODE"] = "1"
+# Tests that need the check-in log use their own in a temporary directory
+os.environ["CHECKIN_LOG_PATH"] = ""
+# Tests fire requests much faster than any client should, test_admission.py enables it on its own
+os.environ["ADMISSION_CONTROL"] = "0"
 
 import pytest
 import requests
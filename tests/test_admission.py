@@ -0,0 +1,123 @@
+"""Tests for the in-flight cap and the per-client rate limits, see app.ticketing.admission."""
+
+import threading
+from http import HTTPStatus
+
+import pytest
+from fastapi import APIRouter, Depends, FastAPI
+from fastapi.testclient import TestClient
+from starlette.middleware import Middleware
+
+from app.ticketing import admission as admission_module
+from app.ticketing.admission import Admission, TokenBuckets, rate_limit
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestTokenBuckets:
+    def test_burst_then_refill(self):
+        clock = FakeClock()
+        buckets = TokenBuckets(rate=2, burst=3, clock=clock)
+
+        assert [buckets.take("kiosk-1") for _ in range(3)] == [0.0, 0.0, 0.0]
+        assert buckets.take("kiosk-1") == 0.5  # noqa: PLR2004
+        assert buckets.take("kiosk-2") == 0.0
+        clock.now += 0.5
+        assert buckets.take("kiosk-1") == 0.0
+        assert buckets.take("kiosk-1") > 0
+
+
+@pytest.fixture
+def admission(monkeypatch):
+    admission = Admission(
+        max_in_flight=1,
+        exempt_paths=frozenset({"/healthcheck/alive"}),
+        rate_limits={"default": {"rate": 0}, "/tickets/limited/": {"rate": 1, "burst": 2}},
+        account_rate_limits={"default": {"rate": 0}, "/tickets/limited/": {"rate": 1, "burst": 4}},
+        client_header="X-Kiosk-Id",
+    )
+    monkeypatch.setattr(admission_module, "admission", admission)
+    return admission
+
+
+@pytest.fixture
+def client(admission):  # noqa: ARG001
+    from app.middleware import AdmissionMiddleware
+
+    release = threading.Event()
+    router = APIRouter(prefix="/tickets")
+
+    @router.get("/limited/")
+    async def limited():
+        return {"ok": True}
+
+    @router.get("/unlimited/")
+    async def unlimited():
+        return {"ok": True}
+
+    @router.get("/slow/")
+    def slow():
+        release.wait(5)
+        return {"ok": True}
+
+    mini_app = FastAPI(middleware=[Middleware(AdmissionMiddleware)])
+    mini_app.include_router(router, dependencies=[Depends(rate_limit)])
+
+    @mini_app.get("/healthcheck/alive")
+    async def alive():
+        return {"alive": True}
+
+    with TestClient(mini_app) as client:
+        client.release = release
+        yield client
+        release.set()
+
+
+class TestAdmission:
+    def test_rate_limit_per_route(self, client, admission):
+        assert [client.get("/tickets/limited/").status_code for _ in range(2)] == [HTTPStatus.OK] * 2
+        response = client.get("/tickets/limited/")
+
+        assert response.status_code == HTTPStatus.TOO_MANY_REQUESTS
+        assert response.headers["Retry-After"] == "1"
+        assert admission.rate_limited == 1
+        assert all(client.get("/tickets/unlimited/").status_code == HTTPStatus.OK for _ in range(10))
+
+    def test_kiosks_sharing_an_account_are_told_apart_by_header(self, client):
+        kiosk_1, kiosk_2 = {"X-Kiosk-Id": "door-1"}, {"X-Kiosk-Id": "door-2"}
+        assert [client.get("/tickets/limited/", headers=kiosk_1).status_code for _ in range(3)][-1] == HTTPStatus.TOO_MANY_REQUESTS
+
+        assert client.get("/tickets/limited/", headers=kiosk_2).status_code == HTTPStatus.OK
+        assert client.get("/tickets/limited/").status_code == HTTPStatus.OK
+
+    def test_changing_kiosk_ids_do_not_lift_the_account_limit(self, client):
+        statuses = [client.get("/tickets/limited/", headers={"X-Kiosk-Id": f"spoof-{i}"}).status_code for i in range(6)]
+
+        assert statuses == [HTTPStatus.OK] * 4 + [HTTPStatus.TOO_MANY_REQUESTS] * 2
+
+    def test_in_flight_cap_rejects_fast(self, client, admission):
+        slow = threading.Thread(target=client.get, args=("/tickets/slow/",))
+        slow.start()
+        for _ in range(500):
+            if admission.in_flight:
+                break
+            threading.Event().wait(0.01)
+
+        assert client.get("/tickets/unlimited/").status_code == HTTPStatus.TOO_MANY_REQUESTS
+        assert client.get("/healthcheck/alive").status_code == HTTPStatus.OK
+        client.release.set()
+        slow.join()
+        assert admission.in_flight == 0
+        assert admission.rejected_in_flight == 1
+        assert client.get("/tickets/unlimited/").status_code == HTTPStatus.OK
+
+    def test_disabled(self, client, admission):
+        admission.enabled = False
+
+        assert all(client.get("/tickets/limited/").status_code == HTTPStatus.OK for _ in range(5))
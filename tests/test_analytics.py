@@ -0,0 +1,83 @@
+"""Tests for the live validation statistics, see app.ticketing.analytics."""
+
+from http import HTTPStatus
+
+import pytest
+
+from app.ticketing import checkins
+from app.ticketing.analytics import RollingCounters, release_category
+
+START = 1_000_020.0  # 20 s into a minute
+
+
+@pytest.fixture
+def counters():
+    return RollingCounters(bucket_seconds=60, buckets=5)
+
+
+class TestRollingCounters:
+    def test_totals_and_rates(self, counters):
+        counters.add(START, success=True, category="Business", flags={"is_onsite": True})
+        counters.add(START + 1, success=True, fuzzy=True, category="Business", flags={"is_onsite": True})
+        counters.add(START + 2, success=True, category="Remote", flags={"is_remote": True})
+        counters.add(START + 3, success=False)
+
+        summary = counters.summary(now=START + 4)
+        assert summary["validations"] == 4  # noqa: PLR2004
+        assert summary["checkins"] == 3  # noqa: PLR2004
+        assert (summary["onsite"], summary["remote"], summary["fuzzy"]) == (2, 1, 1)
+        assert summary["failure_rate"] == 0.25  # noqa: PLR2004
+        assert summary["fuzzy_match_rate"] == pytest.approx(1 / 3)
+        assert summary["categories"] == {"Business": 2, "Remote": 1}
+
+    def test_buckets_expire_with_the_window(self, counters):
+        counters.add(START, success=True, category="Business")
+        counters.add(START + 60, success=True, category="Business")
+        counters.add(START + 60, success=False)
+
+        assert [x["checkins"] for x in counters.summary(now=START + 60)["checkins_per_bucket"]] == [0, 0, 0, 1, 1]
+        summary = counters.summary(now=START + 5 * 60)
+        assert summary["checkins"] == 1
+        assert summary["failure_rate"] == 0.5  # noqa: PLR2004
+        assert summary["categories"] == {"Business": 1}
+        assert counters.summary(now=START + 60 * 60)["validations"] == 0
+
+    def test_late_validations_outside_the_window_are_dropped(self, counters):
+        counters.add(START + 10 * 60, success=True)
+        counters.add(START, success=True)
+        counters.add(START + 9 * 60, success=True)
+
+        assert counters.summary(now=START + 10 * 60)["checkins"] == 2  # noqa: PLR2004
+
+    def test_pretix_category_names_are_localized(self):
+        assert release_category({"title": "Business", "category": {"name": {"de": "Konferenz", "en": "Conference"}}}) == "Conference"
+        assert release_category({"title": "Business", "category": None}) == "Business"
+
+
+class TestRecordValidation:
+    def test_outcomes_are_counted(self, monkeypatch):
+        from app import interface
+
+        counters = RollingCounters()
+        monkeypatch.setattr(checkins, "live_stats", counters)
+        ticket_id, sale = next(iter(interface.all_sales.items()))
+        category = release_category(interface.release_id_map[sale["release_id"]])
+
+        checkins.record_validation("name", HTTPStatus.OK, {"ticket_id": ticket_id, "is_attendee": True}, fuzzy=True)
+        checkins.record_validation("name", HTTPStatus.NOT_FOUND, {"ticket_id": ticket_id, "is_attendee": False})
+        checkins.record_validation("email", HTTPStatus.OK, {"ticket_id": "UNKNOWN"})
+
+        summary = counters.summary()
+        assert (summary["validations"], summary["checkins"], summary["fuzzy"], summary["failures"]) == (3, 2, 1, 1)
+        assert summary["categories"] == {category: 1}
+
+    def test_live_stats_endpoint(self, app_client, monkeypatch):
+        counters = RollingCounters()
+        counters.add(START, success=True)
+        monkeypatch.setattr("app.routers.common.live_stats", counters)
+
+        response = app_client.get("/tickets/live_stats/")
+
+        assert response.status_code == HTTPStatus.OK
+        assert response.json()["window_seconds"] == 3600  # noqa: PLR2004
+        assert len(response.json()["checkins_per_bucket"]) == 60  # noqa: PLR2004
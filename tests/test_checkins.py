@@ -0,0 +1,135 @@
+"""Tests for the check-in log and its tally, see app.ticketing.checkins."""
+
+import json
+import time
+from http import HTTPStatus
+
+import pytest
+
+from app.ticketing import checkins
+from app.ticketing.checkins import CheckinLog, CheckinTally, record_validation
+
+
+@pytest.fixture
+def checkin_log(tmp_path):
+    checkin_log = CheckinLog(tmp_path / "checkins.ndjson", batch_size=64)
+    yield checkin_log
+    checkin_log.close()
+
+
+def records(count, ticket="ABCDE-1", start=1000.0):
+    return [(start + i, "default", "attendee", ticket, ticket[:5]) for i in range(count)]
+
+
+class TestCheckinLog:
+    def test_records_are_appended_as_ndjson(self, checkin_log):
+        for record in records(3):
+            checkin_log.record(record)
+        assert checkin_log.flush()
+
+        lines = checkin_log.path.read_text().splitlines()
+        assert json.loads(lines[0]) == {"ts": 1000.0, "event": "default", "kind": "attendee", "ticket_id": "ABCDE-1", "order_id": "ABCDE"}
+        assert len(lines) == 3  # noqa: PLR2004
+
+    def test_burst_is_written_in_batches(self, checkin_log):
+        batches = []
+        checkin_log.add_listener(batches.append)
+        for record in records(1000):
+            checkin_log.record(record)
+        assert checkin_log.flush()
+
+        assert checkin_log.written == 1000  # noqa: PLR2004
+        assert max(len(x) for x in batches) <= checkin_log.batch_size
+        assert len(batches) < 1000  # noqa: PLR2004
+
+    def test_rotation_keeps_backups_and_replays_in_order(self, tmp_path):
+        checkin_log = CheckinLog(tmp_path / "checkins.ndjson", batch_size=1, max_bytes=500, backups=50)
+        for record in records(40):
+            checkin_log.record(record)
+        checkin_log.close()
+
+        assert (tmp_path / "checkins.ndjson.1").exists()
+        assert [x["ts"] for x in checkin_log.replay()] == [1000.0 + i for i in range(40)]
+
+    def test_replay_skips_a_line_cut_off_by_a_crash(self, checkin_log):
+        checkin_log.record(records(1)[0])
+        checkin_log.close()
+        with checkin_log.path.open("ab") as f:
+            f.write(b'{"ts": 1001.0, "eve')
+
+        assert len(list(checkin_log.replay())) == 1
+
+    def test_disabled_without_path(self):
+        checkin_log = CheckinLog(None)
+        checkin_log.record(records(1)[0])
+        assert not checkin_log.enabled
+        assert list(checkin_log.replay()) == []
+
+    def test_unwritable_path_drops_records_and_recovers(self, tmp_path):
+        """A failed writer is restarted after retry_delay, meanwhile the queue stays bounded."""
+        blocker = tmp_path / "log"
+        blocker.write_text("not a directory")
+        checkin_log = CheckinLog(blocker / "checkins.ndjson", max_queued=10)
+        checkin_log.retry_delay = 0.2
+        checkin_log.record(records(1)[0])
+        for _ in range(500):
+            if checkin_log._worker is None:
+                break
+            time.sleep(0.01)
+
+        for record in records(100):
+            checkin_log.record(record)
+        assert checkin_log._worker is None
+        assert checkin_log.dropped == 91  # the first record is still queued  # noqa: PLR2004
+        assert not checkin_log.flush(timeout=0.1)
+
+        blocker.unlink()
+        time.sleep(checkin_log.retry_delay)
+        checkin_log.record(records(1, start=2000.0)[0])  # dropped as well, but starts a new writer
+        assert checkin_log.flush()
+        checkin_log.close()
+        assert checkin_log.written == 10  # noqa: PLR2004
+
+
+class TestCheckinTally:
+    def test_replay_finds_duplicate_pickups(self, checkin_log):
+        for record in [*records(2, "ABCDE-1"), *records(1, "FGHJK-1", start=2000.0)]:
+            checkin_log.record(record)
+        checkin_log.close()
+
+        tally = CheckinTally()
+        assert tally.replay(checkin_log) == 3  # noqa: PLR2004
+        summary = tally.summary("default")
+        assert summary["checked_in"] == 2  # noqa: PLR2004
+        assert summary["checkins"] == 3  # noqa: PLR2004
+        assert summary["duplicates"] == [{"ticket_id": "ABCDE-1", "count": 2, "first": 1000.0, "last": 1001.0}]
+        assert tally.summary("other")["checked_in"] == 0
+
+    def test_only_successful_validations_are_logged(self, checkin_log, monkeypatch):
+        monkeypatch.setattr(checkins, "checkin_log", checkin_log)
+        monkeypatch.setattr(checkins, "checkin_tally", CheckinTally())
+        record_validation("attendee", HTTPStatus.OK, {"ticket_id": "ABCDE-1", "order_id": "ABCDE"})
+        record_validation("attendee", HTTPStatus.NOT_FOUND, {"ticket_id": "FGHJK-1"})
+        record_validation("email", HTTPStatus.OK, {"ticket_id": None})
+        assert checkin_log.flush()
+
+        assert [x["ticket_id"] for x in checkin_log.replay()] == ["ABCDE-1"]
+
+    def test_tally_is_kept_without_log(self, monkeypatch):
+        tally = CheckinTally()
+        monkeypatch.setattr(checkins, "checkin_log", CheckinLog(None))
+        monkeypatch.setattr(checkins, "checkin_tally", tally)
+        record_validation("attendee", HTTPStatus.OK, {"ticket_id": "ABCDE-1", "order_id": "ABCDE"})
+        record_validation("secret", HTTPStatus.OK, {"ticket_id": "ABCDE-1", "order_id": "ABCDE"})
+
+        assert tally.summary("default")["checkins"] == 2  # noqa: PLR2004
+
+    def test_checkins_endpoint(self, app_client, monkeypatch):
+        tally = CheckinTally()
+        tally.add(records(2, "ABCDE-1"))
+        monkeypatch.setattr("app.routers.common.checkin_tally", tally)
+
+        response = app_client.get("/tickets/checkins/")
+
+        assert response.status_code == HTTPStatus.OK
+        assert response.json()["duplicates"][0]["ticket_id"] == "ABCDE-1"
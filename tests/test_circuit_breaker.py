@@ -0,0 +1,129 @@
+from http import HTTPStatus
+from unittest.mock import MagicMock, patch
+
+import pytest
+import requests
+
+from app.ticketing.circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpenError
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def response(status_code):
+    res = MagicMock()
+    res.status_code = status_code
+    return res
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def breaker(clock):
+    return CircuitBreaker("test", failure_threshold=3, reset_timeout=30, clock=clock)
+
+
+class TestCircuitBreaker:
+    def test_opens_after_threshold_and_fails_fast(self, breaker):
+        upstream = MagicMock(side_effect=requests.ConnectionError("down"))
+        for _ in range(3):
+            with pytest.raises(requests.ConnectionError):
+                breaker.call(upstream)
+        assert breaker.state == OPEN
+
+        with pytest.raises(CircuitOpenError) as exc_info:
+            breaker.call(upstream)
+        assert exc_info.value.status_code == HTTPStatus.SERVICE_UNAVAILABLE
+        assert upstream.call_count == 3  # noqa: PLR2004
+
+    def test_server_errors_count_as_failures_not_found_does_not(self, breaker):
+        breaker.call(lambda: response(HTTPStatus.BAD_GATEWAY))
+        breaker.call(lambda: response(HTTPStatus.TOO_MANY_REQUESTS))
+        breaker.call(lambda: response(HTTPStatus.NOT_FOUND))
+        assert breaker.state == CLOSED
+        assert breaker.failures == 0
+
+    def test_half_open_probe_closes_on_success(self, breaker, clock):
+        for _ in range(3):
+            breaker.call(lambda: response(HTTPStatus.SERVICE_UNAVAILABLE))
+        clock.now += 31
+
+        assert breaker.call(lambda: response(HTTPStatus.OK)).status_code == HTTPStatus.OK
+        assert breaker.state == CLOSED
+        assert breaker.failures == 0
+
+    def test_failed_probe_reopens(self, breaker, clock):
+        for _ in range(3):
+            breaker.call(lambda: response(HTTPStatus.SERVICE_UNAVAILABLE))
+        clock.now += 31
+
+        breaker.call(lambda: response(HTTPStatus.SERVICE_UNAVAILABLE))
+        assert breaker.state == OPEN
+        with pytest.raises(CircuitOpenError):
+            breaker.call(lambda: response(HTTPStatus.OK))
+
+    def test_single_probe_while_half_open(self, breaker, clock):
+        for _ in range(3):
+            breaker.call(lambda: response(HTTPStatus.SERVICE_UNAVAILABLE))
+        clock.now += 31
+
+        def probe():
+            assert breaker.state == HALF_OPEN
+            with pytest.raises(CircuitOpenError):
+                breaker.call(lambda: response(HTTPStatus.OK))
+            return response(HTTPStatus.OK)
+
+        breaker.call(probe)
+        assert breaker.state == CLOSED
+
+    def test_get_uses_shared_session(self, breaker):
+        with patch("app.ticketing.http.session.get", return_value=response(HTTPStatus.OK)) as mock_get:
+            breaker.get("https://example.com", timeout=1)
+        mock_get.assert_called_once_with("https://example.com", timeout=1)
+
+
+class TestStaleWhileError:
+    def test_failed_refresh_keeps_snapshot_and_reports_error(self, app_client):
+        import app.routers.common as common_module
+        from app import interface
+
+        sales = interface.all_sales
+        version = interface.snapshot_version
+        original_time = common_module._state.last_time
+        common_module._state.last_time = float("-inf")
+        try:
+            with patch("app.routers.common.force_refresh_all", side_effect=CircuitOpenError("tito", 12)):
+                assert common_module.refresh_all() is None
+            assert interface.all_sales is sales
+            assert interface.snapshot_version == version
+
+            res = app_client.get("/tickets/status/")
+            assert res.status_code == HTTPStatus.OK
+            status = res.json()
+            assert status["snapshot_version"] == version
+            assert status["ticket_count"] == len(sales)
+            assert "tito is unavailable" in status["last_refresh_error"]
+            assert "tito" in status["circuit_breakers"]
+        finally:
+            common_module._state.last_time = original_time
+            common_module._state.last_error = None
+
+    def test_responses_carry_snapshot_age(self, app_client):
+        res = app_client.get("/healthcheck/alive")
+        assert int(res.headers["X-Snapshot-Age"]) >= 0
+
+    def test_open_circuit_returns_503_with_retry_after(self, app_client):
+        with patch("app.routers.common.get_ticketing_backend") as get_backend:
+            get_backend.return_value.refresh.side_effect = CircuitOpenError("tito", 12)
+            with patch("app.routers.common.in_dummy_mode", False):  # noqa: FBT003
+                res = app_client.get("/tickets/refresh_all/")
+        assert res.status_code == HTTPStatus.SERVICE_UNAVAILABLE
+        assert res.headers["Retry-After"] == "13"
@@ -0,0 +1,195 @@
+"""Tests for serving several events from one process, see app.ticketing.events."""
+
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+from unittest.mock import patch
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from omegaconf import OmegaConf
+from starlette.middleware import Middleware
+
+from app.ticketing import events as events_module
+from app.ticketing.events import DEFAULT_EVENT, Event, EventLocal, bind_event, current_event, use_event
+
+SECOND = "second"
+
+
+class Counter:
+    def __init__(self):
+        self.value = 0
+
+
+@pytest.fixture
+def second_event(monkeypatch):
+    """Serve an additional Pretix event ``second`` with its own, empty snapshot."""
+    from app import interface
+    from app.middleware.interface import Interface
+
+    monkeypatch.setitem(events_module.events, SECOND, Event(key=SECOND, organizer="acme", event="secondcon", token="t2"))
+    Interface(in_dummy_mode=False)
+    interface.drop_events()
+    interface._instances[SECOND] = Interface.create(in_dummy_mode=False)
+    with use_event(SECOND):
+        interface.publish(
+            releases={"TICKET": {"id": 200, "title": "Ticket", "_attributes": {"is_onsite": True}}},
+            sales={"SECND-1": {"reference": "SECND-1", "order": "SECND", "email": "s@example.com", "name": "Sec Ond", "item": 200}},
+        )
+    yield interface.for_event(SECOND)
+    interface.drop_events()
+
+
+@pytest.fixture
+def event_client():
+    from app.middleware import EventMiddleware
+    from app.pretix.router import router
+
+    mini_app = FastAPI(middleware=[Middleware(EventMiddleware)])
+    mini_app.include_router(router)
+    return TestClient(mini_app, raise_server_exceptions=True)
+
+
+class TestEventLocal:
+    def test_one_instance_per_event(self):
+        state = EventLocal(Counter)
+        state.value = 1
+        with use_event(SECOND):
+            assert state.value == 0
+            state.value = 2
+        assert state.value == 1
+        assert state.for_event(SECOND).value == 2  # noqa: PLR2004
+
+    def test_drop_events_keeps_default(self):
+        default = Counter()
+        state = EventLocal(Counter, default=default)
+        other = state.for_event(SECOND)
+        state.drop_events()
+        assert state.for_event(DEFAULT_EVENT) is default
+        assert state.for_event(SECOND) is not other
+
+    def test_bind_event_carries_event_into_threads(self):
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            assert executor.submit(current_event).result() == DEFAULT_EVENT
+            with use_event(SECOND):
+                assert executor.submit(bind_event(current_event)).result() == SECOND
+
+
+class TestEventSelection:
+    def test_header_selects_snapshot_of_event(self, event_client, second_event):  # noqa: ARG002
+        with patch("app.ticketing.http.session.get") as mock_get:
+            response = event_client.get("/tickets/orders/SECND/", headers={"X-Event": SECOND})
+
+        assert response.status_code == HTTPStatus.OK
+        assert response.json()["positions"][0]["ticket_id"] == "SECND-1"
+        mock_get.assert_not_called()
+
+    def test_default_event_does_not_see_other_events(self, event_client, second_event):  # noqa: ARG002
+        from app import interface
+
+        assert "SECND-1" not in interface.all_sales
+        not_found = type("Response", (), {"status_code": HTTPStatus.NOT_FOUND})()
+        with patch("app.ticketing.http.session.get", return_value=not_found):
+            response = event_client.get("/tickets/orders/SECND/")
+        assert response.status_code == HTTPStatus.NOT_FOUND
+
+    def test_unknown_event_returns_404(self, event_client):
+        response = event_client.get("/tickets/orders/SECND/", headers={"X-Event": "nope"})
+        assert response.status_code == HTTPStatus.NOT_FOUND
+        assert response.json()["detail"] == "Unknown event: nope"
+
+    def test_upstream_calls_use_event_slugs_and_token(self, second_event):  # noqa: ARG002
+        from app.pretix import pretix_api
+
+        with use_event(SECOND):
+            assert pretix_api.event_url().endswith("/organizers/acme/events/secondcon")
+            assert pretix_api.event_headers()["Authorization"] == "Token t2"
+        assert pretix_api.find_event("acme", "secondcon") == SECOND
+        assert pretix_api.find_event("acme", "othercon") is None
+
+
+class TestEventConfig:
+    @pytest.fixture
+    def own_sections(self, monkeypatch):
+        from app.config.settings import reload_settings
+
+        sections = OmegaConf.create(
+            {
+                "pretix_mapping": {"categories": {"by_id": {9: {"is_speaker": True}}, "by_ticket_id": {201: {"is_sponsor": True}}}},
+                "addon_statistics": {"onsite_category_ids": [9], "tshirt_item_id": 345},
+            }
+        )
+        event = Event(key=SECOND, organizer="acme", event="secondcon", token="t2", sections=dict(sections.items()))
+        monkeypatch.setitem(events_module.events, SECOND, event)
+        reload_settings()
+        yield
+        monkeypatch.undo()
+        reload_settings()
+
+    @pytest.mark.usefixtures("own_sections")
+    def test_event_sections_replace_the_global_ones(self):
+        from app.config import CONFIG
+        from app.pretix.mapping import PretixAttributeMapper, position_attributes
+        from app.ticketing.events import event_config
+
+        position = {"item": 201, "reference": "SECND-1"}
+        with use_event(SECOND):
+            assert PretixAttributeMapper().get_attributes_from_item({"id": 200, "category": 9}) == {"is_speaker": True}
+            assert event_config("addon_statistics").tshirt_item_id == 345  # noqa: PLR2004
+            assert position_attributes(position, {}) == {"is_sponsor": True}
+        assert PretixAttributeMapper().get_attributes_from_item({"id": 200, "category": 9}) == {}
+        assert event_config("addon_statistics") is CONFIG.addon_statistics
+        assert position_attributes(position, {}) == {}
+
+
+class TestRefreshScheduler:
+    def test_signals_every_event(self, second_event):  # noqa: ARG002
+        import threading
+
+        from app.routers.common import RefreshScheduler
+
+        signalled: list[str] = []
+        both = threading.Event()
+
+        class Trigger:
+            def signal(self):
+                signalled.append(current_event())
+                if len(signalled) >= 2:  # noqa: PLR2004
+                    both.set()
+
+        scheduler = RefreshScheduler(Trigger(), interval=0.01)  # type: ignore[arg-type]
+        scheduler.start()
+        assert both.wait(5)
+        scheduler.stop()
+
+        assert signalled[:2] == [DEFAULT_EVENT, SECOND]
+
+    def test_interval_zero_disables(self):
+        from app.routers.common import RefreshScheduler, refresh_trigger
+
+        scheduler = RefreshScheduler(refresh_trigger, interval=0)
+        scheduler.start()
+        assert scheduler._thread is None
+
+    @pytest.mark.parametrize(("backend", "started"), [("pretix", True), ("tito", False)])
+    def test_only_started_for_pretix(self, monkeypatch, backend, started):
+        import app.main
+        from app.config import CONFIG
+
+        calls: list[str] = []
+
+        class Scheduler:
+            def start(self):
+                calls.append("start")
+
+            def stop(self):
+                calls.append("stop")
+
+        monkeypatch.setattr(app.main, "in_dummy_mode", False)
+        monkeypatch.setattr(app.main, "refresh_all_events", lambda: None)
+        monkeypatch.setattr(app.main, "refresh_scheduler", Scheduler())
+        monkeypatch.setitem(CONFIG, "TICKETING_BACKEND", backend)
+        with TestClient(FastAPI(lifespan=app.main.lifespan)):
+            pass
+
+        assert calls == (["start", "stop"] if started else ["stop"])
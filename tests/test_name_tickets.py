@@ -66,6 +66,27 @@ def test_validate_name_fail(client, reference, ticket):
         assert "hint" in data
 
 
+def test_validation_does_not_write_to_cache(client):
+    from app import interface
+
+    reference, ticket = next((k, v) for k, v in fake_data.items() if v["state"] != "unassigned")
+    cached = dict(interface.all_sales[reference])
+    response = client.post("/tickets/validate_name/", json={"ticket_id": reference, "name": ticket["name"]})
+    assert response.status_code == 200  # noqa: PLR2004
+    assert interface.all_sales[reference] == cached
+
+
+def test_release_profile_flags():
+    from app.tito.releases import build_release_profile
+
+    release = {"id": 1, "title": "Organiser & Speaker (on site)", "activities": ["on_site", "online_access"]}
+    profile = build_release_profile(release, frozenset({"on_site"}))
+    assert profile.is_valid
+    assert profile.is_organizer
+    assert profile.attributes == ("is_onsite", "is_organizer", "is_speaker", "online_access")
+    assert not build_release_profile({**release, "activities": ["remote_sale"]}, frozenset({"on_site"})).is_valid
+
+
 # random data tests must all fail
 @settings(max_examples=50, deadline=2000)
 @given(reference=st.text(min_size=1, max_size=10))
@@ -18,9 +18,14 @@ Reference URLs for Pretix API documentation:
   - Format example: "ORDER123" with position ID creates reference "ORDER123-1"
 """
 
+import base64
+import hashlib
+import hmac
+import json
 from http import HTTPStatus
 from threading import Barrier, Thread
 from time import sleep
+from types import SimpleNamespace
 from unittest.mock import MagicMock, patch
 
 import pytest
@@ -33,6 +38,64 @@ from app.pretix import pretix_api
 PRETIX_REFERENCE_PARTS = 2  # ORDER-POSITION format
 
 
+@pytest.fixture
+def live_interface():
+    """A non-dummy interface with one cached order and a clean per-order rate limit."""
+    from app.middleware.interface import Interface
+    from app.pretix import orders
+
+    iface = Interface(in_dummy_mode=False)
+    iface.publish(
+        releases={"TICKET": {"id": 100, "title": "Ticket", "_attributes": {"is_onsite": True}}},
+        sales={"ABCDE-1": {"reference": "ABCDE-1", "order": "ABCDE", "email": "a@example.com", "name": "Old Timer", "item": 100}},
+    )
+    orders._recent_fetches.clear()
+    orders._fetch_budget.clear()
+    yield iface
+    orders._recent_fetches.clear()
+    orders._fetch_budget.clear()
+
+
+@pytest.fixture
+def pretix_client():
+    """A minimal FastAPI app that only mounts the Pretix router.
+
+    Using a dedicated app (instead of the session-scoped Tito client from
+    conftest.py) keeps these tests isolated from backend-switching side
+    effects and avoids touching the global app state.
+    """
+    from app.pretix.router import router
+
+    mini_app = FastAPI()
+    mini_app.include_router(router)
+    return TestClient(mini_app, raise_server_exceptions=True)
+
+
+def pretix_order_response(order_code, status="p", name="Door Buyer"):
+    """Fake Pretix response for ``orders/{code}/`` with a single position."""
+    response = MagicMock()
+    response.status_code = HTTPStatus.OK
+    response.json.return_value = {
+        "status": status,
+        "positions": [
+            {
+                "id": 1,
+                "order": order_code,
+                "positionid": 1,
+                "item": 100,
+                "variation": None,
+                "attendee_name": name,
+                "attendee_email": "door@example.com",
+                "secret": "s3cr3t",
+                "addon_to": None,
+                "canceled": False,
+                "blocked": None,
+            },
+        ],
+    }
+    return response
+
+
 class TestPretixIntegration:
     """Test Pretix API integration."""
 
@@ -64,7 +127,7 @@ class TestPretixIntegration:
         assert "online_access" in activities
 
     @patch("app.pretix.pretix_api.in_dummy_mode", False)
-    @patch("requests.get")
+    @patch("app.ticketing.http.session.get")
     def test_search_reference_format(self, mock_get):
         """Test reference format parsing."""
         # Mock response
@@ -212,32 +275,682 @@ class TestPretixIntegration:
                 assert "category" in release
 
 
-class TestValidateEmailEndpoint:
-    """Tests for POST /tickets/validate_email/ on the Pretix backend.
+class TestOrderPositionLoading:
+    """Tests for loading all order positions from the paginated orderpositions endpoint."""
+
+    @staticmethod
+    def _page(results, has_next):
+        response = MagicMock()
+        response.status_code = HTTPStatus.OK
+        response.json.return_value = {"results": results, "next": "next-page-url" if has_next else None}
+        return response
+
+    @staticmethod
+    def _position(order, positionid, **extra):
+        return {
+            "id": hash((order, positionid)),
+            "order": order,
+            "positionid": positionid,
+            "item": 100,
+            "variation": None,
+            "attendee_name": "Test User",
+            "attendee_email": " Test.User@Example.com ",
+            "secret": f"secret-{order}-{positionid}",
+            "addon_to": None,
+            "canceled": False,
+            "blocked": None,
+            **extra,
+        }
 
-    These tests verify the non-blocking 404 behavior: unknown emails return 404
-    immediately and schedule a background refresh, rather than blocking the
-    caller for the duration of a full Pretix API refresh (~13 s).
-    """
+    @patch("app.pretix.pretix_api.in_dummy_mode", False)
+    @patch("app.ticketing.http.session.get")
+    def test_status_filter_and_fields_are_requested_server_side(self, mock_get):
+        """Pretix filters by order status and returns only the position fields the cache needs."""
+        from app import interface
 
-    # A known email from the fake Pretix dataset (tests/test_data/fake_all_sales_pretix.json)
-    KNOWN_EMAIL = "angel.hill@example.net"
-    UNKNOWN_EMAIL = "nobody@doesnotexist.example"
+        mock_get.return_value = self._page([], has_next=False)
+
+        pretix_api.get_all_order_positions()
+
+        assert mock_get.call_args.args[0].endswith("/orderpositions/")
+        params = mock_get.call_args.kwargs["params"]
+        assert params["order__status__in"] == "p,n"
+        assert params["page_size"] == pretix_api.PRETIX_PAGE_SIZE
+        assert "attendee_email" in params["include"]
+        assert "answers" not in params["include"]
+        assert interface.all_sales == {}
+
+    @patch("app.pretix.pretix_api.in_dummy_mode", False)
+    @patch("app.ticketing.http.session.get")
+    def test_pages_are_transformed_and_canceled_positions_skipped(self, mock_get):
+        """All pages are walked once and canceled positions are left out."""
+        from app import interface
+
+        mock_get.side_effect = [
+            self._page([self._position("ABCDE", 1), self._position("ABCDE", 2, canceled=True)], has_next=True),
+            self._page([self._position("PNDNG", 1)], has_next=False),
+        ]
+
+        pretix_api.get_all_order_positions()
+
+        assert set(interface.all_sales) == {"ABCDE-1", "PNDNG-1"}
+        sale = interface.all_sales["ABCDE-1"]
+        assert sale["email"] == "test.user@example.com"
+        assert sale["state"] == "complete"
+        assert sale["_pretix_data"]["secret"] == "secret-ABCDE-1"
+        assert mock_get.call_count == 2  # noqa: PLR2004
+
+    @patch("app.pretix.pretix_api.in_dummy_mode", False)
+    @patch("app.ticketing.http.session.get")
+    def test_addon_positions_are_collected_in_the_same_pass(self, mock_get):
+        """T-shirt add-on positions come from the ticket walk, no extra requests are made."""
+        from app import interface
+        from app.config import CONFIG
+
+        tshirt_item_id = CONFIG.addon_statistics.tshirt_item_id
+        parent = self._position("ABCDE", 1)
+        tshirt = self._position("ABCDE", 2, item=tshirt_item_id, variation=7, addon_to=parent["id"])
+        mock_get.return_value = self._page([parent, tshirt], has_next=False)
+
+        pretix_api.get_all_order_positions()
+
+        assert mock_get.call_count == 1
+        assert interface.addon_positions == [
+            {"id": tshirt["id"], "order": "ABCDE", "positionid": 2, "item": tshirt_item_id, "variation": 7, "addon_to": parent["id"]},
+        ]
+
+
+class TestRefreshPipeline:
+    """Tests for the unified Pretix refresh pipeline."""
 
     @pytest.fixture
-    def pretix_client(self):
-        """A minimal FastAPI app that only mounts the Pretix router.
+    def fake_fetches(self, monkeypatch):
+        """Patch every Pretix fetch with a fake returning minimal data.
 
-        Using a dedicated app (instead of the session-scoped Tito client from
-        conftest.py) keeps these tests isolated from backend-switching side
-        effects and avoids touching the global app state.
+        Set ``barrier`` on the returned namespace to make every fetch wait until all parties
+        are in flight at the same time.
         """
+        from app.config import CONFIG
+
+        monkeypatch.setitem(CONFIG.addon_statistics, "tshirt_item_id", 2)
+        fetches = SimpleNamespace(barrier=None)
+
+        def slow(result):
+            def fetch(*_args):
+                if fetches.barrier is not None:
+                    fetches.barrier.wait(timeout=10)
+                return result
+
+            return fetch
+
+        sale = {"reference": "ABCDE-1", "order": "ABCDE", "email": "a@example.com", "name": "A", "item": 1}
+        with (
+            patch("app.pretix.pretix_api.get_all_categories", side_effect=slow({5: {"id": 5, "name": "Cat", "internal_name": ""}})),
+            patch("app.pretix.pretix_api.fetch_raw_items", side_effect=slow([{"id": 1, "name": {"en": "Ticket"}, "category": 5}])),
+            patch("app.pretix.pretix_api.fetch_order_positions", side_effect=slow(({"ABCDE-1": sale}, [{"id": 9, "variation": 3}]))),
+            patch("app.pretix.pipeline.fetch_item_variations", side_effect=slow({3: "M"})),
+        ):
+            yield fetches
+
+    def test_fetches_run_concurrently_and_publish_one_snapshot(self, fake_fetches):
+        """All four fetches are in flight at the same time, all data is published together."""
+        from app import interface
+        from app.pretix.pipeline import refresh_snapshot
+
+        fake_fetches.barrier = Barrier(4)  # a fetch run after another breaks the barrier by timeout
+        refresh_snapshot()
+
+        assert interface.categories == {5: {"id": 5, "name": "Cat", "internal_name": ""}}
+        assert interface.all_releases["TICKET"]["category"]["name"] == "Cat"
+        assert "a@example.com" in interface.valid_emails
+        assert interface.addon_positions == [{"id": 9, "variation": 3}]
+        assert interface.item_variations == {3: "M"}
+
+    @pytest.mark.usefixtures("fake_fetches")
+    def test_failing_fetch_keeps_previous_snapshot(self):
+        """Nothing is published when any of the fetches fails."""
+        from app import interface
+        from app.errors import NotOk
+        from app.pretix.pipeline import refresh_snapshot
+
+        version = interface.snapshot_version
+        sales = interface.all_sales
+        with (
+            patch("app.pretix.pretix_api.fetch_order_positions", side_effect=NotOk(500, "boom")),
+            pytest.raises(NotOk),
+        ):
+            refresh_snapshot()
+
+        assert interface.snapshot_version == version
+        assert interface.all_sales is sales
+
+    @pytest.mark.usefixtures("fake_fetches")
+    def test_failing_variations_keep_previous_names(self, monkeypatch):
+        """Add-on variations are best effort, the tickets are published without them."""
+        from app import interface
+        from app.errors import NotOk
+        from app.pretix.pipeline import refresh_snapshot
+
+        monkeypatch.setattr(interface, "item_variations", {3: "L"})
+        with patch("app.pretix.pipeline.fetch_item_variations", side_effect=NotOk(404, "not found")):
+            refresh_snapshot()
+
+        assert "a@example.com" in interface.valid_emails
+        assert interface.item_variations == {3: "L"}
+
+    @pytest.mark.usefixtures("fake_fetches")
+    def test_variations_are_not_fetched_without_tshirt_item(self, monkeypatch):
+        from app import interface
+        from app.config import CONFIG
+        from app.pretix.pipeline import refresh_snapshot
+
+        monkeypatch.setitem(CONFIG.addon_statistics, "tshirt_item_id", 0)
+        with patch("app.pretix.pipeline.fetch_item_variations") as fetch:
+            refresh_snapshot()
+
+        fetch.assert_not_called()
+        assert "a@example.com" in interface.valid_emails
+
+
+class TestAddonStatistics:
+    """Tests for the precomputed add-on statistics aggregates."""
+
+    ONSITE_ITEM = 1
+    TSHIRT_ITEM = 2
+
+    @pytest.fixture
+    def snapshot(self, monkeypatch):
+        """Publish a small snapshot with two on-site tickets and one T-shirt add-on."""
+        from app import interface
+        from app.config import CONFIG
+
+        monkeypatch.setitem(CONFIG.addon_statistics, "onsite_category_ids", [7])
+        interface.publish(
+            releases={
+                "ON-SITE": {"id": self.ONSITE_ITEM, "title": "On-site", "category_id": 7},
+                "T-SHIRT": {"id": self.TSHIRT_ITEM, "title": "T-Shirt", "category_id": 8},
+            },
+            sales={
+                "ABCDE-1": {"reference": "ABCDE-1", "order": "ABCDE", "email": "a@example.com", "name": "A", "item": self.ONSITE_ITEM},
+                "FGHJK-1": {"reference": "FGHJK-1", "order": "FGHJK", "email": "b@example.com", "name": "B", "item": self.ONSITE_ITEM},
+            },
+            addon_positions=[{"id": 21, "order": "ABCDE", "positionid": 2, "item": self.TSHIRT_ITEM, "variation": 3, "addon_to": 11}],
+            item_variations={3: "M", 4: "L"},
+        )
+        return interface
+
+    @pytest.mark.usefixtures("snapshot")
+    def test_statistics_are_computed_once_per_snapshot(self):
+        """Repeated reads return the cached response without recomputing it."""
+        from app.pretix.addon_stats import get_addon_statistics
+
+        stats = get_addon_statistics()
+
+        assert stats.onsite_tickets_sold == 2  # noqa: PLR2004
+        assert stats.tshirt_purchased == 1
+        assert stats.tshirt_not_purchased == 1
+        assert [(v.variant_name, v.count) for v in stats.tshirt_variants] == [("M", 1)]
+        assert get_addon_statistics() is stats
+
+    def test_incremental_update_matches_full_rebuild(self, snapshot):
+        """Adding and cancelling positions updates the aggregates like a full recomputation."""
+        from app.pretix.addon_stats import AddonAggregates, addon_aggregates, get_addon_statistics
+
+        before = get_addon_statistics()
+        new_sale = {"reference": "LMNPQ-1", "order": "LMNPQ", "email": "c@example.com", "name": "C", "item": self.ONSITE_ITEM}
+        new_addon = {"id": 22, "order": "LMNPQ", "positionid": 2, "item": self.TSHIRT_ITEM, "variation": 4, "addon_to": 12}
+        snapshot.all_sales = {**snapshot.all_sales, "LMNPQ-1": new_sale}
+        snapshot.addon_positions = [new_addon]
+        addon_aggregates.update(added_sales=[new_sale], added_addons=[new_addon], removed_addon_ids=[21])
+
+        incremental = get_addon_statistics()
+        fresh = AddonAggregates()
+        fresh.rebuild()
+
+        assert incremental is not before
+        assert incremental == fresh.statistics()
+        assert incremental.onsite_tickets_sold == 3  # noqa: PLR2004
+        assert [(v.variant_name, v.count) for v in incremental.tshirt_variants] == [("L", 1)]
+
+    def test_endpoint_answers_304_until_snapshot_changes(self, snapshot):
+        """Dashboards polling with If-None-Match get an empty 304 while nothing changed."""
         from app.pretix.router import router
 
         mini_app = FastAPI()
         mini_app.include_router(router)
+        client = TestClient(mini_app, raise_server_exceptions=True)
+
+        first = client.get("/tickets/addon_statistics/")
+        etag = first.headers["ETag"]
+        assert first.json()["onsite_tickets_sold"] == 2  # noqa: PLR2004
+
+        not_modified = client.get("/tickets/addon_statistics/", headers={"If-None-Match": etag})
+        assert not_modified.status_code == HTTPStatus.NOT_MODIFIED
+        assert not_modified.content == b""
+
+        snapshot.all_sales = {k: v for k, v in snapshot.all_sales.items() if k != "FGHJK-1"}
+        changed = client.get("/tickets/addon_statistics/", headers={"If-None-Match": etag})
+        assert changed.status_code == HTTPStatus.OK
+        assert changed.headers["ETag"] != etag
+        assert changed.json()["onsite_tickets_sold"] == 1
+
+
+class TestOrderRepair:
+    """Tests for repairing order ID cache misses with a single-order fetch."""
+
+    ORDER = "NWRDR"
+
+    def test_order_miss_is_answered_after_single_order_fetch(self, pretix_client, live_interface):
+        """A ticket bought after the last refresh validates on the first try."""
+        with patch("app.ticketing.http.session.get", return_value=pretix_order_response(self.ORDER)) as mock_get:
+            response = pretix_client.post("/tickets/validate_attendee/", json={"order_id": self.ORDER, "name": "Door Buyer"})
+
+        assert response.status_code == HTTPStatus.OK
+        assert response.json()["is_attendee"] is True
+        assert mock_get.call_count == 1
+        assert mock_get.call_args.args[0].endswith(f"/orders/{self.ORDER}/")
+        assert f"{self.ORDER}-1" in live_interface.all_sales
+        assert "ABCDE-1" in live_interface.all_sales
+
+    @pytest.mark.usefixtures("live_interface")
+    def test_order_fetch_is_rate_limited_per_code(self, pretix_client):
+        """Repeated misses for the same unknown code hit Pretix only once per interval."""
+        not_found = MagicMock(status_code=HTTPStatus.NOT_FOUND)
+        with patch("app.ticketing.http.session.get", return_value=not_found) as mock_get:
+            for _ in range(3):
+                response = pretix_client.post("/tickets/validate_attendee/", json={"order_id": self.ORDER, "name": "Door Buyer"})
+                assert response.status_code == HTTPStatus.NOT_FOUND
+
+        assert mock_get.call_count == 1
+
+    @pytest.mark.usefixtures("live_interface")
+    def test_enumerating_codes_is_capped_by_the_event_budget(self, pretix_client, monkeypatch):
+        """Distinct unknown codes share one budget of upstream fetches."""
+        from app.pretix import orders
+        from app.ticketing.admission import TokenBuckets
+
+        monkeypatch.setattr(orders, "_fetch_budget", TokenBuckets(rate=0.01, burst=5))
+        not_found = MagicMock(status_code=HTTPStatus.NOT_FOUND)
+        with patch("app.ticketing.http.session.get", return_value=not_found) as mock_get:
+            for i in range(50):
+                response = pretix_client.post("/tickets/validate_attendee/", json={"order_id": f"ENM{i:02d}", "name": "Door Buyer"})
+                assert response.status_code == HTTPStatus.NOT_FOUND
+
+        assert mock_get.call_count == 5  # noqa: PLR2004
+
+    def test_canceled_order_is_dropped_from_cache(self, live_interface):
+        """Merging an order that is no longer valid removes its positions."""
+        from app.pretix.orders import refresh_order
+
+        with patch("app.ticketing.http.session.get", return_value=pretix_order_response("ABCDE", status="c")):
+            assert refresh_order("ABCDE") is False
+
+        assert "ABCDE-1" not in live_interface.all_sales
+        assert "ABCDE" not in live_interface.valid_order_ids
+
+
+class TestPretixWebhooks:
+    """Tests for push-based cache updates via Pretix webhooks, run against a fake Pretix API."""
+
+    SECRET = "webhook-secret"
+    ORDER = "WBHKD"
+
+    @pytest.fixture
+    def webhook_client(self, monkeypatch):
+        from app.pretix import webhooks
+
+        monkeypatch.setattr(webhooks, "WEBHOOK_SECRET", self.SECRET)
+        monkeypatch.setattr(pretix_api, "ORGANIZER_SLUG", "acme")
+        monkeypatch.setattr(pretix_api, "EVENT_SLUG", "democon")
+        mini_app = FastAPI()
+        mini_app.include_router(webhooks.router)
         return TestClient(mini_app, raise_server_exceptions=True)
 
+    def _notify(self, client, code, action="pretix.event.order.placed", secret=SECRET):
+        payload = {"notification_id": 1, "organizer": "acme", "event": "democon", "code": code, "action": action}
+        return client.post(f"/webhooks/pretix/?secret={secret}", json=payload)
+
+    def test_placed_order_is_merged_into_snapshot(self, webhook_client, live_interface):
+        """A new order shows up in the cache after the webhook was processed."""
+        from app.pretix.webhooks import webhook_queue
+
+        with patch("app.ticketing.http.session.get", return_value=pretix_order_response(self.ORDER)) as mock_get:
+            response = self._notify(webhook_client, self.ORDER)
+            webhook_queue.join()
+
+        assert response.status_code == HTTPStatus.ACCEPTED
+        assert mock_get.call_args.args[0].endswith(f"/orders/{self.ORDER}/")
+        assert f"{self.ORDER}-1" in live_interface.all_sales
+
+    def test_canceled_order_is_removed_from_snapshot(self, webhook_client, live_interface):
+        """A cancellation removes the order's positions."""
+        from app.pretix.webhooks import webhook_queue
+
+        with patch("app.ticketing.http.session.get", return_value=pretix_order_response("ABCDE", status="c")):
+            self._notify(webhook_client, "ABCDE", action="pretix.event.order.canceled")
+            webhook_queue.join()
+
+        assert "ABCDE-1" not in live_interface.all_sales
+
+    @pytest.mark.usefixtures("live_interface")
+    def test_invalid_secret_is_rejected(self, webhook_client):
+        """Without the shared secret nothing is fetched."""
+        with patch("app.ticketing.http.session.get") as mock_get:
+            response = self._notify(webhook_client, self.ORDER, secret="wrong")
+
+        assert response.status_code == HTTPStatus.FORBIDDEN
+        mock_get.assert_not_called()
+
+    def test_other_event_is_rejected(self, webhook_client):
+        """Notifications for other events are not queued."""
+        payload = {"organizer": "acme", "event": "othercon", "code": self.ORDER, "action": "pretix.event.order.paid"}
+        response = webhook_client.post(f"/webhooks/pretix/?secret={self.SECRET}", json=payload)
+
+        assert response.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
+
+
+class TestSecretScan:
+    """Tests for validating scanned ticket secrets from the snapshot's secret index."""
+
+    SECRET = "z3fsn8jyufm5kpk768q69gkbyr5f4h6w"
+
+    @pytest.fixture
+    def scan_interface(self, live_interface):
+        sale = {
+            "reference": "SCANX-1",
+            "order": "SCANX",
+            "email": "scan@example.com",
+            "name": "Scan Me",
+            "item": 100,
+            "_pretix_data": {"order": "SCANX", "positionid": 1, "secret": self.SECRET, "item": 100},
+        }
+        live_interface.all_sales = {**live_interface.all_sales, "SCANX-1": sale}
+        return live_interface
+
+    @pytest.mark.usefixtures("scan_interface")
+    def test_known_secret_validates_without_upstream_call(self, pretix_client):
+        """A scanned secret is answered from the index with the attribute flags."""
+        with patch("app.ticketing.http.session.get") as mock_get:
+            response = pretix_client.post("/tickets/validate_secret/", json={"secret": f" {self.SECRET} "})
+
+        assert response.status_code == HTTPStatus.OK
+        data = response.json()
+        assert data["is_attendee"] is True
+        assert data["ticket_id"] == "SCANX-1"
+        assert data["is_onsite"] is True
+        mock_get.assert_not_called()
+
+    @pytest.mark.usefixtures("scan_interface")
+    def test_unknown_secret_returns_404_and_signals_refresh(self, pretix_client):
+        """Unknown secrets are rejected immediately, a refresh is only signalled."""
+        with patch("app.routers.common.refresh_trigger") as trigger, patch("app.ticketing.http.session.get") as mock_get:
+            response = pretix_client.post("/tickets/validate_secret/", json={"secret": "unknown"})
+
+        assert response.status_code == HTTPStatus.NOT_FOUND
+        assert response.json()["is_attendee"] is False
+        trigger.signal.assert_called_once()
+        mock_get.assert_not_called()
+
+    @pytest.mark.usefixtures("scan_interface")
+    def test_search_by_secret_uses_index(self):
+        """search_by_secret no longer calls Pretix for cached tickets."""
+        with patch("app.ticketing.http.session.get") as mock_get:
+            assert pretix_api.search_by_secret(self.SECRET)["reference"] == "SCANX-1"
+        mock_get.assert_not_called()
+
+
+class TestOrderIndex:
+    """Tests for serving order lookups from the snapshot's order -> positions index."""
+
+    @pytest.fixture
+    def group_interface(self, live_interface):
+        second = {"reference": "ABCDE-2", "order": "ABCDE", "email": "b@example.com", "name": "New Comer", "item": 100}
+        live_interface.all_sales = {**live_interface.all_sales, "ABCDE-2": second}
+        return live_interface
+
+    def test_index_keeps_every_position_of_an_order(self, group_interface):
+        """Unlike valid_order_ids, the index holds all positions of an order."""
+        refs = [x["reference"] for x in group_interface.positions_by_order["ABCDE"]]
+        assert refs == ["ABCDE-1", "ABCDE-2"]
+
+    @pytest.mark.usefixtures("group_interface")
+    def test_search_by_order_uses_index(self):
+        with patch("app.ticketing.http.session.get") as mock_get:
+            positions = pretix_api.search_by_order("abcde")
+        assert len(positions) == 2  # noqa: PLR2004
+        mock_get.assert_not_called()
+
+    @pytest.mark.usefixtures("group_interface")
+    def test_order_positions_endpoint(self, pretix_client):
+        with patch("app.ticketing.http.session.get") as mock_get:
+            response = pretix_client.get("/tickets/orders/abcde/")
+
+        assert response.status_code == HTTPStatus.OK
+        data = response.json()
+        assert data["order_id"] == "ABCDE"
+        assert [x["ticket_id"] for x in data["positions"]] == ["ABCDE-1", "ABCDE-2"]
+        assert "secret" not in data["positions"][0]
+        mock_get.assert_not_called()
+
+    @pytest.mark.usefixtures("group_interface")
+    def test_unknown_order_is_fetched_once(self, pretix_client):
+        not_found = MagicMock(status_code=HTTPStatus.NOT_FOUND)
+        with patch("app.ticketing.http.session.get", return_value=not_found) as mock_get:
+            response = pretix_client.get("/tickets/orders/ZZZZZ/")
+
+        assert response.status_code == HTTPStatus.NOT_FOUND
+        assert mock_get.call_count == 1
+
+    @pytest.mark.usefixtures("group_interface")
+    def test_fuzzy_match_on_second_position(self, pretix_client):
+        """Name matching considers every position of the order."""
+        response = pretix_client.post("/tickets/validate_attendee/", json={"order_id": "ABCDE", "name": "Néw Cömer"})
+
+        assert response.status_code == HTTPStatus.OK
+        assert response.json()["ticket_id"] == "ABCDE-2"
+
+
+class TestBatchValidation:
+    """Tests for validating many attendee claims in one streamed call."""
+
+    CLAIMS = [
+        {"order_id": "ABCDE", "name": "Old Timer"},  # exact hit
+        {"order_id": "abcde", "name": "Öld Timér"},  # fuzzy match
+        {"order_id": "ABCDE", "name": "Somebody Else"},  # unknown name
+        {"order_id": "ZZZZZ", "name": "Old Timer"},  # unknown order
+        {"order_id": "TOO-LONG", "name": "Old Timer"},  # invalid claim
+    ]
+
+    def _results(self, response):
+        assert response.headers["content-type"] == "application/x-ndjson"
+        return [json.loads(line) for line in response.text.splitlines()]
+
+    @pytest.mark.usefixtures("live_interface")
+    def test_json_list_gives_one_result_per_claim(self, pretix_client):
+        with patch("app.routers.common.refresh_trigger") as trigger, patch("app.ticketing.http.session.get") as mock_get:
+            response = pretix_client.post("/tickets/validate_attendees/", json=self.CLAIMS)
+
+        results = self._results(response)
+        assert [x["index"] for x in results] == [0, 1, 2, 3, 4]
+        assert [x["status"] for x in results] == [200, 200, 404, 404, 422]
+        assert results[1]["ticket_id"] == "ABCDE-1"
+        assert results[1]["is_onsite"] is True
+        assert results[3]["hint"].startswith("Invalid order ID")
+        # unknown orders are not fetched one by one, a single refresh is signalled
+        mock_get.assert_not_called()
+        trigger.signal.assert_called_once()
+
+    @pytest.mark.usefixtures("live_interface")
+    def test_results_match_single_validation(self, pretix_client):
+        with patch("app.routers.common.refresh_trigger"), patch("app.ticketing.http.session.get"):
+            batch = self._results(pretix_client.post("/tickets/validate_attendees/", json=self.CLAIMS[:3]))
+            for claim, result in zip(self.CLAIMS[:3], batch, strict=True):
+                single = pretix_client.post("/tickets/validate_attendee/", json=claim)
+                assert single.status_code == result.pop("status")
+                result.pop("index")
+                assert single.json() == result
+
+    @pytest.mark.usefixtures("live_interface")
+    def test_ndjson_input(self, pretix_client):
+        body = "\n".join(json.dumps(x) for x in self.CLAIMS[:2]) + "\n\n"
+        response = pretix_client.post("/tickets/validate_attendees/", content=body, headers={"Content-Type": "application/x-ndjson"})
+
+        assert [x["status"] for x in self._results(response)] == [200, 200]
+
+    @pytest.mark.usefixtures("live_interface")
+    def test_claims_over_the_limit_are_cut_off(self, pretix_client, monkeypatch):
+        from dataclasses import replace
+
+        from app.config import settings
+
+        monkeypatch.setattr(settings, "_settings", replace(settings.get_settings(), batch_max_items=1))
+        results = self._results(pretix_client.post("/tickets/validate_attendees/", json=self.CLAIMS[:3]))
+
+        assert [x["status"] for x in results] == [200, 413]
+
+    def test_invalid_body_is_rejected(self, pretix_client):
+        response = pretix_client.post("/tickets/validate_attendees/", json={"order_id": "ABCDE", "name": "Old Timer"})
+        assert response.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
+
+
+class TestAttendeeExport:
+    """Tests for streaming attendee lists from the snapshot."""
+
+    @pytest.fixture
+    def export_interface(self, live_interface):
+        live_interface.publish(
+            releases={
+                "TICKET": {"id": 100, "title": "Ticket", "category_id": 7, "_attributes": {"is_onsite": True}},
+                "REMOTE": {"id": 101, "title": "Remote", "category_id": 8, "_attributes": {"is_remote": True}},
+            },
+            sales={
+                "ABCDE-1": {"reference": "ABCDE-1", "order": "ABCDE", "email": "a@example.com", "name": " Old Timer ", "item": 100},
+                "FGHJK-1": {"reference": "FGHJK-1", "order": "FGHJK", "email": "b@example.com", "name": "Far Away", "item": 101},
+            },
+        )
+        return live_interface
+
+    @pytest.mark.usefixtures("export_interface")
+    def test_ndjson_rows_with_resolved_flags(self, pretix_client):
+        with patch("app.ticketing.http.session.get") as mock_get:
+            response = pretix_client.get("/tickets/export/")
+
+        assert response.status_code == HTTPStatus.OK
+        assert response.headers["content-type"] == "application/x-ndjson"
+        rows = [json.loads(line) for line in response.text.splitlines()]
+        assert [x["ticket_id"] for x in rows] == ["ABCDE-1", "FGHJK-1"]
+        assert rows[0]["name"] == "Old Timer"
+        assert rows[0]["is_onsite"] is True
+        assert rows[0]["is_remote"] is False
+        assert rows[1]["item_title"] == "Remote"
+        mock_get.assert_not_called()
+
+    @pytest.mark.usefixtures("export_interface")
+    def test_csv_with_selected_fields_and_attribute_filter(self, pretix_client):
+        response = pretix_client.get("/tickets/export/?format=csv&fields=ticket_id&fields=email&attribute=is_remote")
+
+        assert response.headers["content-type"].startswith("text/csv")
+        assert response.text.splitlines() == ["ticket_id,email", "FGHJK-1,b@example.com"]
+
+    @pytest.mark.usefixtures("export_interface")
+    def test_filter_by_category_and_item(self, pretix_client):
+        by_category = pretix_client.get("/tickets/export/?category=7&fields=ticket_id")
+        by_item = pretix_client.get("/tickets/export/?item=101&fields=ticket_id")
+
+        assert by_category.text == '{"ticket_id":"ABCDE-1"}\n'
+        assert by_item.text == '{"ticket_id":"FGHJK-1"}\n'
+
+    def test_flags_set_to_false_are_left_out(self):
+        from app.pretix.mapping import position_attributes
+
+        release_id_map = {100: {"id": 100, "_attributes": {"is_onsite": True, "is_remote": False}}}
+
+        assert position_attributes({"item": 100, "reference": "ABCDE-1"}, release_id_map) == {"is_onsite": True}
+
+    @pytest.mark.usefixtures("export_interface")
+    def test_unknown_field_is_rejected(self, pretix_client):
+        response = pretix_client.get("/tickets/export/?fields=secret")
+
+        assert response.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
+        assert "secret" in response.json()["detail"]
+
+
+class TestKioskBundle:
+    """Tests for the signed offline validation bundle."""
+
+    SECRET = "kiosk-secret"
+
+    @pytest.fixture(autouse=True)
+    def bundle_secret(self, monkeypatch):
+        from app.pretix import bundle
+
+        monkeypatch.setattr(bundle, "BUNDLE_SECRET", self.SECRET)
+
+    @staticmethod
+    def hashes(data, field, typecode="Q"):
+        from array import array
+
+        return array(typecode, base64.b64decode(data[field])).tolist()
+
+    @pytest.mark.usefixtures("live_interface")
+    def test_full_bundle_is_signed_and_resolves_flags(self, pretix_client):
+        from app.pretix.bundle import key_hash
+
+        response = pretix_client.get("/tickets/kiosk_bundle/")
+
+        assert response.status_code == HTTPStatus.OK
+        expected = hmac.new(self.SECRET.encode(), response.content, hashlib.sha256).hexdigest()
+        assert response.headers["X-Bundle-Signature"] == expected
+        data = response.json()
+        assert self.hashes(data, "emails") == [key_hash("a@example.com")]
+        attendees = self.hashes(data, "attendees")
+        assert attendees == [key_hash("ABCDE\nOLD TIMER")]
+        flag_set = self.hashes(data, "attendee_flags", "H")[0]
+        assert data["flag_sets"][flag_set] == ["is_onsite"]
+
+    def test_delta_between_versions(self, pretix_client, live_interface):
+        from app.pretix.bundle import key_hash
+
+        first = pretix_client.get("/tickets/kiosk_bundle/").json()["bundle"]
+        assert pretix_client.get(f"/tickets/kiosk_bundle/?since={first}").status_code == HTTPStatus.NOT_MODIFIED
+        live_interface.merge_order(
+            "FGHJK", {"FGHJK-1": {"reference": "FGHJK-1", "order": "FGHJK", "email": "b@example.com", "name": "New Comer", "item": 100}}
+        )
+        live_interface.merge_order("ABCDE", {})
+
+        data = pretix_client.get(f"/tickets/kiosk_bundle/?since={first}").json()
+
+        assert data["base"] == first
+        assert self.hashes(data, "emails_added") == [key_hash("b@example.com")]
+        assert self.hashes(data, "emails_removed") == [key_hash("a@example.com")]
+        assert self.hashes(data, "attendees_added") == [key_hash("FGHJK\nNEW COMER")]
+        assert self.hashes(data, "attendees_removed") == [key_hash("ABCDE\nOLD TIMER")]
+
+    @pytest.mark.usefixtures("live_interface")
+    def test_unknown_base_returns_full_bundle(self, pretix_client):
+        data = pretix_client.get("/tickets/kiosk_bundle/?since=00000000-1").json()
+
+        assert data["base"] is None
+        assert "emails" in data
+
+    def test_disabled_without_secret(self, pretix_client, monkeypatch):
+        monkeypatch.setattr("app.pretix.bundle.BUNDLE_SECRET", None)
+
+        assert pretix_client.get("/tickets/kiosk_bundle/").status_code == HTTPStatus.SERVICE_UNAVAILABLE
+
+
+class TestValidateEmailEndpoint:
+    """Tests for POST /tickets/validate_email/ on the Pretix backend.
+
+    These tests verify the non-blocking 404 behavior: unknown emails return 404
+    immediately and schedule a background refresh, rather than blocking the
+    caller for the duration of a full Pretix API refresh (~13 s).
+    """
+
+    # A known email from the fake Pretix dataset (tests/test_data/fake_all_sales_pretix.json)
+    KNOWN_EMAIL = "angel.hill@example.net"
+    UNKNOWN_EMAIL = "nobody@doesnotexist.example"
+
     @pytest.fixture
     def backend_with_email(self):
         """Mock PretixBackend whose email cache contains KNOWN_EMAIL."""
@@ -256,45 +969,41 @@ class TestValidateEmailEndpoint:
         """An email present in the cache returns 200 without scheduling a refresh."""
         with (
             patch("app.pretix.router.get_ticketing_backend", return_value=backend_with_email),
-            patch("app.routers.common.refresh_all") as mock_refresh,
+            patch("app.routers.common.refresh_trigger") as mock_trigger,
         ):
             response = pretix_client.post("/tickets/validate_email/", json={"email": self.KNOWN_EMAIL})
 
         assert response.status_code == HTTPStatus.OK
         assert response.json() == {"valid": True}
-        mock_refresh.assert_not_called()
+        mock_trigger.signal.assert_not_called()
 
     def test_unknown_email_returns_404_immediately(self, pretix_client, backend_empty):
         """An email absent from the cache returns 404 without waiting for a refresh."""
-        with patch("app.pretix.router.get_ticketing_backend", return_value=backend_empty), patch("app.routers.common.refresh_all"):
+        with patch("app.pretix.router.get_ticketing_backend", return_value=backend_empty), patch("app.routers.common.refresh_trigger"):
             response = pretix_client.post("/tickets/validate_email/", json={"email": self.UNKNOWN_EMAIL})
 
         assert response.status_code == HTTPStatus.NOT_FOUND
         assert response.json() == {"valid": False}
 
     def test_unknown_email_triggers_background_refresh(self, pretix_client, backend_empty):
-        """A cache miss schedules exactly one background refresh for the next caller.
-
-        The TestClient runs background tasks synchronously after the response, so
-        the mock is called once by the time the assertion runs.
-        """
+        """A cache miss signals exactly one background refresh for the next caller."""
         with (
             patch("app.pretix.router.get_ticketing_backend", return_value=backend_empty),
-            patch("app.routers.common.refresh_all") as mock_refresh,
+            patch("app.routers.common.refresh_trigger") as mock_trigger,
         ):
             pretix_client.post("/tickets/validate_email/", json={"email": self.UNKNOWN_EMAIL})
 
-        mock_refresh.assert_called_once()
+        mock_trigger.signal.assert_called_once()
 
     def test_known_email_does_not_trigger_refresh(self, pretix_client, backend_with_email):
         """No background refresh is scheduled when the email IS found in cache."""
         with (
             patch("app.pretix.router.get_ticketing_backend", return_value=backend_with_email),
-            patch("app.routers.common.refresh_all") as mock_refresh,
+            patch("app.routers.common.refresh_trigger") as mock_trigger,
         ):
             pretix_client.post("/tickets/validate_email/", json={"email": self.KNOWN_EMAIL})
 
-        mock_refresh.assert_not_called()
+        mock_trigger.signal.assert_not_called()
 
     def test_mixed_case_email_is_matched(self, pretix_client, backend_with_email):
         """Mixed-case input matches the lower-cased cache entry.
@@ -309,13 +1018,47 @@ class TestValidateEmailEndpoint:
         mixed_case = "Angel.Hill@Example.NET"
         with (
             patch("app.pretix.router.get_ticketing_backend", return_value=backend_with_email),
-            patch("app.routers.common.refresh_all") as mock_refresh,
+            patch("app.routers.common.refresh_trigger") as mock_trigger,
         ):
             response = pretix_client.post("/tickets/validate_email/", json={"email": mixed_case})
 
         assert response.status_code == HTTPStatus.OK
         assert response.json() == {"valid": True}
-        mock_refresh.assert_not_called()
+        mock_trigger.signal.assert_not_called()
+
+    @pytest.mark.usefixtures("live_interface")
+    def test_typo_returns_masked_suggestion_without_refresh(self, pretix_client, backend_empty):
+        """With suggest=true a near miss returns a masked hint and does not signal a refresh."""
+        with (
+            patch("app.pretix.router.get_ticketing_backend", return_value=backend_empty),
+            patch("app.routers.common.refresh_trigger") as mock_trigger,
+        ):
+            response = pretix_client.post("/tickets/validate_email/?suggest=true", json={"email": "a@exmaple.com"})
+
+        assert response.status_code == HTTPStatus.NOT_FOUND
+        assert response.json() == {"valid": False, "suggestions": ["a@example.com"]}
+        mock_trigger.signal.assert_not_called()
+
+    @pytest.mark.usefixtures("live_interface")
+    def test_no_suggestion_still_triggers_refresh(self, pretix_client, backend_empty):
+        with (
+            patch("app.pretix.router.get_ticketing_backend", return_value=backend_empty),
+            patch("app.routers.common.refresh_trigger") as mock_trigger,
+        ):
+            response = pretix_client.post("/tickets/validate_email/?suggest=true", json={"email": self.UNKNOWN_EMAIL})
+
+        assert response.json() == {"valid": False, "suggestions": []}
+        mock_trigger.signal.assert_called_once()
+
+
+class TestPublish:
+    def test_version_moves_once_per_publish(self, live_interface):
+        from app.middleware import interface as interface_module
+
+        before = next(interface_module._snapshot_versions)
+        live_interface.publish(releases=dict(live_interface.all_releases), sales=dict(live_interface.all_sales))
+
+        assert live_interface.snapshot_version == before + 1
 
 
 class TestInterfaceCacheInvalidation:
@@ -396,6 +1139,25 @@ class TestInterfaceCacheInvalidation:
 
         assert "SECOND PERSON" in iface.valid_names
 
+    def test_order_indexes_pick_up_new_sale_after_refresh(self, interface_with_one_sale):
+        """Order-keyed indexes are rebuilt in the same pass as the email and name indexes."""
+        iface = interface_with_one_sale
+        iface.all_sales = {
+            "XYZ98-1": {
+                "reference": "XYZ98-1",
+                "order": "XYZ98",
+                "email": "second@example.com",
+                "name": " Second Person ",
+                "release_id": 101,
+                "state": "complete",
+            },
+        }
+
+        assert ("XYZ98", "SECOND PERSON") in iface.valid_order_name_combo
+        assert ("XYZ98", "second@example.com") in iface.valid_order_email_combo
+        assert "XYZ98" in iface.valid_order_ids
+        assert "ABC12" not in iface.valid_order_ids
+
 
 class TestRefreshAllLock:
     """Tests for the singleflight guard on refresh_all.
@@ -447,3 +1209,41 @@ class TestRefreshAllLock:
             common_module._state.last_time = original_time
 
         assert call_count == 1
+
+
+class TestRefreshTrigger:
+    """Tests for coalescing refresh signals from cache misses."""
+
+    N_SIGNALS = 200
+
+    def test_burst_of_signals_runs_at_most_two_refreshes(self):
+        """Signals during a pending or running refresh are merged, none of them blocks."""
+        from threading import Event
+
+        from app.routers.common import RefreshTrigger
+
+        started = Event()
+        release = Event()
+        calls = 0
+
+        def slow_refresh():
+            nonlocal calls
+            calls += 1
+            started.set()
+            release.wait(timeout=5)
+
+        trigger = RefreshTrigger(slow_refresh)
+        assert trigger.signal() is True
+        assert started.wait(timeout=5)
+        results = [trigger.signal() for _ in range(self.N_SIGNALS)]
+        release.set()
+        for _ in range(100):
+            if trigger.runs == 2 and not trigger._pending.is_set():  # noqa: PLR2004
+                break
+            sleep(0.01)
+
+        # one signal schedules the follow-up run, all others are merged into it
+        assert results.count(True) == 1
+        assert trigger.merged == self.N_SIGNALS - 1
+        assert trigger.stats()["signals"] == self.N_SIGNALS + 1
+        assert calls <= 2  # noqa: PLR2004
@@ -0,0 +1,123 @@
+"""Tests for the pre-encoded validation responses, see app.ticketing.responses."""
+
+import json
+from http import HTTPStatus
+
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+from app.pretix.models import PretixIsAnAttendee, PretixScanResult
+from app.ticketing.responses import INVALID, VALID, ModelEncoder, SnapshotBody, _accepts_gzip, conditional_response, truthy_response
+
+RESULT = {
+    "name": "Jörg Müller",
+    "order_id": "ABCDE",
+    "is_attendee": True,
+    "ticket_id": "ABCDE-1",
+    "email": "joerg@example.com",
+    "is_onsite": True,
+    "is_speaker": True,
+}
+
+
+class TestModelEncoder:
+    @pytest.mark.parametrize("model", [PretixIsAnAttendee, PretixScanResult])
+    def test_matches_validated_response(self, model):
+        body = ModelEncoder(model).encode(RESULT)
+        assert body == model.model_validate(RESULT).model_dump_json().encode()
+
+    def test_unknown_keys_are_dropped(self):
+        data = json.loads(ModelEncoder(PretixScanResult).encode({**RESULT, "_pretix_data": {"secret": "s"}}))
+        assert "_pretix_data" not in data
+        assert data["is_guest"] is False
+
+    def test_truthy_bodies(self):
+        assert json.loads(VALID) == {"valid": True}
+        assert json.loads(INVALID) == {"valid": False}
+        response = truthy_response(False, HTTPStatus.NOT_FOUND)
+        assert response.status_code == HTTPStatus.NOT_FOUND
+        assert response.media_type == "application/json"
+
+
+@pytest.mark.usefixtures("_set_tito_for_unit_tests")  # importing a router loads all routers, see conftest.py
+class TestOpenAPISchema:
+    def test_response_models_are_still_documented(self):
+        from app.pretix.router import router
+
+        mini_app = FastAPI()
+        mini_app.include_router(router)
+        paths = mini_app.openapi()["paths"]
+
+        def schema_ref(path):
+            return paths[path]["post"]["responses"]["200"]["content"]["application/json"]["schema"]["$ref"]
+
+        assert schema_ref("/tickets/validate_email/").endswith("/EmailValidation")
+        assert schema_ref("/tickets/validate_attendee/").endswith("/PretixIsAnAttendee")
+        assert schema_ref("/tickets/validate_secret/").endswith("/PretixScanResult")
+
+
+class TestConditionalGet:
+    def test_ticket_count_etag_follows_snapshot(self, app_client):
+        from app import interface
+
+        first = app_client.get("/tickets/ticket_count/")
+        etag = first.headers["ETag"]
+        assert first.json() == {"ticket_count": len(interface.all_sales)}
+
+        not_modified = app_client.get("/tickets/ticket_count/", headers={"If-None-Match": f'"other", {etag}'})
+        assert not_modified.status_code == HTTPStatus.NOT_MODIFIED
+        assert not_modified.headers["ETag"] == etag
+
+        sales = interface.all_sales
+        try:
+            interface.all_sales = dict(sales)
+            changed = app_client.get("/tickets/ticket_count/", headers={"If-None-Match": etag})
+        finally:
+            interface.all_sales = sales
+        assert changed.status_code == HTTPStatus.OK
+        assert changed.headers["ETag"] != etag
+
+    def test_ticket_types_body_matches_response_model(self, app_client):
+        from app import interface
+        from app.models.base import TicketTypes
+
+        response = app_client.get("/tickets/ticket_types/")
+        expected = TicketTypes(ticket_types=list(interface.all_releases.values())).model_dump(mode="json")
+        assert response.json() == expected
+
+    def test_large_bodies_are_served_gzipped(self):
+        body = SnapshotBody(lambda: {"names": [f"Attendee {i}" for i in range(500)]})
+        mini_app = FastAPI()
+
+        @mini_app.get("/names/")
+        async def names(request: Request):
+            return conditional_response(request, body)
+
+        client = TestClient(mini_app)
+        gzipped = client.get("/names/", headers={"Accept-Encoding": "gzip"})
+        plain = client.get("/names/", headers={"Accept-Encoding": "identity"})
+
+        assert gzipped.headers["Content-Encoding"] == "gzip"
+        assert "Content-Encoding" not in plain.headers
+        assert gzipped.json() == plain.json()
+        assert gzipped.headers["ETag"] == plain.headers["ETag"]
+
+    @pytest.mark.parametrize(
+        ("accept_encoding", "expected"),
+        [
+            ("gzip", True),
+            ("br, gzip;q=0.5", True),
+            ("GZIP ; Q=1", True),
+            ("*", True),
+            ("", False),
+            ("identity", False),
+            ("gzip;q=0", False),
+            ("gzip; q=0.000, *", False),
+            ("*;q=0", False),
+            ("x-gzipped, notgzip", False),
+            ("gzip;q=bogus", False),
+        ],
+    )
+    def test_gzip_is_negotiated_by_q_value(self, accept_encoding, expected):
+        assert _accepts_gzip(accept_encoding) is expected
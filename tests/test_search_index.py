@@ -0,0 +1,74 @@
+from http import HTTPStatus
+
+from app.ticketing.search_index import BKTree, EmailIndex, TrigramIndex, levenshtein, mask_email
+
+SALES = [
+    {"reference": "AAAAA-1", "order": "AAAAA", "name": "Sam Smith"},
+    {"reference": "AAAAA-2", "order": "AAAAA", "name": "Samantha Smithers"},
+    {"reference": "BBBBB-1", "order": "BBBBB", "name": "Zoë Ångström"},
+    {"reference": "CCCCC-1", "order": "CCCCC", "name": ""},
+]
+
+
+class TestTrigramIndex:
+    def test_unnamed_sales_are_not_indexed(self):
+        assert len(TrigramIndex(SALES)) == 3  # noqa: PLR2004
+
+    def test_substring_match_ranks_first(self):
+        results = TrigramIndex(SALES).search("smith")
+        assert [x["reference"] for _, x in results] == ["AAAAA-1", "AAAAA-2"]
+
+    def test_diacritics_and_typos_are_tolerated(self):
+        results = TrigramIndex(SALES).search("zoe angstrom")
+        assert results[0][1]["reference"] == "BBBBB-1"
+        assert results[0][0] == 1.0
+
+        results = TrigramIndex(SALES).search("Zoe Angstron")
+        assert results[0][1]["reference"] == "BBBBB-1"
+
+    def test_limit_and_no_match(self):
+        index = TrigramIndex(SALES)
+        assert len(index.search("smith", limit=1)) == 1
+        assert index.search("xyzzy") == []
+        assert index.search("  ") == []
+
+
+class TestEmailSuggestions:
+    EMAILS = ["jane.doe@example.com", "john.doe@example.com", "jane.doe@gmail.com", "sam@example.org"]
+
+    def test_levenshtein(self):
+        assert levenshtein("kitten", "sitting") == 3  # noqa: PLR2004
+        assert levenshtein("", "abc") == 3  # noqa: PLR2004
+        assert levenshtein("same", "same") == 0
+
+    def test_bk_tree_finds_all_words_within_distance(self):
+        words = ["book", "books", "cake", "boo", "cape", "cart", "boon", "cook"]
+        tree = BKTree(words)
+        for query in ["bo", "cale", "bookz"]:
+            expected = sorted((levenshtein(query, w), w) for w in words if levenshtein(query, w) <= 2)  # noqa: PLR2004
+            assert sorted(tree.search(query, 2)) == expected
+
+    def test_typos_in_local_part_and_domain(self):
+        index = EmailIndex(self.EMAILS)
+        assert index.suggest("jane.deo@example.com", 2, 3) == ["jane.doe@example.com"]
+        assert index.suggest("jane.doe@gmial.com", 2, 3) == ["jane.doe@gmail.com"]
+        assert index.suggest("nobody@nowhere.net", 2, 3) == []
+
+    def test_exact_match_is_not_suggested(self):
+        assert "jane.doe@example.com" not in EmailIndex(self.EMAILS).suggest("jane.doe@example.com", 2, 3)
+
+    def test_mask_email(self):
+        assert mask_email("jane.doe@example.com") == "j******e@example.com"
+        assert mask_email("ab@example.com") == "a*@example.com"
+
+
+def test_search_name_endpoint(app_client):
+    from app import interface
+
+    some_sale = next(x for x in interface.all_sales.values() if x.get("name"))
+    res = app_client.get("/tickets/search_name/", params={"name": some_sale["name"], "limit": 3})
+
+    assert res.status_code == HTTPStatus.OK
+    results = res.json()["results"]
+    assert 0 < len(results) <= 3  # noqa: PLR2004
+    assert results[0]["ticket_id"] == some_sale["reference"]
@@ -0,0 +1,32 @@
+from omegaconf import OmegaConf
+
+from app.config import CONFIG
+from app.config.settings import Settings, get_settings, reload_settings
+
+
+def make_settings(**overrides) -> Settings:
+    return Settings.from_config(OmegaConf.merge(CONFIG, overrides))
+
+
+def test_reference_roles_are_merged():
+    settings = get_settings()
+    # XYZAB-1 is listed in organizer_and_speaker and organizer_and_sponsor in base.yml
+    assert set(settings.reference_roles["XYZAB-1"]) == {"is_speaker", "is_organizer", "is_sponsor"}
+    assert settings.reference_roles["XYZFG-1"] == ("is_speaker",)
+
+
+def test_exclude_patterns_are_case_insensitive():
+    settings = make_settings(exclude_ticket_patterns=["Test Ticket"])
+    assert settings.exclude_ticket_patterns == ("test ticket",)
+    assert settings.exclude_ticket_type("TEST TICKET (internal)")
+    assert not settings.exclude_ticket_type("Business")
+
+
+def test_reload_picks_up_config_changes(monkeypatch):
+    monkeypatch.setitem(CONFIG.name_matching, "exact_match_threshold", 0.5)
+    try:
+        assert reload_settings().exact_match_threshold == 0.5  # noqa: PLR2004
+        assert get_settings().exact_match_threshold == 0.5  # noqa: PLR2004
+    finally:
+        monkeypatch.undo()
+        reload_settings()